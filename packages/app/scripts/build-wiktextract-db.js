@@ -10,6 +10,9 @@
  *   node build-wiktextract-db.js --home=es --target=en
  *   node build-wiktextract-db.js --home=en --target=es
  *   node build-wiktextract-db.js (defaults to Spanish home, English target)
+ *
+ * Holds every entry in memory; full extracts (e.g. English) are converted
+ * to SQLite packs with tools/wiktextract.py, which streams them.
  */
 
 const fs = require('fs');
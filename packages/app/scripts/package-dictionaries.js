@@ -45,6 +45,36 @@ class DictionaryPackager {
     return hashSum.digest('hex');
   }
 
+  /**
+   * Load public/dictionaries/aliases.json (names tools/cas_store.py collapsed onto one copy)
+   */
+  loadAliases() {
+    const aliasesPath = path.join(this.publicDir, 'aliases.json');
+    if (!fs.existsSync(aliasesPath)) {
+      return {};
+    }
+    const data = JSON.parse(fs.readFileSync(aliasesPath, 'utf8'));
+    return data.version === 1 ? data.aliases || {} : {};
+  }
+
+  /**
+   * Save aliases in the layout tools/cas_store.py writes
+   */
+  saveAliases(aliases) {
+    const sorted = Object.keys(aliases).sort().reduce((acc, name) => {
+      acc[name] = aliases[name];
+      return acc;
+    }, {});
+    fs.writeFileSync(path.join(this.publicDir, 'aliases.json'), JSON.stringify({ version: 1, aliases: sorted }, null, 2) + '\n');
+  }
+
+  /**
+   * Public file that serves a package name (aliases resolve to the copy that was kept)
+   */
+  publicName(filename, aliases) {
+    return aliases[filename] ? aliases[filename].file : filename;
+  }
+
   /**
    * Compress SQLite file
    */
@@ -52,8 +82,9 @@ class DictionaryPackager {
     try {
       console.log(`🗜️  Compressing: ${path.basename(inputPath)}`);
       
-      // Use gzip compression (better React Native support than bz2)
-      const command = `gzip -c "${inputPath}" > "${outputPath}"`;
+      // Use gzip compression (better React Native support than bz2); -n leaves out the
+      // name and mtime so an unchanged dictionary packages to the same bytes (and aliases hold)
+      const command = `gzip -nc "${inputPath}" > "${outputPath}"`;
       await execAsync(command);
       
       const originalSize = fs.statSync(inputPath).size;
@@ -113,8 +144,10 @@ class DictionaryPackager {
       languageGroups[file.language].push(file);
     });
 
-    // Package each language
+    // Package each language; identical packages are published once
     const packages = [];
+    const aliases = this.loadAliases();
+    const published = {};
     
     for (const [language, files] of Object.entries(languageGroups)) {
       console.log(`📖 Packaging language: ${language.toUpperCase()}`);
@@ -131,15 +164,26 @@ class DictionaryPackager {
         // Calculate hash
         const hash = this.calculateHash(compressedPath);
 
-        // Copy to public directory for serving
-        const publicPath = path.join(this.publicDir, `${language}_dict.sqlite.gz`);
-        fs.copyFileSync(compressedPath, publicPath);
+        // Copy to public directory for serving, unless the name is an alias of a kept copy
+        const filename = `${language}_dict.sqlite.gz`;
+        const alias = aliases[filename];
+        // A name stays an alias while it still packages the same bytes as the kept copy
+        const publicFile = published[hash] || (alias && alias.sha256 === hash ? alias.file : filename);
+        if (publicFile === filename) {
+          delete aliases[filename];
+        } else {
+          aliases[filename] = { file: publicFile, sha256: hash, bytes: compressionResult.compressedSize };
+        }
+        if (!published[hash]) {
+          fs.copyFileSync(compressedPath, path.join(this.publicDir, publicFile));
+          published[hash] = publicFile;
+        }
 
         const packageInfo = {
           language,
-          filename: `${language}_dict.sqlite.gz`,
+          filename,
           originalName: primaryDict.name,
-          url: `/dictionaries/${language}_dict.sqlite.gz`, // Relative URL for serving
+          url: `/dictionaries/${publicFile}`, // Relative URL for serving
           hash,
           size: compressionResult.compressedSize,
           originalSize: compressionResult.originalSize,
@@ -179,6 +223,8 @@ class DictionaryPackager {
       }, {})
     };
 
+    this.saveAliases(aliases);
+
     // Save registry
     const registryPath = path.join(this.outputDir, 'package-registry.json');
     const publicRegistryPath = path.join(this.publicDir, 'package-registry.json');
@@ -219,10 +265,15 @@ class DictionaryPackager {
     }
 
     const registry = JSON.parse(fs.readFileSync(registryPath, 'utf8'));
+    const aliases = this.loadAliases();
     let allValid = true;
 
     for (const [language, packageInfo] of Object.entries(registry.packages)) {
-      const packagePath = path.join(this.publicDir, `${language}_dict.sqlite.gz`);
+      // The registry url names the served file; older registries fall back to the package name
+      const filename = packageInfo.url
+        ? path.basename(packageInfo.url)
+        : this.publicName(`${language}_dict.sqlite.gz`, aliases);
+      const packagePath = path.join(this.publicDir, filename);
       
       if (!fs.existsSync(packagePath)) {
         console.log(`❌ Missing package: ${language}`);
@@ -0,0 +1,32 @@
+import { completePrefix, prefixUpperBound } from '../../services/completion';
+
+describe('prefixUpperBound', () => {
+  it('bounds every string with the prefix in code point order', () => {
+    expect(prefixUpperBound('ab')).toBe('ac');
+    expect('abzzz' < prefixUpperBound('ab')).toBe(true);
+    expect(prefixUpperBound('café')).toBe('cafê');
+  });
+});
+
+describe('completePrefix', () => {
+  it('keeps the stored ranking of a heavy prefix', async () => {
+    const db = {
+      getFirstAsync: jest.fn().mockResolvedValue({ entry_ids: '9 3 5' }),
+      getAllAsync: jest.fn().mockResolvedValue([
+        { id: 3, lemma: 'hotel' },
+        { id: 5, lemma: 'hour' },
+        { id: 9, lemma: 'house' },
+      ]),
+    };
+    await expect(completePrefix(db, 'ho', 2)).resolves.toEqual(['house', 'hotel']);
+  });
+
+  it('falls back to a lemma_norm range for other prefixes', async () => {
+    const db = {
+      getFirstAsync: jest.fn().mockResolvedValue(null),
+      getAllAsync: jest.fn().mockResolvedValue([{ lemma: 'house' }]),
+    };
+    await expect(completePrefix(db, 'hou', 10)).resolves.toEqual(['house']);
+    expect(db.getAllAsync.mock.calls[0][1]).toEqual(['hou', 'hov', 10]);
+  });
+});
@@ -0,0 +1,14 @@
+import { buildGlossQuery } from '../../services/glossSearch';
+
+describe('buildGlossQuery', () => {
+  it('quotes every word for word tokenizers, dropping FTS5 syntax', () => {
+    expect(buildGlossQuery('big "house"*', 'porter unicode61 remove_diacritics 2')).toBe('"big" "house"');
+    expect(buildGlossQuery('café OR', 'unicode61 remove_diacritics 2')).toBe('"café" "OR"');
+    expect(buildGlossQuery('  ', 'unicode61')).toBe('');
+  });
+
+  it('matches trigram indexes on the whole input once it spans a trigram', () => {
+    expect(buildGlossQuery(' 房屋 ', 'trigram')).toBe('');
+    expect(buildGlossQuery('房屋，住', 'trigram')).toBe('"房屋，住"');
+  });
+});
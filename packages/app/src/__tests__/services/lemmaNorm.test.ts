@@ -0,0 +1,22 @@
+import { LemmaNormRules, normalizeLemma } from '../../services/lemmaNorm';
+
+const rules = (language: string | null, strip_marks = ''): LemmaNormRules => ({
+  version: 1,
+  language,
+  strip_marks,
+  folds: { 'ß': 'ss', 'ς': 'σ', 'ſ': 's' },
+});
+
+describe('normalizeLemma', () => {
+  it('folds case beyond ASCII the same way the pack builder does', () => {
+    expect(normalizeLemma('ÉCOLE', rules('fr'))).toBe('école');
+    expect(normalizeLemma('Ñandú', rules('es'))).toBe('ñandú');
+    expect(normalizeLemma('Straße', rules('de'))).toBe('strasse');
+    expect(normalizeLemma('ΟΔΟΣ', rules('el'))).toBe(normalizeLemma('οδος', rules('el')));
+  });
+
+  it('strips only the marks listed in the pack rules', () => {
+    expect(normalizeLemma('Молоко́', rules('ru', '̀́'))).toBe('молоко');
+    expect(normalizeLemma('año', rules('es'))).toBe('año');
+  });
+});
@@ -0,0 +1,36 @@
+import { identicalPacks, normalizeRegistry } from '../../services/packRegistry';
+
+// Written by tools/generate-registry.py over eng-spa and eng-esp (identical, collapsed) plus eng-fra
+const generated = require('../fixtures/generated-registry.json');
+
+const BASE = 'https://example.org/packs/';
+
+describe('normalizeRegistry', () => {
+  it('keys the generated pack list by id', () => {
+    const registry = normalizeRegistry(generated, BASE);
+    expect(Object.keys(registry.packs).sort()).toEqual(['eng-esp', 'eng-fra', 'eng-spa']);
+    expect(registry.packs['eng-spa'].id).toBe('eng-spa');
+    expect(registry.packs['eng-spa'].url).toBe(`${BASE}eng-esp.sqlite.zip`);
+    expect(registry.packs['eng-fra'].bytes).toBeGreaterThan(0);
+  });
+
+  it('passes registries keyed by id through', () => {
+    const registry = normalizeRegistry({
+      version: 'fallback',
+      baseUrl: '',
+      packs: { 'eng-spa': { url: 'u', bytes: 1, sha256: 'placeholder', license: 'l', source: 's' } },
+    }, BASE);
+    expect(registry.packs['eng-spa'].id).toBe('eng-spa');
+    expect(identicalPacks(registry, 'eng-spa')).toEqual([]);
+  });
+});
+
+describe('identicalPacks', () => {
+  it('finds the alias published with the same digest', () => {
+    const registry = normalizeRegistry(generated, BASE);
+    expect(identicalPacks(registry, 'eng-spa')).toEqual(['eng-esp']);
+    expect(identicalPacks(registry, 'eng-esp')).toEqual(['eng-spa']);
+    expect(identicalPacks(registry, 'eng-fra')).toEqual([]);
+    expect(identicalPacks(registry, 'missing')).toEqual([]);
+  });
+});
@@ -13,6 +13,7 @@ import { SafeAreaView } from 'react-native-safe-area-context';
 import { useNavigation } from '../navigation/SimpleNavigator';
 import { useTheme } from '../hooks/useTheme';
 import { LanguagePackService } from '../services/languagePackService';
+import { decodeDefinition, loadDefinitionCodec } from '../services/definitionCodec';
 import { 
   LanguagePackManifest, 
   LanguagePackDownload, 
@@ -339,7 +340,7 @@ export default function LanguagePacksScreen() {
         const version = await db.getAllAsync("SELECT sqlite_version()");
         console.log(`📦 SQLite version:`, version);
         
-        tables = await db.getAllAsync("SELECT name FROM sqlite_master WHERE type='table'");
+        tables = await db.getAllAsync("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')");
         console.log(`📦 Database tables:`, tables);
         
         // Also check for any objects in the database
@@ -360,7 +361,9 @@ export default function LanguagePacksScreen() {
         const rows = await db.getAllAsync('SELECT COUNT(*) as count FROM dict');
         entryCount = rows[0].count;
         const samples = await db.getAllAsync('SELECT lemma, def FROM dict LIMIT 3');
-        sampleEntries = samples.map(r => `${r.lemma}: ${r.def.substring(0, 50)}...`);
+        // Packs built with --compress-defs store definitions as BLOBs
+        const codec = await loadDefinitionCodec(db);
+        sampleEntries = samples.map(r => `${r.lemma}: ${decodeDefinition(r.def, codec).substring(0, 50)}...`);
       } else if (tables.some(t => t.name === 'word')) {
         const rows = await db.getAllAsync('SELECT COUNT(*) as count FROM word');
         entryCount = rows[0].count;
@@ -0,0 +1,71 @@
+/**
+ * Ranked prefix completion
+ *
+ * Mirrors tools/completion.py. Packs built with the completion index store
+ * the top-ranked entry ids of every prefix that matches more than `limit`
+ * headwords in a `completion` table; any other prefix matches at most
+ * `limit` headwords and is answered with a range probe of the lemma_norm
+ * index. Either way a completion reads a bounded number of pages, unlike
+ * `LIKE 'abc%'`, which scans the table.
+ */
+
+export interface CompletionSpec {
+  version: number;
+  limit: number;
+  rank: string;
+}
+
+export const COMPLETION_VERSION = 1;
+
+/**
+ * Smallest string greater than every string starting with `key`, in code
+ * point order (SQLite's BINARY order on UTF-8 text)
+ */
+export function prefixUpperBound(key: string): string {
+  const chars = Array.from(key);
+  const last = chars.pop() as string;
+  return chars.join('') + String.fromCodePoint(last.codePointAt(0)! + 1);
+}
+
+/**
+ * Read a pack's completion index spec; null for packs built without one
+ */
+export async function loadCompletionSpec(db: any): Promise<CompletionSpec | null> {
+  try {
+    const row = await db.getFirstAsync("SELECT value FROM meta WHERE key = 'completion'");
+    if (!row) {
+      return null;
+    }
+    const spec = JSON.parse(row.value) as CompletionSpec;
+    return spec.version === COMPLETION_VERSION ? spec : null;
+  } catch (error) {
+    // Older packs have no meta table
+    return null;
+  }
+}
+
+/**
+ * Top-ranked headwords starting with an already-normalized `key`
+ */
+export async function completePrefix(db: any, key: string, limit: number): Promise<string[]> {
+  if (!key) {
+    return [];
+  }
+  const stored = await db.getFirstAsync('SELECT entry_ids FROM completion WHERE prefix = ?', [key]);
+  if (stored) {
+    const ids = stored.entry_ids.split(' ').slice(0, limit).map(Number);
+    const rows = await db.getAllAsync(
+      `SELECT id, lemma FROM entry WHERE id IN (${ids.map(() => '?').join(',')})`,
+      ids
+    );
+    const lemmas = new Map<number, string>(rows.map((row: any) => [row.id, row.lemma]));
+    return ids.map((id: number) => lemmas.get(id)).filter((lemma: string | undefined): lemma is string => !!lemma);
+  }
+  // Not a stored prefix, so at most spec.limit headwords match
+  const rows = await db.getAllAsync(
+    'SELECT lemma FROM entry JOIN entry_rank ON entry_rank.entry_id = entry.id ' +
+      'WHERE lemma_norm >= ? AND lemma_norm < ? ORDER BY rank DESC, id LIMIT ?',
+    [key, prefixUpperBound(key), limit]
+  );
+  return rows.map((row: any) => row.lemma);
+}
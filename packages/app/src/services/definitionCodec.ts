@@ -0,0 +1,50 @@
+import { inflateSync, strFromU8 } from 'fflate';
+
+/**
+ * Definition codec for packs built with trained-dictionary compression
+ *
+ * Mirrors tools/def_codec.py. Compressed definitions are BLOBs of raw
+ * deflate data against a preset dictionary stored in the pack's `meta`
+ * table; rows that did not shrink stay plain TEXT. Each lookup inflates
+ * only its own row.
+ */
+
+export interface DefinitionCodec {
+  codec: string;
+  dictionary: Uint8Array;
+}
+
+/**
+ * Read a pack's definition codec; null for packs with plain definitions
+ */
+export async function loadDefinitionCodec(db: any): Promise<DefinitionCodec | null> {
+  try {
+    const rows = await db.getAllAsync("SELECT key, value FROM meta WHERE key IN ('def_codec', 'def_dict')");
+    const values = new Map<string, any>(rows.map((row: any) => [row.key, row.value]));
+    if (!values.has('def_codec')) {
+      return null;
+    }
+    const spec = JSON.parse(values.get('def_codec'));
+    if (spec.codec !== 'deflate') {
+      console.warn(`📖 Unsupported definition codec: ${spec.codec}`);
+      return null;
+    }
+    return { codec: spec.codec, dictionary: values.get('def_dict') };
+  } catch (error) {
+    // Older packs have no meta table
+    return null;
+  }
+}
+
+/**
+ * Turn a stored definition (TEXT or compressed BLOB) into text
+ */
+export function decodeDefinition(value: string | Uint8Array, codec: DefinitionCodec | null): string {
+  if (typeof value === 'string' || value == null) {
+    return value;
+  }
+  if (!codec) {
+    throw new Error('Compressed definition in a pack without a supported codec');
+  }
+  return strFromU8(inflateSync(value, { dictionary: codec.dictionary }));
+}
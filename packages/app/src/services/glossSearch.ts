@@ -0,0 +1,48 @@
+/**
+ * Full-text search over definition glosses
+ *
+ * Mirrors tools/gloss_index.py. Packs built with the optional gloss index
+ * carry a contentless FTS5 table `gloss` (rowid = entry id) and record its
+ * tokenizer in the `meta` table ('gloss_fts'); reverse lookups ("entries
+ * whose gloss contains 'house'") are an index query instead of a scan of
+ * the definition HTML.
+ */
+
+export interface GlossIndexSpec {
+  version: number;
+  language: string | null;
+  tokenizer: string;
+}
+
+export const GLOSS_VERSION = 1;
+
+/**
+ * FTS5 MATCH expression for user input. Word tokenizers get every word,
+ * quoted; trigram indexes match the whole input as a substring, which
+ * takes at least three characters. Returns '' when nothing can match.
+ */
+export function buildGlossQuery(text: string, tokenizer: string): string {
+  if (tokenizer === 'trigram') {
+    const phrase = text.trim();
+    return Array.from(phrase).length >= 3 ? `"${phrase.replace(/"/g, '""')}"` : '';
+  }
+  const words = text.match(/[\p{L}\p{N}\p{M}_]+/gu) || [];
+  return words.map(word => `"${word}"`).join(' ');
+}
+
+/**
+ * Read a pack's gloss index spec; null for packs built without one
+ */
+export async function loadGlossIndexSpec(db: any): Promise<GlossIndexSpec | null> {
+  try {
+    const row = await db.getFirstAsync("SELECT value FROM meta WHERE key = 'gloss_fts'");
+    if (!row) {
+      return null;
+    }
+    const spec = JSON.parse(row.value) as GlossIndexSpec;
+    return spec.version === GLOSS_VERSION ? spec : null;
+  } catch (error) {
+    // Older packs have no meta table
+    return null;
+  }
+}
@@ -598,7 +598,7 @@ export class LanguagePackService {
           console.log(`📦 Step 2: Database object keys: ${Object.keys(db)}`);
           
           console.log(`📦 Step 3: Querying sqlite_master for table information...`);
-          const tables = await db.getAllAsync("SELECT name FROM sqlite_master WHERE type='table'");
+          const tables = await db.getAllAsync("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')");
           console.log(`📦 Step 3: ✅ Query completed. Raw result:`, tables);
           console.log(`📦 Step 3: Available tables:`, tables.map(t => t.name));
           console.log(`📦 Step 3: Total tables found: ${tables.length}`);
@@ -0,0 +1,54 @@
+/**
+ * Lemma lookup-key normalization
+ *
+ * Mirrors tools/lemma_norm.py. Packs built with a `lemma_norm` column store
+ * the rules used to build it in their `meta` table; query keys are
+ * normalized with the same rules so lookups probe the lemma_norm index
+ * instead of scanning the table with COLLATE NOCASE.
+ */
+
+export interface LemmaNormRules {
+  version: number;
+  language: string | null;
+  /** Combining marks removed after NFD (e.g. Cyrillic stress, Arabic harakat) */
+  strip_marks: string;
+  /** Case folds applied after toLowerCase() (ß → ss, ς → σ, ...) */
+  folds: Record<string, string>;
+}
+
+export const LEMMA_NORM_VERSION = 1;
+
+/**
+ * Normalize a lookup key: NFD, strip marks, lowercase, extra folds, NFC
+ */
+export function normalizeLemma(text: string, rules: LemmaNormRules): string {
+  let key = text.normalize('NFD');
+  if (rules.strip_marks) {
+    const marks = new Set(Array.from(rules.strip_marks));
+    key = Array.from(key).filter(ch => !marks.has(ch)).join('');
+  }
+  key = key.toLowerCase();
+  for (const [source, target] of Object.entries(rules.folds || {})) {
+    if (key.includes(source)) {
+      key = key.split(source).join(target);
+    }
+  }
+  return key.normalize('NFC').trim();
+}
+
+/**
+ * Read a pack's normalization rules; null for packs without a lemma_norm column
+ */
+export async function loadLemmaNormRules(db: any): Promise<LemmaNormRules | null> {
+  try {
+    const row = await db.getFirstAsync("SELECT value FROM meta WHERE key = 'lemma_norm'");
+    if (!row) {
+      return null;
+    }
+    const rules = JSON.parse(row.value) as LemmaNormRules;
+    return rules.version === LEMMA_NORM_VERSION ? rules : null;
+  } catch (error) {
+    // Older packs have no meta table
+    return null;
+  }
+}
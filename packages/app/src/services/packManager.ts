@@ -1,6 +1,7 @@
 import * as FileSystem from 'expo-file-system/legacy';
 import { unzipSync } from 'fflate';
 import { ErrorHandler, ErrorCode, Validator } from './errorHandling';
+import { PackRegistry, identicalPacks, normalizeRegistry } from './packRegistry';
 
 /**
  * Pack Manager - Pure JS dictionary pack download and extraction
@@ -12,19 +13,8 @@ const CACHE_DIR = `${FileSystem.cacheDirectory}`;
 
 // GitHub repository for dictionary packs
 const GITHUB_REPO = 'kayvangharbi/PolyBook';
-const REGISTRY_URL = `https://github.com/${GITHUB_REPO}/releases/download/packs/registry.json`;
-
-interface PackRegistry {
-  version: string;
-  baseUrl: string;
-  packs: Record<string, {
-    url: string;
-    bytes: number;
-    sha256: string;
-    license: string;
-    source: string;
-  }>;
-}
+const RELEASE_URL = `https://github.com/${GITHUB_REPO}/releases/download/packs/`;
+const REGISTRY_URL = `${RELEASE_URL}registry.json`;
 
 interface PackInfo {
   id: string;
@@ -90,7 +80,7 @@ export class PackManager {
         throw new Error(`Registry fetch failed: ${response.status}`);
       }
       
-      this.registry = await response.json();
+      this.registry = normalizeRegistry(await response.json(), RELEASE_URL);
       console.log(`📡 Registry loaded: ${Object.keys(this.registry!.packs).length} packs available`);
       return this.registry!;
       
@@ -104,6 +94,7 @@ export class PackManager {
         baseUrl: '',
         packs: {
           'eng-spa': {
+            id: 'eng-spa',
             url: 'https://github.com/kvgharbigit/polybook/releases/download/packs/eng-spa.sqlite.zip',
             bytes: 1200000,
             sha256: 'placeholder',
@@ -111,6 +102,7 @@ export class PackManager {
             source: 'Wiktionary'
           },
           'spa-eng': {
+            id: 'spa-eng',
             url: 'https://github.com/kvgharbigit/polybook/releases/download/packs/spa-eng.sqlite.zip',
             bytes: 1200000,
             sha256: 'placeholder',
@@ -183,6 +175,15 @@ export class PackManager {
 
     await this.initialize();
 
+    // Identical packs share one blob; copy an installed alias instead of downloading it again
+    const aliasPath = await this.findInstalledAlias(packInfo);
+    if (aliasPath) {
+      await FileSystem.copyAsync({ from: aliasPath, to: packPath });
+      console.log(`📦 Installed ${packId} from identical pack ${aliasPath}`);
+      onProgress?.(100, 'Pack ready!');
+      return packPath;
+    }
+
     // Handle different URL formats
     if (packInfo.url.endsWith('.sqlite.zip')) {
       return await this.downloadSqliteZip(packInfo, onProgress);
@@ -195,6 +196,22 @@ export class PackManager {
     }
   }
 
+  /**
+   * Path of an installed pack published with the same digest, if any
+   */
+  private static async findInstalledAlias(packInfo: PackInfo): Promise<string | null> {
+    if (!packInfo.sha256 || packInfo.sha256 === 'placeholder') {
+      return null;
+    }
+    const registry = await this.fetchRegistry();
+    for (const id of identicalPacks(registry, packInfo.id)) {
+      if (await this.isPackInstalled(id)) {
+        return this.getPackPath(id);
+      }
+    }
+    return null;
+  }
+
   /**
    * Download and extract .sqlite.zip pack
    */
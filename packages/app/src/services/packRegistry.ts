@@ -0,0 +1,71 @@
+/**
+ * Pack registry shapes
+ *
+ * tools/generate-registry.py publishes `packs` as a list of
+ * `{id, file, sha256, size_bytes, source, ...}` records. PackManager works
+ * with packs keyed by id, so the published list is keyed here; registries
+ * that already key packs by id (the development fallback) pass through.
+ */
+
+export interface RegistryPack {
+  id: string;
+  url: string;
+  bytes: number;
+  sha256: string;
+  license: string;
+  source: string;
+}
+
+export interface PackRegistry {
+  version: string;
+  baseUrl: string;
+  packs: Record<string, RegistryPack>;
+}
+
+interface PublishedPack {
+  id: string;
+  file: string;
+  sha256: string;
+  size_bytes: number;
+  source?: string;
+  license?: string;
+  url?: string;
+}
+
+/**
+ * Key a registry's packs by id; published records get their download URL from baseUrl + file
+ */
+export function normalizeRegistry(raw: any, baseUrl: string): PackRegistry {
+  const base = raw.baseUrl || baseUrl;
+  const packs: Record<string, RegistryPack> = {};
+  if (Array.isArray(raw.packs)) {
+    for (const pack of raw.packs as PublishedPack[]) {
+      packs[pack.id] = {
+        id: pack.id,
+        url: pack.url || `${base}${pack.file}`,
+        bytes: pack.size_bytes,
+        sha256: pack.sha256,
+        license: pack.license || pack.source || '',
+        source: pack.source || '',
+      };
+    }
+  } else {
+    for (const [id, pack] of Object.entries<any>(raw.packs || {})) {
+      packs[id] = { ...pack, id: pack.id || id };
+    }
+  }
+  return { version: raw.version, baseUrl: base, packs };
+}
+
+/**
+ * Ids of the other packs published with the same digest as `packId`
+ */
+export function identicalPacks(registry: PackRegistry, packId: string): string[] {
+  const sha256 = registry.packs[packId]?.sha256;
+  if (!sha256 || sha256 === 'placeholder') {
+    return [];
+  }
+  return Object.values(registry.packs)
+    .filter(pack => pack.id !== packId && pack.sha256 === sha256)
+    .map(pack => pack.id);
+}
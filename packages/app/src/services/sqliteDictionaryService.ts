@@ -8,6 +8,10 @@ import {
 } from '@polybook/shared/src/types';
 import { LanguagePackService } from './languagePackService';
 import { ErrorHandler, ErrorCode, Validator } from './errorHandling';
+import { LemmaNormRules, loadLemmaNormRules, normalizeLemma } from './lemmaNorm';
+import { DefinitionCodec, decodeDefinition, loadDefinitionCodec } from './definitionCodec';
+import { GlossIndexSpec, buildGlossQuery, loadGlossIndexSpec } from './glossSearch';
+import { CompletionSpec, completePrefix, loadCompletionSpec } from './completion';
 
 /**
  * SQLite Dictionary Service
@@ -17,7 +21,9 @@ import { ErrorHandler, ErrorCode, Validator } from './errorHandling';
  * 
  * Database Schema (Language Packs):
  * - word table: id INTEGER PRIMARY KEY, w TEXT, m TEXT (PyGlossary format)
- * - dict table: lemma TEXT PRIMARY KEY, def TEXT NOT NULL (StarDict format)
+ * - dict table: lemma TEXT PRIMARY KEY, def TEXT NOT NULL (StarDict format);
+ *   current packs expose dict(lemma, def, lemma_norm) as a view over entry/alias
+ *   tables, with lemma_norm indexed and its rules in the meta table
  * - Both tables contain HTML-formatted definitions with embedded synonyms/examples
  * 
  * Supports consistent lookup across all languages with StarDict bilingual dictionaries
@@ -27,6 +33,10 @@ export class SQLiteDictionaryService {
   private static initializationError: any = null;
   private static initializationPromise: Promise<void> | null = null;
   private static databases: Map<string, any> = new Map();
+  private static normRules: Map<any, Promise<LemmaNormRules | null>> = new Map();
+  private static codecs: Map<any, Promise<DefinitionCodec | null>> = new Map();
+  private static glossSpecs: Map<any, Promise<GlossIndexSpec | null>> = new Map();
+  private static completionSpecs: Map<any, Promise<CompletionSpec | null>> = new Map();
 
   /**
    * Initialize the SQLite dictionary service
@@ -794,11 +804,11 @@ export class SQLiteDictionaryService {
     }
 
     try {
-      // First, try PyGlossary format (word table with w, m columns)
-      const rows = await db.getAllAsync('SELECT def as m FROM dict WHERE lemma = ? COLLATE NOCASE LIMIT 1', [word.trim()]);
+      // First, try the case/accent-insensitive lemma lookup
+      const row = await this.findDictRow(db, word.trim());
       
-      if (rows.length > 0) {
-        const definition = rows[0].m;
+      if (row) {
+        const definition = row.def;
         const cleanDefinition = this.cleanHtmlDefinition(definition);
         
         return {
@@ -812,7 +822,7 @@ export class SQLiteDictionaryService {
         
         if (fallbackRows.length > 0) {
           const row = fallbackRows[0];
-          const definition = row.def || '';
+          const definition = (await this.decodeStoredDefinition(db, row.def)) || '';
           const cleanDefinition = this.cleanHtmlDefinition(definition);
           
           return {
@@ -838,6 +848,120 @@ export class SQLiteDictionaryService {
     }
   }
 
+  /**
+   * Find a dict row by lemma. Packs with a lemma_norm column get a single
+   * index probe (exact spelling preferred); older packs fall back to
+   * COLLATE NOCASE, which scans the table.
+   */
+  private static async findDictRow(db: any, word: string): Promise<{ lemma: string; def: string } | null> {
+    let rulesPromise = this.normRules.get(db);
+    if (!rulesPromise) {
+      rulesPromise = loadLemmaNormRules(db);
+      this.normRules.set(db, rulesPromise);
+    }
+    const rules = await rulesPromise;
+    const rows = rules
+      ? await db.getAllAsync(
+          'SELECT lemma, def FROM dict WHERE lemma_norm = ? ORDER BY lemma = ? DESC LIMIT 1',
+          [normalizeLemma(word, rules), word]
+        )
+      : await db.getAllAsync('SELECT lemma, def FROM dict WHERE lemma = ? COLLATE NOCASE LIMIT 1', [word]);
+    if (rows.length === 0) {
+      return null;
+    }
+    return { lemma: rows[0].lemma, def: await this.decodeStoredDefinition(db, rows[0].def) };
+  }
+
+  /**
+   * Definitions are TEXT, or a compressed BLOB in packs built with a trained
+   * dictionary; only the looked-up row is inflated
+   */
+  private static async decodeStoredDefinition(db: any, value: string | Uint8Array): Promise<string> {
+    if (typeof value === 'string' || value == null) {
+      return value;
+    }
+    let codecPromise = this.codecs.get(db);
+    if (!codecPromise) {
+      codecPromise = loadDefinitionCodec(db);
+      this.codecs.set(db, codecPromise);
+    }
+    return decodeDefinition(value, await codecPromise);
+  }
+
+  /**
+   * Autocomplete: top-ranked headwords starting with `prefix`. Needs a pack
+   * built with the completion index; other packs return no completions
+   * rather than scanning with LIKE.
+   */
+  static async completeWord(prefix: string, language: string, limit: number = 10): Promise<string[]> {
+    const db = this.databases.get(language);
+    if (!db) {
+      return [];
+    }
+    let specPromise = this.completionSpecs.get(db);
+    if (!specPromise) {
+      specPromise = loadCompletionSpec(db);
+      this.completionSpecs.set(db, specPromise);
+    }
+    let rulesPromise = this.normRules.get(db);
+    if (!rulesPromise) {
+      rulesPromise = loadLemmaNormRules(db);
+      this.normRules.set(db, rulesPromise);
+    }
+    const [spec, rules] = await Promise.all([specPromise, rulesPromise]);
+    if (!spec || !rules) {
+      return [];
+    }
+    try {
+      return await completePrefix(db, normalizeLemma(prefix, rules), Math.min(limit, spec.limit));
+    } catch (error) {
+      console.error(`Completion error for "${prefix}" in ${language}:`, error);
+      return [];
+    }
+  }
+
+  /**
+   * Reverse / full-text search: entries whose definition text matches the
+   * query, best first. Needs a pack built with the gloss index; other packs
+   * return no results rather than scanning every definition.
+   */
+  static async searchDefinitions(
+    query: string,
+    language: string,
+    limit: number = 20
+  ): Promise<Array<{ lemma: string; definition: string }>> {
+    const db = this.databases.get(language);
+    if (!db) {
+      return [];
+    }
+    let specPromise = this.glossSpecs.get(db);
+    if (!specPromise) {
+      specPromise = loadGlossIndexSpec(db);
+      this.glossSpecs.set(db, specPromise);
+    }
+    const spec = await specPromise;
+    const match = spec ? buildGlossQuery(query, spec.tokenizer) : '';
+    if (!match) {
+      return [];
+    }
+    try {
+      const rows = await db.getAllAsync(
+        'SELECT entry.lemma, entry.def FROM gloss JOIN entry ON entry.id = gloss.rowid ' +
+          'WHERE gloss MATCH ? ORDER BY rank LIMIT ?',
+        [match, limit]
+      );
+      return Promise.all(
+        rows.map(async (row: any) => ({
+          lemma: row.lemma,
+          definition: this.cleanHtmlDefinition(await this.decodeStoredDefinition(db, row.def)),
+        }))
+      );
+    } catch (error) {
+      console.error(`Definition search error for "${query}" in ${language}:`, error);
+      return [];
+    }
+  }
+
   /**
    * Translate word using StarDict bilingual dictionary (PyGlossary format)
    * Simplified version for directional databases
@@ -866,10 +990,10 @@ export class SQLiteDictionaryService {
       try {
         // First try StarDict format (dict table) - lemma/def columns
         console.log(`📖 Trying StarDict format (dict table)...`);
-        rows = await db.getAllAsync('SELECT lemma, def FROM dict WHERE lemma = ? COLLATE NOCASE LIMIT 1', [word]);
+        const row = await this.findDictRow(db, word);
         
-        if (rows.length > 0) {
-          const definition = rows[0].def;
+        if (row) {
+          const definition = row.def;
           console.log(`📖 ✅ Found translation in dict table: "${word}" → "${definition}"`);
           return definition;
         }
@@ -1365,6 +1489,10 @@ export class SQLiteDictionaryService {
     
     // Clear database map
     this.databases.clear();
+    this.normRules.clear();
+    this.codecs.clear();
+    this.glossSpecs.clear();
+    this.completionSpecs.clear();
     
     // Reload all available dictionaries
     await this.openAvailableDictionaries();
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Single-pass dictionary pack quality analyzer
+Streams the pack's rows once and computes every quality metric from that
+one scan: entry counts, empty and replacement-character rates, definition
+length histogram, lemmas that collide once case-folded, and alt-form
+coverage (from the alias rows of that same scan; on legacy dict-only packs,
+rows sharing a definition with their headword). Writes a JSON
+report per pack; the CI gate reads those reports instead of querying packs,
+and also fails packs whose definition codec the app cannot decode.
+
+Usage:
+    python3 analyze_pack.py dist/packs/eng-spa.sqlite.zip --report-dir dist/packs
+    python3 analyze_pack.py --gate dist/packs/*.report.json
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+from def_codec import APP_CODECS, load_codec
+from gloss_index import index_bytes
+
+REPORT_VERSION = 3
+REPLACEMENT_CHAR = '\ufffd'
+
+# Upper bounds (in characters) of the definition length histogram buckets
+LENGTH_BUCKETS = [0, 16, 64, 256, 1024, 4096]
+
+# Default gate thresholds
+MIN_ENTRIES = 1000
+MAX_EMPTY_RATE = 0.01
+MAX_REPLACEMENT_RATE = 0.01
+
+
+def _bucket_label(i):
+    if i == 0:
+        return '0'
+    if i == len(LENGTH_BUCKETS):
+        return f"{LENGTH_BUCKETS[-1] + 1}+"
+    return f"{LENGTH_BUCKETS[i - 1] + 1}-{LENGTH_BUCKETS[i]}"
+
+
+def _bucket(length):
+    for i, upper in enumerate(LENGTH_BUCKETS):
+        if length <= upper:
+            return i
+    return len(LENGTH_BUCKETS)
+
+
+def _rate(part, whole):
+    return round(part / whole, 6) if whole else 0.0
+
+
+def analyze_rows(rows, aliases=False):
+    """Compute the quality report from an iterable of (lemma, definition) rows
+
+    With ``aliases`` the rows are (lemma, definition, entry id) from a pack
+    with an alias table: the entry id is None for headwords and names the
+    headword for alias rows. Without it alt forms are guessed from shared
+    definitions, as legacy dict-only packs require.
+    """
+    entries = empty_lemma = empty_def = replacement = 0
+    total_length = 0
+    histogram = [0] * (len(LENGTH_BUCKETS) + 1)
+    folded = set()
+    definitions = {}
+    alt_forms = 0
+    with_alts = set()
+
+    for row in rows:
+        if aliases:
+            lemma, definition, entry_id = row
+            if entry_id is not None:
+                alt_forms += 1
+                with_alts.add(entry_id)
+        else:
+            lemma, definition = row
+        entries += 1
+        lemma, definition = lemma or '', definition or ''
+        if not lemma.strip():
+            empty_lemma += 1
+        if not definition.strip():
+            empty_def += 1
+        if REPLACEMENT_CHAR in lemma or REPLACEMENT_CHAR in definition:
+            replacement += 1
+        total_length += len(definition)
+        histogram[_bucket(len(definition))] += 1
+        folded.add(lemma.casefold())
+        digest = hashlib.blake2b(definition.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+        definitions[digest] = definitions.get(digest, 0) + 1
+
+    if aliases:
+        with_alts, headwords = len(with_alts), entries - alt_forms
+    else:
+        # Legacy packs copy a headword's definition to its forms, so a
+        # definition shared by n rows is taken as one headword with n - 1 alt forms
+        alt_forms = entries - len(definitions)
+        with_alts = sum(1 for n in definitions.values() if n > 1)
+        headwords = len(definitions)
+    return {
+        'version': REPORT_VERSION,
+        'entries': entries,
+        'empty_lemmas': empty_lemma,
+        'empty_definitions': empty_def,
+        'empty_rate': _rate(empty_lemma + empty_def, entries),
+        'replacement_rows': replacement,
+        'replacement_rate': _rate(replacement, entries),
+        'definition_length': {
+            'mean': round(total_length / entries, 1) if entries else 0.0,
+            'histogram': {_bucket_label(i): n for i, n in enumerate(histogram)}
+        },
+        'casefold_collisions': entries - len(folded),
+        'distinct_definitions': len(definitions),
+        'alt_forms': alt_forms,
+        'alt_coverage': _rate(with_alts, headwords),
+        'alt_forms_from': 'alias' if aliases else 'shared_definitions',
+    }
+
+
+def analyze(pack_path):
+    """Quality report for a .sqlite pack or a .sqlite.zip containing one"""
+    pack_path = Path(pack_path)
+    if pack_path.suffix == '.zip':
+        with tempfile.TemporaryDirectory(prefix='analyze-') as tmp, zipfile.ZipFile(pack_path) as zf:
+            name = next(n for n in zf.namelist() if n.endswith('.sqlite'))
+            report = analyze(zf.extract(name, tmp))
+    else:
+        conn = sqlite3.connect(f"file:{pack_path}?mode=ro", uri=True)
+        try:
+            codec = load_codec(conn)
+            tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            aliases = 'alias' in tables
+            if aliases:
+                # The dict view's own scan, plus which headword each alias row belongs to
+                rows = conn.execute('SELECT lemma, def, NULL FROM entry UNION ALL '
+                                    'SELECT alias.form, entry.def, alias.entry_id '
+                                    'FROM alias JOIN entry ON entry.id = alias.entry_id')
+            else:
+                rows = conn.execute('SELECT lemma, def FROM dict')
+            if codec:
+                rows = ((row[0], codec.decode(row[1])) + tuple(row[2:]) for row in rows)
+            report = analyze_rows(rows, aliases)
+            report['def_codec'] = codec.name if codec else None
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            report['database_bytes'] = page_size * conn.execute('PRAGMA page_count').fetchone()[0]
+            if 'gloss' in tables:
+                # Reported apart from the rest so its cost is visible on its own
+                report['gloss_index_bytes'] = index_bytes(conn)
+        finally:
+            conn.close()
+    report['pack'] = pack_path.name
+    return report
+
+
+def gate(report, min_entries=MIN_ENTRIES, max_empty_rate=MAX_EMPTY_RATE,
+         max_replacement_rate=MAX_REPLACEMENT_RATE):
+    """List of failed checks for a report (empty when the pack passes)"""
+    failures = []
+    if report['entries'] < min_entries:
+        failures.append(f"only {report['entries']} entries (minimum {min_entries})")
+    if report['empty_rate'] > max_empty_rate:
+        failures.append(f"empty rate {report['empty_rate']:.2%} > {max_empty_rate:.2%}")
+    if report['replacement_rate'] > max_replacement_rate:
+        failures.append(f"replacement-character rate {report['replacement_rate']:.2%} > {max_replacement_rate:.2%}")
+    if report.get('def_codec') not in (None,) + APP_CODECS:
+        failures.append(f"definition codec {report['def_codec']} cannot be decoded by the app")
+    return failures
+
+
+def report_path(pack_path, report_dir=None):
+    """<report_dir>/<pair>.report.json for <pair>.sqlite[.zip]"""
+    pack_path = Path(pack_path)
+    pair = pack_path.name.split('.sqlite')[0]
+    return Path(report_dir or pack_path.parent) / f"{pair}.report.json"
+
+
+def write_report(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def print_summary(report):
+    print(f"📊 {report['pack']}: {report['entries']} entries, "
+          f"{report['empty_rate']:.2%} empty, {report['replacement_rate']:.2%} with U+FFFD, "
+          f"{report['casefold_collisions']} case collisions, "
+          f"{report['alt_forms']} alt forms ({report['alt_coverage']:.1%} of headwords)")
+    if 'gloss_index_bytes' in report:
+        print(f"   🔎 gloss index: {report['gloss_index_bytes']} of {report['database_bytes']} bytes")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze dictionary pack quality in one pass')
+    parser.add_argument('paths', nargs='+', help='packs to analyze, or reports with --gate')
+    parser.add_argument('--report-dir', help='where to write <pair>.report.json (default: next to the pack)')
+    parser.add_argument('--gate', action='store_true', help='check existing JSON reports instead of packs')
+    parser.add_argument('--min-entries', type=int, default=MIN_ENTRIES)
+    parser.add_argument('--max-empty-rate', type=float, default=MAX_EMPTY_RATE)
+    parser.add_argument('--max-replacement-rate', type=float, default=MAX_REPLACEMENT_RATE)
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for path in args.paths:
+        if args.gate:
+            with open(path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        else:
+            try:
+                report = analyze(path)
+            except (sqlite3.Error, zipfile.BadZipFile, StopIteration, OSError) as e:
+                print(f"❌ {path}: cannot analyze ({e})")
+                failed += 1
+                continue
+            write_report(report, report_path(path, args.report_dir))
+        print_summary(report)
+        failures = gate(report, args.min_entries, args.max_empty_rate, args.max_replacement_rate)
+        for failure in failures:
+            print(f"   ❌ {failure}")
+        failed += bool(failures)
+
+    if failed:
+        print(f"❌ {failed} pack(s) failed the quality gate")
+        return 1
+    print(f"✅ {len(args.paths)} pack(s) passed the quality gate")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
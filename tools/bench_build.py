@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Benchmark the pack build pipeline against a local HTTP stand-in
+Generates fixture StarDict archives and a FreeDict-style catalogue, serves
+them from stand_in_server.py with the given latency and bandwidth, and
+times each stage of a build on them:
+    discovery   catalogue fetch + size probes (discovery_sources.py)
+    download    archives to disk (downloader.py)
+    extract     StarDict entries read from the archives (stardict_archive.py)
+    convert     entries staged into the pack writer (packwriter.py)
+                (the archive streams into the writer as in build_packs.py;
+                reading and staging are timed separately inside that loop)
+    optimize    merge, indexes, ANALYZE and VACUUM (PackWriter.close)
+    package     zip + metadata (build_packs.package_pack)
+    registry    hashed, introspected registry (generate-registry.py)
+Each stage reports entries/s, MB/s and the peak RSS so far. Runs are
+appended to a JSON history and compared with the last run made with the
+same parameters, so regressions show up as numbers.
+
+Usage:
+    python3 bench_build.py                                  # 4 packs x 20000 entries
+    python3 bench_build.py --entries 100000 --bandwidth 20 --latency 0.05
+    python3 bench_build.py --history bench-history.json --json latest.json
+"""
+
+import argparse
+import datetime
+import importlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from build_packs import package_pack
+from discovery_sources import FreeDictSource
+from downloader import download, sha256_file
+from http_probe import UrlProber
+from packwriter import PackWriter, Rejected
+from sample_stardict import write_sample_stardict
+from stand_in_server import StandInServer
+from stardict_archive import ArchiveReader
+
+registry_tool = importlib.import_module('generate-registry')
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_HISTORY = SCRIPT_DIR / 'bench-history.json'
+HISTORY_VERSION = 1
+STAGES = ['discovery', 'download', 'extract', 'convert', 'optimize', 'package', 'registry']
+# FreeDict names of the fixture dictionaries, in the order --pairs takes them
+FIXTURE_PAIRS = ['eng-spa', 'spa-eng', 'eng-fra', 'fra-eng', 'eng-deu', 'deu-eng', 'eng-ita', 'ita-eng']
+ENTRIES = 20000
+PAIRS = 4
+LATENCY = 0.02
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def fixture_entries(name, count, seed=0):
+    """Deterministic (headword, definition) pairs with realistic length spread"""
+    rng = random.Random(f"{name}:{seed}")
+    letters = 'abcdefghijklmnopqrstuvwxyzéñ'
+    entries = {}
+    while len(entries) < count:
+        word = ''.join(rng.choice(letters) for _ in range(rng.randint(2, 12)))
+        senses = [' '.join(''.join(rng.choice(letters) for _ in range(rng.randint(2, 9)))
+                           for _ in range(rng.randint(1, 8))) for _ in range(rng.randint(1, 4))]
+        entries[word] = '; '.join(senses)
+    return sorted(entries.items())
+
+
+def fixture_archive(work_dir, name, count):
+    """A .tar.gz StarDict archive (ifo first, as the Wiktionary releases are) as bytes"""
+    src = write_sample_stardict(Path(work_dir) / name, name, fixture_entries(name, count)).parent
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+        for path in sorted(src.iterdir(), key=lambda p: (p.suffix != '.ifo', p.name)):
+            tar.add(path, arcname=f"{name}/{path.name}")
+    return buffer.getvalue()
+
+
+def fixture_catalogue(names, url):
+    """freedict-database.json entries pointing at the stand-in (sizes left to HEAD probes)"""
+    return [{'name': name, 'edition': '1.0', 'headwords': '',
+             'releases': [{'platform': 'stardict', 'version': '1.0', 'URL': url(f"/{name}.tar.gz")}]}
+            for name in names]
+
+
+class StageTimer:
+    """Wall time, throughput and peak RSS per stage"""
+
+    def __init__(self):
+        self.stages = {}
+        self._totals = {}
+
+    def run(self, name, func):
+        """Time ``func()``, which returns (result, entries handled, bytes handled)"""
+        started = time.perf_counter()
+        result, entries, nbytes = func()
+        self.add(name, time.perf_counter() - started, entries, nbytes)
+        return result
+
+    def add(self, name, seconds, entries, nbytes):
+        """Add time measured in pieces to a stage"""
+        totals = self._totals.get(name, (0, 0, 0))
+        seconds, entries, nbytes = totals[0] + seconds, totals[1] + entries, totals[2] + nbytes
+        self._totals[name] = (seconds, entries, nbytes)
+        self.stages[name] = {
+            'seconds': round(seconds, 4),
+            'entries': entries,
+            'bytes': nbytes,
+            'entries_per_s': round(entries / seconds, 1) if seconds else None,
+            'mb_per_s': round(nbytes / seconds / 1e6, 2) if seconds else None,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+
+def run_benchmark(work_dir, entries=ENTRIES, pairs=PAIRS, latency=LATENCY, bandwidth=None):
+    """Build ``pairs`` fixture packs of ``entries`` entries each; returns {stage: stats}
+
+    ``bandwidth`` is in bytes per second per response (None for unlimited).
+    """
+    work_dir = Path(work_dir)
+    names = FIXTURE_PAIRS[:pairs]
+    fixtures = work_dir / 'fixtures'
+    files = {f"/{name}.tar.gz": fixture_archive(fixtures, name, entries) for name in names}
+    downloads, out_dir = work_dir / 'downloads', work_dir / 'packs'
+    out_dir.mkdir(parents=True)
+    timer = StageTimer()
+
+    with StandInServer(files, latency=latency, bandwidth=bandwidth) as server:
+        server.files['/freedict-database.json'] = json.dumps(fixture_catalogue(names, server.url)).encode()
+
+        def discover():
+            source = FreeDictSource()
+            source.catalogue_url = server.url('/freedict-database.json')
+            with UrlProber(timeout=10) as prober:
+                found = source.discover(prober)
+            return found, len(found), len(server.files['/freedict-database.json'])
+
+        found = timer.run('discovery', discover)
+
+        def fetch_all():
+            archives = {}
+            for pair, entry in found.items():
+                name = entry['url'].rsplit('/', 1)[-1].replace('.tar.gz', '')
+                archives[name] = (downloads / f"{name}.tar.gz", entry)
+                download(entry['url'], archives[name][0])
+            return archives, len(archives), sum(path.stat().st_size for path, _ in archives.values())
+
+        archives = timer.run('download', fetch_all)
+
+    def stream(path, writer):
+        """Stream one archive into ``writer``; returns (read s, staged s, entries, staged bytes)"""
+        rows = ArchiveReader(path).entries()
+        read = staged = 0.0
+        entries = nbytes = 0
+        while True:
+            started = time.perf_counter()
+            row = next(rows, None)
+            read += time.perf_counter() - started
+            if row is None:
+                break
+            started = time.perf_counter()
+            if isinstance(row, Rejected):
+                writer.reject(row.lemma, row.reason, row.raw)
+            else:
+                writer.add(*row)
+                nbytes += len(row[0].encode()) + len(row[1].encode())
+            staged += time.perf_counter() - started
+            entries += 1
+        started = time.perf_counter()
+        writer.flush()
+        return read, staged + time.perf_counter() - started, entries, nbytes
+
+    writers = {}
+    for name, (path, entry) in archives.items():
+        writers[name] = PackWriter(work_dir / f"{name}.sqlite", language=entry['lang1']['code'])
+        read, staged, entries_read, nbytes = stream(path, writers[name])
+        timer.add('extract', read, entries_read, path.stat().st_size)
+        timer.add('convert', staged, entries_read, nbytes)
+
+    def optimize():
+        counts = {name: writer.close() for name, writer in writers.items()}
+        return counts, sum(c['entries'] for c in counts.values()), \
+            sum((work_dir / f"{name}.sqlite").stat().st_size for name in counts)
+
+    counts = timer.run('optimize', optimize)
+
+    def package():
+        built = {}
+        for name, (path, entry) in archives.items():
+            source = {'pair': name, 'source': 'freedict', 'size': entry['size_mb'], 'reason': 'benchmark',
+                      'language': entry['lang1']['code'], 'gloss_language': entry['lang2']['code']}
+            built[name] = package_pack(work_dir / f"{name}.sqlite", source, out_dir, counts[name],
+                                       sha256_file(path).hexdigest())
+        return built, sum(c['entries'] for c in counts.values()), \
+            sum((work_dir / f"{name}.sqlite").stat().st_size for name in counts)
+
+    built = timer.run('package', package)
+
+    def registry():
+        generated, problems = registry_tool.generate_registry(out_dir)
+        if problems:
+            raise RuntimeError('; '.join(problems))
+        return generated, sum(p['entries'] for p in generated['packs']), \
+            sum(metadata['bytes'] for metadata in built.values())
+
+    timer.run('registry', registry)
+    return timer.stages
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def load_history(path):
+    try:
+        data = json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return []
+    return data.get('runs', []) if data.get('version') == HISTORY_VERSION else []
+
+
+def save_history(path, runs):
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(json.dumps({'version': HISTORY_VERSION, 'runs': runs}, indent=2) + '\n', encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def compare(previous, stages):
+    """{stage: percent change in seconds} against an earlier run's stages"""
+    changes = {}
+    for name, stats in stages.items():
+        before = previous.get(name, {}).get('seconds')
+        if before:
+            changes[name] = round((stats['seconds'] - before) / before * 100, 1)
+    return changes
+
+
+def print_stages(stages, changes):
+    print(f"   {'stage':<10} {'seconds':>9} {'entries/s':>12} {'MB/s':>9} {'peak RSS':>10}   vs last")
+    for name in STAGES:
+        stats = stages[name]
+        change = f"{changes[name]:+.1f}%" if name in changes else '-'
+        rss = f"{stats['peak_rss_mb']} MB" if stats['peak_rss_mb'] is not None else '-'
+        print(f"   {name:<10} {stats['seconds']:>9.3f} {stats['entries_per_s'] or 0:>12.0f} "
+              f"{stats['mb_per_s'] or 0:>9.2f} {rss:>10}   {change}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the pack build pipeline against a local stand-in')
+    parser.add_argument('--entries', type=int, default=ENTRIES, help='headwords per fixture dictionary')
+    parser.add_argument('--pairs', type=int, default=PAIRS, choices=range(1, len(FIXTURE_PAIRS) + 1),
+                        metavar=f"1-{len(FIXTURE_PAIRS)}", help='fixture dictionaries to build')
+    parser.add_argument('--latency', type=float, default=LATENCY, help='seconds added to every request')
+    parser.add_argument('--bandwidth', type=float, help='MB/s cap per response (default: unlimited)')
+    parser.add_argument('--history', default=str(DEFAULT_HISTORY), help='JSON history to append the run to')
+    parser.add_argument('--no-history', action='store_true', help='do not record the run')
+    parser.add_argument('--json', help='also write this run here')
+    args = parser.parse_args(argv)
+
+    params = {'entries': args.entries, 'pairs': args.pairs, 'latency': args.latency, 'bandwidth': args.bandwidth}
+    print(f"⏱️ Benchmarking {args.pairs} pack(s) x {args.entries} entries "
+          f"(latency {args.latency}s, bandwidth {args.bandwidth or 'unlimited'} MB/s)")
+    with tempfile.TemporaryDirectory(prefix='bench-build-') as tmp:
+        try:
+            stages = run_benchmark(tmp, args.entries, args.pairs, args.latency,
+                                   args.bandwidth * 1e6 if args.bandwidth else None)
+        except (RuntimeError, OSError) as e:
+            print(f"❌ Benchmark failed: {e}")
+            return 1
+
+    run = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat().replace('+00:00', 'Z'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'params': params,
+        'stages': stages,
+        'total_seconds': round(sum(stats['seconds'] for stats in stages.values()), 4),
+    }
+    history = [] if args.no_history else load_history(args.history)
+    previous = next((r for r in reversed(history) if r.get('params') == params), None)
+    changes = compare(previous['stages'], stages) if previous else {}
+    print_stages(stages, changes)
+    print(f"   total {run['total_seconds']:.3f}s" +
+          (f" (last comparable run: {previous['total_seconds']:.3f}s, {previous.get('commit') or 'unknown'})"
+           if previous else ''))
+    if not args.no_history:
+        save_history(args.history, history + [run])
+        print(f"📄 History: {args.history} ({len(history) + 1} runs)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark prefix completion against LIKE on the shipped packs
+Rebuilds each legacy pack (public/dictionaries/*.sqlite.gz) with the
+completion index (completion.py) and times the same prefixes three ways:
+    like          LIKE 'abc%' LIMIT n on the shipped pack (unranked)
+    like_ranked   LIKE 'abc%' ranked the same way as the index
+    completion    the completion index on the rebuilt pack
+
+Usage:
+    python3 bench_completion.py                          # shipped en-es and es-en
+    python3 bench_completion.py PACK.sqlite.gz --json bench.json
+"""
+
+import argparse
+import gzip
+import json
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from completion import COMPLETIONS, complete
+from lemma_norm import normalizer, rules_for
+from packwriter import write_pack
+
+SHIPPED_DIR = Path(__file__).resolve().parent.parent / 'public' / 'dictionaries'
+SHIPPED_PACKS = [SHIPPED_DIR / 'en-es_dict.sqlite.gz', SHIPPED_DIR / 'es-en_dict.sqlite.gz']
+SAMPLE_WORDS = 250
+MAX_PREFIX = 4
+REPEAT = 5
+
+LIKE_SQL = "SELECT lemma FROM dict WHERE lemma LIKE ? ESCAPE '\\' LIMIT ?"
+LIKE_RANKED_SQL = ("SELECT lemma FROM dict WHERE lemma LIKE ? ESCAPE '\\' "
+                   "ORDER BY LENGTH(def) * 100 / LENGTH(lemma) DESC, lemma LIMIT ?")
+
+
+def unpack(pack_path, work_dir):
+    """Path of a plain .sqlite copy of ``pack_path`` (.sqlite or .sqlite.gz)"""
+    pack_path = Path(pack_path)
+    if pack_path.suffix != '.gz':
+        return pack_path
+    out = Path(work_dir) / pack_path.stem
+    with gzip.open(pack_path, 'rb') as src, open(out, 'wb') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    return out
+
+
+def pack_language(pack_path):
+    """Headword language from a shipped pack name (en-es_dict.sqlite.gz -> en)"""
+    return Path(pack_path).name.split('-')[0].split('_')[0] or None
+
+
+def sample_prefixes(lemmas, words=SAMPLE_WORDS, max_prefix=MAX_PREFIX):
+    """Prefixes (1..max_prefix characters) of every n-th lemma, deterministic"""
+    stride = max(1, len(lemmas) // words)
+    prefixes = set()
+    for lemma in sorted(lemmas)[::stride]:
+        for length in range(1, min(max_prefix, len(lemma)) + 1):
+            prefixes.add(lemma[:length])
+    return sorted(prefixes)
+
+
+def _like_pattern(prefix):
+    return prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def _time(query, prefixes, repeat=REPEAT):
+    """Median microseconds per call of query(prefix) for each prefix"""
+    timings = []
+    for prefix in prefixes:
+        runs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query(prefix)
+            runs.append(time.perf_counter() - started)
+        timings.append(statistics.median(runs) * 1e6)
+    return timings
+
+
+def _summary(timings):
+    ordered = sorted(timings)
+    return {
+        'p50_us': round(ordered[len(ordered) // 2], 1),
+        'p95_us': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        'mean_us': round(statistics.fmean(ordered), 1),
+    }
+
+
+def _plan(conn, sql, params):
+    return ' | '.join(row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params))
+
+
+def bench_pack(pack_path, work_dir, limit=COMPLETIONS, repeat=REPEAT):
+    """Time completion vs LIKE on one pack; returns the result record"""
+    shipped = unpack(pack_path, work_dir)
+    language = pack_language(pack_path)
+    conn = sqlite3.connect(f"file:{shipped}?mode=ro", uri=True)
+    try:
+        rows = [(lemma, definition, []) for lemma, definition in conn.execute('SELECT lemma, def FROM dict')]
+    finally:
+        conn.close()
+    indexed = Path(work_dir) / f"{Path(shipped).stem}.completion.sqlite"
+    counts = write_pack(rows, indexed, language=language, completions=True)
+    prefixes = sample_prefixes([lemma for lemma, _, _ in rows])
+    normalize = normalizer(rules_for(language))
+
+    legacy = sqlite3.connect(f"file:{shipped}?mode=ro", uri=True)
+    conn = sqlite3.connect(f"file:{indexed}?mode=ro", uri=True)
+    try:
+        methods = {
+            'like': lambda p: legacy.execute(LIKE_SQL, (_like_pattern(p), limit)).fetchall(),
+            'like_ranked': lambda p: legacy.execute(LIKE_RANKED_SQL, (_like_pattern(p), limit)).fetchall(),
+            'completion': lambda p: complete(conn, normalize(p), limit),
+        }
+        results = {name: _summary(_time(query, prefixes, repeat)) for name, query in methods.items()}
+        results['like']['plan'] = _plan(legacy, LIKE_SQL, ('a%', limit))
+        results['completion']['plan'] = _plan(conn, 'SELECT entry_ids FROM completion WHERE prefix = ?', ('a',))
+    finally:
+        legacy.close()
+        conn.close()
+    return {
+        'pack': Path(pack_path).name,
+        'entries': len(rows),
+        'prefixes': len(prefixes),
+        'limit': limit,
+        'completion_index': counts['completion'],
+        'methods': results,
+        'speedup_p95': round(results['like_ranked']['p95_us'] / max(results['completion']['p95_us'], 0.1), 1),
+    }
+
+
+def print_result(result):
+    print(f"📚 {result['pack']}: {result['entries']} entries, {result['prefixes']} prefixes, "
+          f"top {result['limit']}")
+    index = result['completion_index']
+    print(f"   index: {index['prefixes']} stored prefixes, {index['bytes']} bytes")
+    for name, stats in result['methods'].items():
+        print(f"   {name:<12} p50 {stats['p50_us']:>9.1f} µs   p95 {stats['p95_us']:>9.1f} µs   "
+              f"mean {stats['mean_us']:>9.1f} µs")
+    print(f"   ⚡ completion p95 is {result['speedup_p95']}x faster than ranked LIKE")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark prefix completion against LIKE')
+    parser.add_argument('packs', nargs='*', help='legacy .sqlite[.gz] packs (default: shipped en-es and es-en)')
+    parser.add_argument('--limit', type=int, default=COMPLETIONS)
+    parser.add_argument('--repeat', type=int, default=REPEAT, help='timed runs per prefix (median is kept)')
+    parser.add_argument('--json', help='write the results here')
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='bench-completion-') as tmp:
+        for pack in args.packs or SHIPPED_PACKS:
+            try:
+                result = bench_pack(pack, tmp, args.limit, args.repeat)
+            except (sqlite3.Error, OSError) as e:
+                print(f"❌ {pack}: {e}")
+                return 1
+            print_result(result)
+            results.append(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"📄 Results: {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
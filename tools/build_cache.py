@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache for built dictionary packs
+A pack is keyed on the SHA-256 of its upstream archive, the converter
+version (a hash of the conversion code and pack schema) and the build
+options. Upstream validators (ETag, or size + Last-Modified) are remembered
+next to the archive hash, so an unchanged upstream costs one HEAD request
+and no download or conversion.
+"""
+
+import hashlib
+import json
+import shutil
+import threading
+from pathlib import Path
+
+import requests
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_CACHE_DIR = SCRIPT_DIR / '.build-cache'
+
+# Bump when the pack layout changes in a way the converter sources don't show
+SCHEMA_VERSION = 1
+
+# Everything that decides the bytes of a pack
+CONVERTER_FILES = [
+    'analyze_pack.py',
+    'build_packs.py',
+    'completion.py',
+    'def_codec.py',
+    'dictzip.py',
+    'gloss_index.py',
+    'languages.py',
+    'lemma_norm.py',
+    'pack_sources.py',
+    'packwriter.py',
+    'stardict.py',
+    'stardict_archive.py',
+]
+
+
+def converter_version():
+    """Hash of the conversion code plus SCHEMA_VERSION"""
+    digest = hashlib.sha256(f"schema={SCHEMA_VERSION}".encode())
+    for name in CONVERTER_FILES:
+        digest.update(name.encode() + b'\0')
+        digest.update((SCRIPT_DIR / name).read_bytes())
+    return digest.hexdigest()
+
+
+def upstream_validator(url, session=None, timeout=15):
+    """Cheap fingerprint of an upstream file from a HEAD request (None if unavailable)"""
+    try:
+        response = (session or requests).head(url, timeout=timeout, allow_redirects=True)
+        response.close()
+    except requests.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    etag = response.headers.get('etag')
+    if etag:
+        return f"etag:{etag}"
+    length = response.headers.get('content-length')
+    modified = response.headers.get('last-modified')
+    if length and modified:
+        return f"size:{length};modified:{modified}"
+    return None
+
+
+def artifacts(pair, out_dir):
+    """The files package_pack wrote for ``pair``: zip, metadata, report and quarantine
+
+    Named explicitly so leftovers in a reused out_dir (old deltas, stale
+    quarantines) never end up in the cache.
+    """
+    out_dir = Path(out_dir)
+    meta_path = out_dir / f"{pair}.json"
+    paths = [out_dir / f"{pair}.sqlite.zip", meta_path, out_dir / f"{pair}.report.json"]
+    if json.loads(meta_path.read_text()).get('rejected'):
+        paths.append(out_dir / f"{pair}.quarantine.jsonl")
+    return [path for path in paths if path.exists()]
+
+
+class BuildCache:
+    """Packs stored as <cache>/<key>/<pair>.sqlite.zip + <pair>.json (+ reports)"""
+
+    def __init__(self, path=DEFAULT_CACHE_DIR, version=None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.version = version or converter_version()
+        self._index_path = self.path / 'upstream.json'
+        self._lock = threading.Lock()
+        try:
+            self._upstream = json.loads(self._index_path.read_text())
+        except (OSError, ValueError):
+            self._upstream = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, archive_sha256, pair, options=None):
+        material = json.dumps({
+            'archive': archive_sha256,
+            'converter': self.version,
+            'pair': pair,
+            'options': options or {}
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def known_archive(self, url, validator):
+        """Archive SHA-256 previously seen for this url + validator"""
+        if not validator:
+            return None
+        with self._lock:
+            entry = self._upstream.get(url)
+        if entry and entry.get('validator') == validator:
+            return entry['sha256']
+        return None
+
+    def remember_archive(self, url, validator, sha256):
+        if not validator:
+            return
+        with self._lock:
+            self._upstream[url] = {'validator': validator, 'sha256': sha256}
+            self._index_path.write_text(json.dumps(self._upstream, indent=2, sort_keys=True))
+
+    def restore(self, key, pair, out_dir):
+        """Copy a cached pack into out_dir; returns its metadata or None on a miss"""
+        entry = self.path / key
+        zip_path, meta_path = entry / f"{pair}.sqlite.zip", entry / f"{pair}.json"
+        if not (zip_path.exists() and meta_path.exists()):
+            with self._lock:
+                self.misses += 1
+            return None
+        for path in entry.iterdir():
+            shutil.copyfile(path, Path(out_dir) / path.name)
+        with self._lock:
+            self.hits += 1
+        return json.loads(meta_path.read_text())
+
+    def store(self, key, pair, out_dir):
+        """Copy a freshly built pack and its side files from out_dir into the cache"""
+        out_dir = Path(out_dir)
+        entry = self.path / key
+        tmp = self.path / f".{key}.tmp"
+        tmp.mkdir(exist_ok=True)
+        for path in artifacts(pair, out_dir):
+            shutil.copyfile(path, tmp / path.name)
+        if entry.exists():
+            shutil.rmtree(tmp)
+        else:
+            tmp.rename(entry)
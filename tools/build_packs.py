@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Parallel dictionary pack builder
+Builds many bilingual packs in one run: archives are downloaded on a thread
+pool (each upstream archive once, even when several pack ids share it) and
+converted, optimized and packaged on a process pool as soon as their
+download finishes, so network and CPU work overlap. Every job gets its own
+work directory. Writes <pair>.sqlite.zip + <pair>.json per pack and
+registry.json for the whole set; entries rejected during conversion are
+listed in <pair>.quarantine.jsonl and the single-pass quality report
+(analyze_pack.py) goes to <pair>.report.json. Given the previously
+published packs, each changed pack also gets a verified row-level changeset
+<pair>.delta.json.gz (pack_delta.py) recorded in its metadata. Packs that
+come out byte-identical are collapsed to one zip plus aliases.json
+(cas_store.py) before the registry is written.
+
+Builds are reproducible (no timestamps in packs or metadata) and cached by
+upstream archive hash + converter version + options (build_cache.py), so
+unchanged packs are restored instead of rebuilt.
+
+Usage:
+    python3 build_packs.py                       # every default pair
+    python3 build_packs.py eng-spa eng-fra --jobs 4
+    python3 build_packs.py --strategy optimal-strategy-top7.json
+    python3 build_packs.py --previous-dir previous-packs --previous-version packs-41
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from analyze_pack import analyze, gate, write_report
+from build_cache import DEFAULT_CACHE_DIR, BuildCache, upstream_validator
+from cas_store import collapse, resolve
+from def_codec import APP_CODECS, measure
+from downloader import sha256_file
+from lemma_norm import rules_for
+from mirrors import MirrorStats, fetch
+from pack_delta import DeltaError, make_delta
+from pack_sources import DEFAULT_PAIRS, load_strategy, pack_source
+from stardict import report
+from stardict_archive import convert_archive
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_OUT_DIR = SCRIPT_DIR / 'dist' / 'packs'
+DOWNLOAD_WORKERS = 4
+MIN_ENTRIES = 1000
+STRATEGY = 'top_7_languages_optimal'
+# Fixed zip entry timestamp so identical packs zip to identical bytes
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+class BuildError(Exception):
+    """Raised when a pack fails to build or loses too much data"""
+
+
+def archive_suffix(url):
+    for suffix in ('.tar.gz', '.tar.xz', '.tar.bz2'):
+        if url.endswith(suffix):
+            return suffix
+    raise BuildError(f"Unknown archive format for {url}")
+
+
+def plan_jobs(sources):
+    """Group pack sources by upstream archive: [{'url', 'mirrors', 'sources'}]"""
+    jobs = {}
+    for source in sources:
+        job = jobs.setdefault(source['url'], {'url': source['url'], 'mirrors': [], 'sources': []})
+        job['mirrors'] += [m for m in source.get('mirrors', []) if m not in job['mirrors']]
+        job['sources'].append(source)
+    return list(jobs.values())
+
+
+def cache_key(cache, archive_sha256, source, options):
+    """Cache key of one pack: the build options plus the source's headword and gloss languages"""
+    options = dict(options or {}, language=source.get('language'), gloss_language=source.get('gloss_language'))
+    return cache.key(archive_sha256, source['pair'], options)
+
+
+def restore_cached(cache, job, archive_sha256, out_dir, options):
+    """Restore every pack of a job from the cache; None unless all of them hit"""
+    restored = []
+    for source in job['sources']:
+        metadata = cache.restore(cache_key(cache, archive_sha256, source, options), source['pair'], out_dir)
+        if metadata is None:
+            return None
+        restored.append(metadata)
+    return restored
+
+
+def prepare_job(job, work_dir, out_dir, cache=None, options=None, stats=None):
+    """Network stage: restore cached packs, or download the job's archive
+
+    ``stats`` is the MirrorStats shared by every download of the build.
+
+    Returns (restored metadata or None, archive path or None, archive sha256).
+    """
+    validator = known_sha256 = None
+    if cache:
+        validator = upstream_validator(job['url'])
+        known_sha256 = cache.known_archive(job['url'], validator)
+        if known_sha256:
+            restored = restore_cached(cache, job, known_sha256, out_dir, options)
+            if restored is not None:
+                return restored, None, known_sha256
+
+    archive = Path(work_dir) / f"archive{archive_suffix(job['url'])}"
+    archive_sha256 = fetch([job['url']] + job['mirrors'], archive, stats=stats)['sha256']
+    if cache:
+        cache.remember_archive(job['url'], validator, archive_sha256)
+    # The same bytes were already looked up above; a second lookup would count the miss twice
+    if cache and archive_sha256 != known_sha256:
+        restored = restore_cached(cache, job, archive_sha256, out_dir, options)
+        if restored is not None:
+            return restored, None, archive_sha256
+    return None, archive, archive_sha256
+
+
+def package_pack(sqlite_path, source, out_dir, counts, archive_sha256, quarantine=None, quality=None):
+    """Zip one pack and write its metadata JSON; returns the metadata"""
+    pair = source['pair']
+    out_dir = Path(out_dir)
+    zip_path = out_dir / f"{pair}.sqlite.zip"
+    info = zipfile.ZipInfo(f"{pair}.sqlite", date_time=ZIP_DATE_TIME)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = 0o644 << 16
+    with zipfile.ZipFile(zip_path, 'w') as zf, open(sqlite_path, 'rb') as src, \
+            zf.open(info, 'w') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+    metadata = {
+        'id': pair,
+        'type': 'bilingual',
+        'source': source['source'],
+        'original_size': source.get('size', ''),
+        'bytes': zip_path.stat().st_size,
+        'entries': counts['entries'],
+        'rejected': counts['skipped'],
+        'sha256': sha256_file(zip_path).hexdigest(),
+        'reason': source.get('reason', ''),
+        'source_sha256': archive_sha256,
+        'lemma_norm': rules_for(source.get('language')),
+        'gloss_language': source.get('gloss_language'),
+        'strategy': STRATEGY
+    }
+    if counts.get('compression'):
+        # Decode timing is printed, not stored: metadata must stay reproducible
+        metadata['def_codec'] = {k: v for k, v in counts['compression'].items() if k != 'decode_us_per_row'}
+    if counts.get('gloss_index'):
+        metadata['gloss_index'] = counts['gloss_index']
+    if counts.get('completion'):
+        metadata['completion'] = counts['completion']
+    with open(out_dir / f"{pair}.json", 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    if quarantine and counts['skipped']:
+        shutil.copyfile(quarantine, out_dir / f"{pair}.quarantine.jsonl")
+    if quality:
+        write_report(dict(quality, pack=zip_path.name), out_dir / f"{pair}.report.json")
+    return metadata
+
+
+def build_archive(archive, archive_sha256, sources, out_dir, work_dir, min_entries=MIN_ENTRIES,
+                  compression=None, fts=False, completions=False):
+    """CPU stage (runs in a worker process): convert once, package every pack id"""
+    sqlite_path = Path(work_dir) / 'pack.sqlite'
+    quarantine = Path(work_dir) / 'quarantine.jsonl'
+    counts, _ = convert_archive(archive, sqlite_path, spill_dir=work_dir, quarantine=quarantine,
+                                language=sources[0].get('language'), compression=compression,
+                                fts=fts, gloss_language=sources[0].get('gloss_language'), completions=completions)
+    if report(counts, min_entries):
+        raise BuildError(f"Data loss while converting {archive}")
+    if compression:
+        counts['compression'] = measure(sqlite_path)
+        print(f"🗜️ {counts['compression']['codec']} ratio {counts['compression']['ratio']}, "
+              f"{counts['compression']['decode_us_per_row']} µs per row to decode")
+    quality = analyze(sqlite_path)
+    failures = gate(quality, min_entries)
+    if failures:
+        raise BuildError(f"Quality gate failed for {archive}: {'; '.join(failures)}")
+    return [package_pack(sqlite_path, source, out_dir, counts, archive_sha256, quarantine, quality)
+            for source in sources]
+
+
+def write_delta(pair, previous, out_dir):
+    """Changeset from the previously published zip to the new one (runs in a worker process)"""
+    return make_delta(previous, Path(out_dir) / f"{pair}.sqlite.zip", Path(out_dir) / f"{pair}.delta.json.gz")
+
+
+def write_deltas(built, out_dir, previous_dir, previous_version=None, jobs=None):
+    """Add a verified changeset to every built pack that changed since the previous release
+
+    A delta is only published when it is smaller than the full pack; packs
+    that cannot be diffed (new pair, pre-alias schema) simply have none.
+    """
+    out_dir, previous_dir = Path(out_dir), Path(previous_dir)
+    changed = {}
+    for pair, metadata in built.items():
+        # The previous release may have published this pair as an alias
+        previous = resolve(previous_dir, f"{pair}.sqlite.zip")
+        if previous:
+            base_sha256 = sha256_file(previous).hexdigest()
+            if base_sha256 != metadata['sha256']:
+                changed[pair] = (previous, base_sha256)
+
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as cpu:
+        futures = {cpu.submit(write_delta, pair, previous, out_dir): pair for pair, (previous, _) in changed.items()}
+        for future in as_completed(futures):
+            pair = futures[future]
+            delta_path = out_dir / f"{pair}.delta.json.gz"
+            try:
+                delta = future.result()
+            except (DeltaError, sqlite3.Error, zipfile.BadZipFile, OSError) as e:
+                print(f"⚠️ No delta for {pair}: {e}")
+                delta_path.unlink(missing_ok=True)
+                continue
+            metadata = built[pair]
+            if delta['bytes'] >= metadata['bytes']:
+                print(f"⚠️ No delta for {pair}: changeset is not smaller than the pack")
+                delta_path.unlink()
+                continue
+            metadata['delta'] = {
+                'file': delta_path.name,
+                'sha256': delta['sha256'],
+                'bytes': delta['bytes'],
+                'base_sha256': changed[pair][1],
+                'changes': delta['changes'],
+            }
+            if previous_version:
+                metadata['delta']['base_version'] = previous_version
+            with open(out_dir / f"{pair}.json", 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            print(f"🧩 Delta: {delta_path.name} ({delta['bytes']} bytes instead of {metadata['bytes']})")
+
+
+def write_registry(out_dir):
+    """Run generate-registry.py over the output directory; False if it had to leave packs out"""
+    registry_path = Path(out_dir) / 'registry.json'
+    registry_path.unlink(missing_ok=True)
+    result = subprocess.run([sys.executable, str(SCRIPT_DIR / 'generate-registry.py'), str(out_dir),
+                             '--output', str(registry_path)], capture_output=True, text=True)
+    sys.stderr.write(result.stderr)
+    if not registry_path.exists():
+        raise BuildError(f"generate-registry.py failed: {result.stderr.strip()}")
+    return result.returncode == 0
+
+
+def build_packs(sources, out_dir=DEFAULT_OUT_DIR, jobs=None, work_root=None, registry=True,
+                cache=None, min_entries=MIN_ENTRIES, compression=None, fts=False, completions=False,
+                previous_dir=None, previous_version=None):
+    """Build every source; returns ({pair: metadata}, {pair: error message})
+
+    ``previous_dir`` holds the previously published <pair>.sqlite.zip files
+    to write changesets against.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    work_root = Path(tempfile.mkdtemp(prefix='polybook-build-', dir=work_root))
+    built, failed = {}, {}
+    options = {'min_entries': min_entries, 'compression': compression, 'fts': fts, 'completions': completions}
+    stats = MirrorStats()
+
+    def fail(job, error):
+        print(f"❌ {', '.join(s['pair'] for s in job['sources'])}: {error}")
+        for source in job['sources']:
+            failed[source['pair']] = str(error)
+
+    try:
+        planned = plan_jobs(sources)
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix='download') as network, \
+                ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as cpu:
+            downloads = {}
+            for i, job in enumerate(planned):
+                work_dir = work_root / f"job{i:02d}"
+                work_dir.mkdir()
+                downloads[network.submit(prepare_job, job, work_dir, out_dir, cache, options, stats)] = (job, work_dir)
+
+            conversions = {}
+            for future in as_completed(downloads):
+                job, work_dir = downloads[future]
+                try:
+                    restored, archive, archive_sha256 = future.result()
+                except Exception as e:
+                    fail(job, e)
+                    continue
+                if restored is not None:
+                    for metadata in restored:
+                        built[metadata['id']] = metadata
+                        print(f"♻️ Cached: {metadata['id']}.sqlite.zip (sha256 {metadata['sha256'][:12]}…)")
+                    continue
+                print(f"📥 Downloaded {job['url']}")
+                future = cpu.submit(build_archive, archive, archive_sha256, job['sources'],
+                                    out_dir, work_dir, min_entries, compression, fts, completions)
+                conversions[future] = (job, archive_sha256)
+
+            for future in as_completed(conversions):
+                job, archive_sha256 = conversions[future]
+                try:
+                    for source, metadata in zip(job['sources'], future.result()):
+                        built[metadata['id']] = metadata
+                        if cache:
+                            cache.store(cache_key(cache, archive_sha256, source, options), metadata['id'], out_dir)
+                        print(f"✅ Built: {metadata['id']}.sqlite.zip "
+                              f"({metadata['bytes']} bytes, {metadata['entries']} entries)")
+                except Exception as e:
+                    fail(job, e)
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    if previous_dir and built:
+        write_deltas(built, out_dir, previous_dir, previous_version, jobs)
+    if built:
+        collapsed = collapse(out_dir, jobs=jobs)
+        for group in collapsed['collapsed']:
+            print(f"🔗 {', '.join(group['removed'])} -> {group['kept']} (identical, {group['bytes']} bytes)")
+    if registry and built:
+        if not write_registry(out_dir):
+            print("⚠️ Registry left out packs it could not verify")
+        print(f"📄 Registry: {out_dir / 'registry.json'}")
+    return built, failed
+
+
+def resolve_sources(pairs, strategy=None, mirrors=()):
+    """Source info for each requested pair; raises BuildError for unknown pairs"""
+    table = load_strategy(strategy) if strategy else {}
+    if not pairs:
+        pairs = list(table) if table else DEFAULT_PAIRS
+    sources = []
+    for pair in pairs:
+        source = table.get(pair) or pack_source(pair)
+        if source is None:
+            raise BuildError(f"Unknown language pair: {pair}")
+        source = dict(source, mirrors=list(source.get('mirrors', [])) + list(mirrors))
+        sources.append(source)
+    return sources
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build dictionary packs in parallel')
+    parser.add_argument('pairs', nargs='*', help='pack ids (default: every supported pair)')
+    parser.add_argument('--strategy', help='optimal-strategy JSON file to take pairs and URLs from')
+    parser.add_argument('--out-dir', default=str(DEFAULT_OUT_DIR))
+    parser.add_argument('--jobs', type=int, help='conversion processes (default: CPU count)')
+    parser.add_argument('--work-dir', help='parent directory for per-job work directories')
+    parser.add_argument('--mirror', action='append', default=[],
+                        help='extra byte-identical mirror URL (repeatable)')
+    parser.add_argument('--no-registry', action='store_true', help='skip registry.json')
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR), help='content-addressed build cache')
+    parser.add_argument('--no-cache', action='store_true', help='rebuild everything')
+    parser.add_argument('--compress-defs', choices=APP_CODECS,
+                        help='compress definitions per row with a dictionary trained on each pack')
+    parser.add_argument('--fts', action='store_true',
+                        help='add an FTS5 gloss index for reverse and full-text search (size reported separately)')
+    parser.add_argument('--completions', action='store_true', help='add the ranked prefix completion index')
+    parser.add_argument('--previous-dir', help='previously published packs to write row-level deltas against')
+    parser.add_argument('--previous-version', help='release the previous packs belong to (recorded in deltas)')
+    args = parser.parse_args(argv)
+
+    try:
+        sources = resolve_sources(args.pairs, args.strategy, args.mirror)
+    except BuildError as e:
+        print(f"❌ {e}")
+        print("🎯 Supported pairs: " + ', '.join(DEFAULT_PAIRS))
+        return 1
+
+    print(f"🔧 Building {len(sources)} pack(s) with {args.jobs or os.cpu_count()} worker(s)")
+    started = time.monotonic()
+    cache = None if args.no_cache else BuildCache(args.cache_dir)
+    built, failed = build_packs(sources, args.out_dir, args.jobs, args.work_dir,
+                                registry=not args.no_registry, cache=cache, compression=args.compress_defs,
+                                fts=args.fts, completions=args.completions, previous_dir=args.previous_dir,
+                                previous_version=args.previous_version or None)
+    print(f"\n⏱️ {len(built)} built, {len(failed)} failed in {time.monotonic() - started:.1f}s")
+    if cache:
+        print(f"🗄️ Build cache: {cache.hits} restored, {cache.misses} rebuilt")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
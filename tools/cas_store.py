@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for published pack artifacts
+Identical artifacts are kept once. In a publish directory, `collapse`
+keeps one file per SHA-256 and records every other name as an alias of it
+in aliases.json, so a release uploads (and a CDN serves) each distinct
+blob once while generate-registry.py still lists every pack id. `pack`
+copies a directory into a store laid out by digest,
+<store>/blobs/sha256-<hex><suffix>, with the names that pointed at each
+blob in <store>/aliases.json.
+
+The file kept for a set of duplicates is the one a JSON file in the same
+directory refers to (a registry URL, a metadata `file`), otherwise the
+shortest name.
+
+Usage:
+    python3 cas_store.py collapse releases --dry-run     # report duplicates only
+    python3 cas_store.py collapse dist/packs
+    python3 cas_store.py pack dist/packs cdn-store
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from downloader import sha256_file
+
+ALIASES_FILE = 'aliases.json'
+ALIASES_VERSION = 1
+BLOB_DIR = 'blobs'
+ARTIFACT_PATTERNS = ('*.zip', '*.gz')
+
+
+class StoreError(Exception):
+    """Raised when an alias or blob does not match the bytes it names"""
+
+
+def blob_name(digest, name):
+    """Content-addressed file name for an artifact: sha256-<hex> plus its last suffix"""
+    return f"sha256-{digest}{Path(name).suffix}"
+
+
+def artifacts(directory, patterns=ARTIFACT_PATTERNS):
+    """Artifact files in ``directory``, sorted by name"""
+    directory = Path(directory)
+    return sorted({path for pattern in patterns for path in directory.glob(pattern)
+                   if path.is_file() and not path.name.startswith('.')})
+
+
+def hash_files(paths, jobs=None):
+    """{path: sha256 hex}, hashed on a thread pool"""
+    with ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) * 2)) as pool:
+        digests = pool.map(lambda path: sha256_file(path).hexdigest(), paths)
+        return dict(zip(paths, digests))
+
+
+def duplicates(digests):
+    """{sha256: [paths]} for every digest more than one path shares"""
+    groups = {}
+    for path, digest in digests.items():
+        groups.setdefault(digest, []).append(path)
+    return {digest: sorted(paths) for digest, paths in groups.items() if len(paths) > 1}
+
+
+def referenced_names(directory):
+    """Base names of every string value in the JSON files of ``directory``"""
+    names = set()
+
+    def walk(value):
+        if isinstance(value, str):
+            names.add(value.rstrip('/').rsplit('/', 1)[-1])
+        elif isinstance(value, dict):
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    for path in Path(directory).glob('*.json'):
+        if path.name == ALIASES_FILE:
+            continue
+        try:
+            walk(json.loads(path.read_text(encoding='utf-8')))
+        except (OSError, ValueError):
+            continue
+    return names
+
+
+def canonical(paths, referenced=()):
+    """The copy of a duplicate set to keep: a referenced name first, then the shortest"""
+    return min(paths, key=lambda path: (path.name not in referenced, len(path.name), path.name))
+
+
+def load_aliases(directory):
+    """{alias name: {'file', 'sha256', 'bytes'}} from a directory's aliases.json"""
+    try:
+        data = json.loads((Path(directory) / ALIASES_FILE).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return data.get('aliases', {}) if data.get('version') == ALIASES_VERSION else {}
+
+
+def save_aliases(directory, aliases):
+    path = Path(directory) / ALIASES_FILE
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(json.dumps({'version': ALIASES_VERSION, 'aliases': dict(sorted(aliases.items()))},
+                              indent=2) + '\n', encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def resolve(directory, name):
+    """Path holding the bytes published as ``name`` (the file itself or its alias target); None if neither"""
+    path = Path(directory) / name
+    if path.exists():
+        return path
+    alias = load_aliases(directory).get(name)
+    if alias and (Path(directory) / alias['file']).exists():
+        return Path(directory) / alias['file']
+    return None
+
+
+def collapse(directory, dry_run=False, jobs=None):
+    """Keep one copy of every duplicated artifact in ``directory``; returns the summary
+
+    Removed names are recorded in aliases.json against the file that was
+    kept. Aliases whose target is gone, or whose name has been published
+    again as a real file, are dropped.
+    """
+    directory = Path(directory)
+    digests = hash_files(artifacts(directory), jobs)
+    referenced = referenced_names(directory)
+    aliases = {name: alias for name, alias in load_aliases(directory).items()
+               if not (directory / name).exists() and (directory / alias['file']).exists()}
+    collapsed = []
+    for digest, paths in sorted(duplicates(digests).items()):
+        kept = canonical(paths, referenced)
+        size = kept.stat().st_size
+        removed = [path for path in paths if path != kept]
+        collapsed.append({'sha256': digest, 'kept': kept.name, 'removed': [path.name for path in removed],
+                          'bytes': size})
+        for path in removed:
+            aliases[path.name] = {'file': kept.name, 'sha256': digest, 'bytes': size}
+            # Earlier aliases of a removed name follow it to the kept file
+            for alias in aliases.values():
+                if alias['file'] == path.name:
+                    alias['file'] = kept.name
+            if not dry_run:
+                path.unlink()
+    if not dry_run and (collapsed or (directory / ALIASES_FILE).exists()):
+        save_aliases(directory, aliases)
+    return {
+        'files': len(digests),
+        'blobs': len(set(digests.values())),
+        'collapsed': collapsed,
+        'bytes_saved': sum(group['bytes'] * len(group['removed']) for group in collapsed),
+    }
+
+
+class CasStore:
+    """Blobs stored once as <root>/blobs/sha256-<hex><suffix>, with an alias index"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.blobs = self.root / BLOB_DIR
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self.aliases = load_aliases(self.root)
+        self.stored = 0
+        self.reused = 0
+
+    def put(self, path, digest=None):
+        """Store one artifact under its digest; returns the blob path"""
+        path = Path(path)
+        digest = digest or sha256_file(path).hexdigest()
+        blob = self.blobs / blob_name(digest, path.name)
+        if blob.exists():
+            self.reused += 1
+        else:
+            tmp = blob.with_name(blob.name + '.tmp')
+            try:
+                os.link(path, tmp)
+            except OSError:
+                shutil.copyfile(path, tmp)
+            os.replace(tmp, blob)
+            self.stored += 1
+        self.aliases[path.name] = {'file': f"{BLOB_DIR}/{blob.name}", 'sha256': digest,
+                                   'bytes': blob.stat().st_size}
+        return blob
+
+    def resolve(self, name):
+        """Blob path for an alias name"""
+        alias = self.aliases.get(name)
+        if alias is None:
+            raise StoreError(f"{name}: no such alias")
+        blob = self.root / alias['file']
+        if not blob.exists() or blob.stat().st_size != alias['bytes']:
+            raise StoreError(f"{name}: blob {alias['file']} is missing or truncated")
+        return blob
+
+    def pack(self, directory, jobs=None):
+        """Store every artifact of ``directory`` (aliases.json there included); returns the summary"""
+        directory = Path(directory)
+        digests = hash_files(artifacts(directory), jobs)
+        for path, digest in digests.items():
+            self.put(path, digest)
+        for name, alias in load_aliases(directory).items():
+            target = directory / alias['file']
+            if name not in self.aliases and target.exists():
+                self.aliases[name] = dict(self.aliases[target.name])
+        self.save()
+        return {'files': len(self.aliases), 'blobs': len(set(digests.values())),
+                'stored': self.stored, 'reused': self.reused}
+
+    def save(self):
+        save_aliases(self.root, self.aliases)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Deduplicate published pack artifacts by content')
+    commands = parser.add_subparsers(dest='command', required=True)
+    collapse_parser = commands.add_parser('collapse', help='keep one copy of duplicated artifacts in place')
+    collapse_parser.add_argument('directory')
+    collapse_parser.add_argument('--dry-run', action='store_true', help='only report the duplicates')
+    collapse_parser.add_argument('--jobs', type=int, help='parallel hashing threads')
+    pack_parser = commands.add_parser('pack', help='copy artifacts into a store laid out by digest')
+    pack_parser.add_argument('directory')
+    pack_parser.add_argument('store')
+    pack_parser.add_argument('--jobs', type=int, help='parallel hashing threads')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'collapse':
+            summary = collapse(args.directory, args.dry_run, args.jobs)
+            for group in summary['collapsed']:
+                print(f"🔗 {group['kept']} ({group['sha256'][:12]}…, {group['bytes']} bytes): "
+                      f"{', '.join(group['removed'])}")
+            verb = 'would save' if args.dry_run else 'saved'
+            print(f"📦 {summary['files']} file(s), {summary['blobs']} distinct blob(s); "
+                  f"{verb} {summary['bytes_saved']} bytes")
+        else:
+            store = CasStore(args.store)
+            summary = store.pack(args.directory, args.jobs)
+            print(f"📦 {summary['files']} name(s) -> {summary['blobs']} blob(s): "
+                  f"{summary['stored']} stored, {summary['reused']} already present")
+    except (StoreError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Prefix completion index for packs
+An optional pack stage for autocomplete. Every headword gets a rank (a word
+frequency when a list is given, otherwise its definition length per lemma
+character as a proxy: common words are short and have the most senses).
+Prefixes of normalized lemmas matching more than COMPLETIONS headwords
+store their top-ranked entry ids in a WITHOUT ROWID `completion` table;
+any other prefix matches at most COMPLETIONS headwords, found with a range
+probe of the lemma_norm index. Either way a completion reads a bounded
+number of pages, unlike `LIKE 'abc%'`, which cannot use the BINARY lemma
+index and scans the table.
+
+Usage:
+    python3 completion.py PACK.sqlite PREFIX [--limit N]
+"""
+
+import argparse
+import heapq
+import json
+import sqlite3
+import sys
+
+from lemma_norm import normalizer
+
+COMPLETION_VERSION = 1
+COMPLETIONS = 10
+
+SCHEMA = """
+CREATE TABLE entry_rank (
+    entry_id INTEGER PRIMARY KEY REFERENCES entry (id),
+    rank INTEGER NOT NULL
+);
+CREATE TABLE completion (
+    prefix TEXT PRIMARY KEY,
+    entry_ids TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def load_frequencies(path):
+    """{word: count} from a 'word count' (or tab-separated) frequency list"""
+    frequencies = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.rsplit(None, 1)
+            if len(parts) == 2 and parts[1].isdigit():
+                frequencies[parts[0].strip()] = int(parts[1])
+    return frequencies
+
+
+def folded_frequencies(frequencies, normalize):
+    """A frequency list keyed by lookup key; spellings that fold together add up"""
+    folded = {}
+    for word, count in frequencies.items():
+        key = normalize(word)
+        folded[key] = folded.get(key, 0) + count
+    return folded
+
+
+def spec(ranked_by, limit=COMPLETIONS):
+    """Meta record for the index; ``ranked_by`` is 'frequency' or 'definition_length' (the proxy)"""
+    return {'version': COMPLETION_VERSION, 'limit': limit, 'rank': ranked_by}
+
+
+def prefix_upper(key):
+    """Smallest string greater than every string starting with ``key``
+
+    Code point order, which is SQLite's BINARY order on UTF-8 text.
+    """
+    return key[:-1] + chr(ord(key[-1]) + 1)
+
+
+def heavy_prefixes(rows, limit=COMPLETIONS):
+    """Yield (prefix, [entry ids best first]) for every prefix matching more than ``limit`` rows
+
+    ``rows`` are (key, entry id, rank) in key order. Ties in rank go to the
+    lower id (lemma order), as in complete().
+    """
+    stack = []  # [count, heap of (rank, -id)] for each length of the open prefix
+    previous = ''
+    for key, entry_id, rank in rows:
+        common = 0
+        for a, b in zip(previous, key):
+            if a != b:
+                break
+            common += 1
+        while len(stack) > common:
+            count, heap = stack.pop()
+            if count > limit:
+                yield previous[:len(stack) + 1], [-i for _, i in sorted(heap, reverse=True)]
+        while len(stack) < len(key):
+            stack.append([0, []])
+        item = (rank, -entry_id)
+        for node in stack:
+            node[0] += 1
+            if len(node[1]) < limit:
+                heapq.heappush(node[1], item)
+            elif item > node[1][0]:
+                heapq.heapreplace(node[1], item)
+        previous = key
+    while stack:
+        count, heap = stack.pop()
+        if count > limit:
+            yield previous[:len(stack) + 1], [-i for _, i in sorted(heap, reverse=True)]
+
+
+def build(conn, limit=COMPLETIONS):
+    """Fill `completion` from entry and entry_rank; returns the number of prefixes stored"""
+    rows = conn.execute('SELECT lemma_norm, id, rank FROM entry JOIN entry_rank ON entry_rank.entry_id = entry.id '
+                        "WHERE lemma_norm != '' ORDER BY lemma_norm, id")
+    stored = 0
+    batch = []
+    for prefix, ids in heavy_prefixes(rows, limit):
+        batch.append((prefix, ' '.join(map(str, ids))))
+        if len(batch) >= 10000:
+            stored += len(batch)
+            conn.executemany('INSERT INTO completion VALUES (?, ?)', batch)
+            batch.clear()
+    conn.executemany('INSERT INTO completion VALUES (?, ?)', batch)
+    return stored + len(batch)
+
+
+def table_bytes(conn):
+    """Bytes the completion tables occupy in the pack"""
+    try:
+        query = "SELECT SUM(pgsize) FROM dbstat WHERE name IN ('completion', 'entry_rank')"
+        return conn.execute(query).fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return 0
+
+
+def complete(conn, key, limit=COMPLETIONS):
+    """Top-ranked headwords whose normalized lemma starts with ``key`` (already normalized)"""
+    if not key:
+        return []
+    row = conn.execute('SELECT entry_ids FROM completion WHERE prefix = ?', (key,)).fetchone()
+    if row:
+        ids = [int(i) for i in row[0].split()[:limit]]
+        lemmas = dict(conn.execute(f"SELECT id, lemma FROM entry WHERE id IN ({','.join('?' * len(ids))})", ids))
+        return [lemmas[i] for i in ids]
+    # Not a stored prefix, so at most COMPLETIONS headwords match
+    return [lemma for (lemma,) in conn.execute(
+        'SELECT lemma FROM entry JOIN entry_rank ON entry_rank.entry_id = entry.id '
+        'WHERE lemma_norm >= ? AND lemma_norm < ? ORDER BY rank DESC, id LIMIT ?',
+        (key, prefix_upper(key), limit))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Complete a prefix from a pack built with a completion index')
+    parser.add_argument('pack')
+    parser.add_argument('prefix')
+    parser.add_argument('--limit', type=int, default=COMPLETIONS)
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(f"file:{args.pack}?mode=ro", uri=True)
+    try:
+        rules = json.loads(conn.execute("SELECT value FROM meta WHERE key = 'lemma_norm'").fetchone()[0])
+        words = complete(conn, normalizer(rules)(args.prefix), args.limit)
+    except (sqlite3.OperationalError, TypeError) as e:
+        print(f"❌ {args.pack} has no completion index ({e})")
+        return 1
+    finally:
+        conn.close()
+    print(f"🔤 {args.prefix}: {', '.join(words) if words else '(no completions)'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
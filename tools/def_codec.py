@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Per-row definition compression with a dictionary trained on the pack
+An optional pack encoding: every definition is compressed on its own
+against a dictionary built from that pack's definitions, so a lookup still
+decodes a single small blob. The dictionary and codec spec live in the
+pack's `meta` table ('def_dict', 'def_codec'). Rows that would not shrink
+stay plain TEXT; compressed rows are BLOBs, so the column type tells a
+reader what to do.
+
+Codecs:
+    deflate  raw deflate with a preset dictionary (zlib; the app inflates
+             it with fflate)
+    zstd     zstd dictionary mode (needs the optional zstandard package;
+             experiments only: the app cannot decode it, so the pack
+             builders do not offer it and the quality gate and registry
+             refuse packs that use it)
+
+Usage:
+    python3 def_codec.py PACK.sqlite        # ratio and per-row decode cost
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import time
+import zlib
+from collections import Counter
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODEC_VERSION = 1
+DEFLATE_DICT_SIZE = 32 * 1024  # the whole deflate window
+ZSTD_DICT_SIZE = 64 * 1024
+# Codecs packages/app/src/services/definitionCodec.ts can decode
+APP_CODECS = ('deflate',)
+SAMPLE_BYTES = 8 * 1024 * 1024
+SAMPLE_ROWS = 20000
+
+# Words with their trailing separator, and markup tags
+_TOKEN = re.compile(r'<[^<>]{1,64}>|[^\W\d_]{2,}[^\w<]{0,3}')
+
+
+class CodecError(Exception):
+    """Raised for unknown or unavailable codecs"""
+
+
+def train_deflate_dictionary(samples, size=DEFLATE_DICT_SIZE):
+    """Preset dictionary of the substrings that save the most across samples
+
+    Deflate finds matches nearest the data first, so the most valuable
+    tokens go at the end of the dictionary.
+    """
+    counts = Counter()
+    for text in samples:
+        counts.update(set(_TOKEN.findall(text)))
+    scored = sorted(((count * len(token.encode('utf-8')), token) for token, count in counts.items() if count > 1),
+                    reverse=True)
+    chosen, total = [], 0
+    for _, token in scored:
+        data = token.encode('utf-8')
+        if total + len(data) > size:
+            continue
+        chosen.append(data)
+        total += len(data)
+    return b''.join(reversed(chosen))
+
+
+def _take_bytes(samples, limit):
+    total = 0
+    for text in samples:
+        total += len(text)
+        if total > limit:
+            return
+        yield text
+
+
+class Codec:
+    """Encode and decode definitions with one trained dictionary"""
+
+    def __init__(self, name, dictionary):
+        if name not in ('deflate', 'zstd'):
+            raise CodecError(f"Unknown definition codec: {name}")
+        if name == 'zstd' and zstandard is None:
+            raise CodecError("The zstd codec needs the zstandard package")
+        self.name = name
+        self.dictionary = dictionary
+        if name == 'zstd':
+            zdict = zstandard.ZstdCompressionDict(dictionary)
+            self._compressor = zstandard.ZstdCompressor(level=19, dict_data=zdict, write_checksum=False,
+                                                        write_content_size=True, write_dict_id=False)
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+
+    @classmethod
+    def train(cls, name, samples):
+        """Train on up to SAMPLE_BYTES of sample definitions"""
+        samples = list(_take_bytes(samples, SAMPLE_BYTES))
+        if name == 'zstd':
+            if zstandard is None:
+                raise CodecError("The zstd codec needs the zstandard package")
+            data = [s.encode('utf-8') for s in samples]
+            dictionary = zstandard.train_dictionary(ZSTD_DICT_SIZE, data, threads=0).as_bytes()
+        else:
+            dictionary = train_deflate_dictionary(samples)
+        return cls(name, dictionary)
+
+    def spec(self):
+        return {'codec': self.name, 'version': CODEC_VERSION, 'dict_bytes': len(self.dictionary)}
+
+    def compress(self, data):
+        if self.name == 'zstd':
+            return self._compressor.compress(data)
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, self.dictionary)
+        return compressor.compress(data) + compressor.flush()
+
+    def encode(self, text):
+        """BLOB when compression saves space, otherwise the text unchanged"""
+        data = text.encode('utf-8')
+        packed = self.compress(data)
+        return packed if len(packed) < len(data) else text
+
+    def decode(self, value):
+        if isinstance(value, str):
+            return value
+        if self.name == 'zstd':
+            return self._decompressor.decompress(value).decode('utf-8')
+        decompressor = zlib.decompressobj(-15, zdict=self.dictionary)
+        return (decompressor.decompress(value) + decompressor.flush()).decode('utf-8')
+
+
+def load_codec(conn):
+    """The pack's codec, or None for packs with plain definitions"""
+    try:
+        rows = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('def_codec', 'def_dict')"))
+    except sqlite3.OperationalError:
+        return None
+    if 'def_codec' not in rows:
+        return None
+    return Codec(json.loads(rows['def_codec'])['codec'], rows['def_dict'])
+
+
+def sample_stride(rows, limit=SAMPLE_ROWS):
+    """Every n-th row so at most ``limit`` rows are sampled (deterministic)"""
+    return max(1, rows // limit)
+
+
+def measure(pack_path, rows=2000):
+    """Compression ratio and per-row decode cost of an encoded pack"""
+    conn = sqlite3.connect(f"file:{pack_path}?mode=ro", uri=True)
+    try:
+        codec = load_codec(conn)
+        if codec is None:
+            raise CodecError(f"{pack_path} has plain definitions")
+        stored = conn.execute('SELECT def FROM entry ORDER BY id').fetchall()
+    finally:
+        conn.close()
+    raw_bytes = stored_bytes = compressed = 0
+    for (value,) in stored:
+        stored_bytes += len(value) if isinstance(value, bytes) else len(value.encode('utf-8'))
+        raw_bytes += len(codec.decode(value).encode('utf-8'))
+        compressed += isinstance(value, bytes)
+
+    sample = [value for (value,) in stored[::sample_stride(len(stored), rows)]]
+    started = time.perf_counter()
+    for value in sample:
+        codec.decode(value)
+    elapsed = time.perf_counter() - started
+    return {
+        'codec': codec.name,
+        'rows': len(stored),
+        'compressed_rows': compressed,
+        'dict_bytes': len(codec.dictionary),
+        'raw_bytes': raw_bytes,
+        'stored_bytes': stored_bytes + len(codec.dictionary),
+        'ratio': round(raw_bytes / (stored_bytes + len(codec.dictionary)), 3) if stored_bytes else 0.0,
+        'decode_us_per_row': round(elapsed / len(sample) * 1e6, 2) if sample else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report definition compression of an encoded pack')
+    parser.add_argument('pack')
+    parser.add_argument('--rows', type=int, default=2000, help='rows to time decoding on')
+    args = parser.parse_args(argv)
+    try:
+        stats = measure(args.pack, args.rows)
+    except (CodecError, sqlite3.Error) as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"🗜️ {stats['codec']}: {stats['raw_bytes']} -> {stats['stored_bytes']} bytes "
+          f"(ratio {stats['ratio']}, dictionary {stats['dict_bytes']} bytes)")
+    print(f"   {stats['compressed_rows']}/{stats['rows']} rows compressed, "
+          f"{stats['decode_us_per_row']} µs per row to decode")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
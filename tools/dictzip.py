@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Random-access reader for dictzip (.dict.dz) files
+dictzip is gzip with the deflate stream flushed every CHLEN bytes and a chunk
+table in the gzip "RA" extra field, so any (offset, size) can be served by
+inflating only the chunks that cover it. Recently inflated chunks are kept
+in a small LRU.
+
+Usage:
+    python3 dictzip.py FILE.dict.dz                 # chunk table summary
+    python3 dictzip.py FILE.dict.dz OFFSET SIZE     # print a byte range
+"""
+
+import argparse
+import struct
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+
+FTEXT, FHCRC, FEXTRA, FNAME, FCOMMENT = 1, 2, 4, 8, 16
+DEFAULT_CHUNK_LENGTH = 58315  # dictzip's own default
+DEFAULT_CACHE_CHUNKS = 64
+
+
+class DictzipError(Exception):
+    """Raised when a file is not a valid dictzip archive"""
+
+
+def parse_header(f):
+    """Parse the gzip header; returns (chunk length, [compressed chunk sizes], data offset)"""
+    header = f.read(10)
+    if len(header) < 10 or header[:2] != b'\x1f\x8b' or header[2] != 8:
+        raise DictzipError("Not a gzip file")
+    flags = header[3]
+    if not flags & FEXTRA:
+        raise DictzipError("gzip file has no extra field (not dictzip)")
+
+    (xlen,) = struct.unpack('<H', f.read(2))
+    extra = f.read(xlen)
+    chunk_length, sizes = None, None
+    pos = 0
+    while pos + 4 <= len(extra):
+        si1, si2, length = extra[pos], extra[pos + 1], struct.unpack_from('<H', extra, pos + 2)[0]
+        if (si1, si2) == (ord('R'), ord('A')):
+            _version, chunk_length, count = struct.unpack_from('<HHH', extra, pos + 4)
+            sizes = list(struct.unpack_from(f'<{count}H', extra, pos + 10))
+        pos += 4 + length
+    if sizes is None:
+        raise DictzipError("gzip extra field has no RA chunk table (not dictzip)")
+
+    for flag in (FNAME, FCOMMENT):
+        if flags & flag:
+            while f.read(1) not in (b'\0', b''):
+                pass
+    if flags & FHCRC:
+        f.read(2)
+    return chunk_length, sizes, f.tell()
+
+
+class DictzipReader:
+    """read(offset, size) over the uncompressed data of a .dict.dz file"""
+
+    def __init__(self, path, cache_chunks=DEFAULT_CACHE_CHUNKS):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self.chunk_length, sizes, data_offset = parse_header(self._file)
+        except DictzipError:
+            self._file.close()
+            raise
+        self._offsets = []
+        for size in sizes:
+            self._offsets.append(data_offset)
+            data_offset += size
+        self._sizes = sizes
+        self._cache = OrderedDict()
+        self._cache_chunks = cache_chunks
+        self._lock = threading.Lock()
+        self.inflated = 0
+
+    @property
+    def chunk_count(self):
+        return len(self._sizes)
+
+    def _chunk(self, index):
+        with self._lock:
+            if index in self._cache:
+                self._cache.move_to_end(index)
+                return self._cache[index]
+            self._file.seek(self._offsets[index])
+            compressed = self._file.read(self._sizes[index])
+            if len(compressed) != self._sizes[index]:
+                raise DictzipError(f"{self.path}: chunk {index} at offset {self._offsets[index]} is truncated "
+                                   f"({len(compressed)} of {self._sizes[index]} bytes)")
+            try:
+                # Each chunk ends on a full flush, so it inflates on its own as raw deflate
+                data = zlib.decompressobj(-zlib.MAX_WBITS).decompress(compressed)
+            except zlib.error as e:
+                raise DictzipError(f"{self.path}: chunk {index} at offset {self._offsets[index]} is corrupt: {e}")
+            self.inflated += 1
+            self._cache[index] = data
+            if len(self._cache) > self._cache_chunks:
+                self._cache.popitem(last=False)
+            return data
+
+    def read(self, offset, size):
+        if size <= 0:
+            return b''
+        first = offset // self.chunk_length
+        last = min((offset + size - 1) // self.chunk_length, self.chunk_count - 1)
+        data = b''.join(self._chunk(i) for i in range(first, last + 1))
+        start = offset - first * self.chunk_length
+        return data[start:start + size]
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_dictzip(data, path, chunk_length=DEFAULT_CHUNK_LENGTH, level=9):
+    """Compress ``data`` into a dictzip file readable by DictzipReader and gzip"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    starts = range(0, len(data), chunk_length) or [0]
+    chunks = []
+    for start in starts:
+        # Full flush between chunks so each one inflates independently
+        mode = zlib.Z_FINISH if start == starts[-1] else zlib.Z_FULL_FLUSH
+        chunks.append(compressor.compress(data[start:start + chunk_length]) + compressor.flush(mode))
+
+    ra = struct.pack('<HHH', 1, chunk_length, len(chunks)) + b''.join(
+        struct.pack('<H', len(chunk)) for chunk in chunks)
+    extra = b'RA' + struct.pack('<H', len(ra)) + ra
+    header = b'\x1f\x8b\x08' + bytes([FEXTRA]) + b'\0\0\0\0' + b'\x02\x03' + struct.pack('<H', len(extra)) + extra
+    trailer = struct.pack('<LL', zlib.crc32(data), len(data) & 0xffffffff)
+    with open(path, 'wb') as f:
+        f.write(header + b''.join(chunks) + trailer)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect or read ranges of a dictzip file')
+    parser.add_argument('path')
+    parser.add_argument('offset', type=int, nargs='?')
+    parser.add_argument('size', type=int, nargs='?')
+    args = parser.parse_args(argv)
+
+    try:
+        reader = DictzipReader(args.path)
+    except (DictzipError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+    with reader:
+        if args.offset is None:
+            print(f"📦 {args.path}: {reader.chunk_count} chunks of {reader.chunk_length} bytes")
+            return 0
+        sys.stdout.buffer.write(reader.read(args.offset, args.size or 0))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
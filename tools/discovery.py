@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Dictionary & translation model discovery engine
+Runs every source plugin (discovery_sources.py) concurrently in one process,
+over one shared HTTP session with per-host token-bucket rate limits, and
+writes the per-source JSON files plus the unified registry
+
+Usage:
+    python3 discovery.py [--sources freedict,wiktionary,...] [--out-dir DIR]
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from discovery_sources import SOURCES, translation_models_document
+from http_cache import cache_from_env
+from http_probe import UrlProber
+
+DEFAULT_SOURCES = ['freedict', 'wiktionary', 'translatelocally', 'opus-mt', 'bergamot-statmt']
+TRANSLATION_MODELS_FILE = 'bergamot-scraped.json'
+UNIFIED_REGISTRY_FILE = 'unified-dictionary-registry.json'
+
+
+class DiscoveryError(Exception):
+    """Raised when a source failed; its previous output is left as it was"""
+
+
+def load_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def make_prober(sources, cache=None):
+    """One shared prober with the union of every source's rate limits"""
+    rate_limits = {}
+    for source in sources:
+        rate_limits.update(source.rate_limits)
+    return UrlProber(timeout=10, cache=cache, rate_limits=rate_limits)
+
+
+def run_sources(sources, prober):
+    """Run all sources concurrently; returns {source name: entries, or None if it failed}"""
+    def run(source):
+        started = time.monotonic()
+        try:
+            entries = source.discover(prober)
+        except Exception as e:
+            print(f"❌ {source.name} discovery failed: {e}")
+            return None
+        print(f"  ✅ {source.name}: {len(entries)} found in {time.monotonic() - started:.1f}s")
+        return entries
+
+    with ThreadPoolExecutor(max_workers=max(1, len(sources)), thread_name_prefix='source') as pool:
+        futures = {source.name: pool.submit(run, source) for source in sources}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def build_unified_registry(dictionary_sources, translation_models):
+    """Merge discovered dictionaries and models into the unified registry
+
+    ``dictionary_sources`` is [(source name, {pair: entry})] in merge order;
+    for bilingual pairs found in several sources the larger one wins.
+    """
+    unified = {
+        'metadata': {
+            'created': time.strftime('%Y-%m-%d %H:%M:%S UTC'),
+            'sources': [name for name, _ in dictionary_sources] + ['bergamot'],
+            'strategy': 'top_10_languages_comprehensive'
+        },
+        'bilingual_dictionaries': {},
+        'monolingual_dictionaries': {},
+        'translation_models': {},
+        'language_coverage': {},
+        'recommendations': {}
+    }
+
+    for name, entries in dictionary_sources:
+        print(f"📖 Processing {len(entries)} {name} dictionaries...")
+        wiktionary = name.startswith('wiktionary')
+        for pair, data in entries.items():
+            size = data.get('size_mb') or 0
+            if data.get('type') == 'monolingual':
+                unified['monolingual_dictionaries'][pair] = {
+                    'source': data['source'],
+                    'language': data['lang1']['code'],
+                    'url': data['url'],
+                    'size_mb': data.get('size_mb'),
+                    'quality_score': 9  # Wiktionary generally high quality
+                }
+                continue
+
+            existing = unified['bilingual_dictionaries'].get(pair)
+            if existing and size <= (existing.get('size_mb') or 0):
+                continue
+            unified['bilingual_dictionaries'][pair] = {
+                'source': data['source'],
+                'pair': pair,
+                'url': data['url'],
+                'size_mb': data.get('size_mb'),
+                'language_1': data['lang1'],
+                'language_2': data['lang2'],
+                'version': data.get('version'),
+                # Size-based quality, with a bonus for Wiktionary's richer entries
+                'quality_score': min(10, size / 3 + 6) if wiktionary else min(10, size / 5 + 5)
+            }
+
+    print(f"🤖 Processing {len(translation_models)} translation models...")
+    for pair, data in translation_models.items():
+        unified['translation_models'][pair] = {
+            'source': data['source'],
+            'pair': pair,
+            'url': data['url'],
+            'size_mb': data.get('size_mb'),
+            'model_type': data.get('model_type'),
+            'source_language': data['source_lang'],
+            'target_language': data['target_lang']
+        }
+
+    coverage = defaultdict(lambda: {'dictionaries': 0, 'translations': 0, 'total_pairs': []})
+    for pair in unified['bilingual_dictionaries']:
+        for lang in pair.split('-'):
+            coverage[lang]['dictionaries'] += 1
+            coverage[lang]['total_pairs'].append(pair)
+    for pair in unified['translation_models']:
+        for lang in pair.split('-'):
+            coverage[lang]['translations'] += 1
+    unified['language_coverage'] = dict(coverage)
+
+    for lang_code, data in coverage.items():
+        score = data['dictionaries'] * 2 + data['translations']
+        unified['recommendations'][lang_code] = {
+            'support_level': 'excellent' if score >= 8 else 'good' if score >= 4 else 'limited',
+            'dictionary_pairs': data['dictionaries'],
+            'translation_pairs': data['translations'],
+            'total_score': score
+        }
+
+    return unified
+
+
+def run_discovery(source_names=DEFAULT_SOURCES, out_dir='.', unified=True, cache=None):
+    """Discover all sources, write their JSON files and (optionally) the unified registry
+
+    A failed source's file is not rewritten, and neither is any combined
+    output it feeds (the translation models file, the unified registry), so
+    the next run still diffs against the last good data. The successful
+    sources are saved first, then DiscoveryError names the failed ones.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sources = [SOURCES[name]() for name in source_names]
+
+    with make_prober(sources, cache=cache) as prober:
+        results = run_sources(sources, prober)
+
+    documents = {}
+    dictionary_sources = []
+    models = {}
+    failed = [source for source in sources if results[source.name] is None]
+    for source in sources:
+        entries = results[source.name]
+        if entries is None:
+            continue
+        if source.kind == 'translation_models':
+            models[source] = entries
+            continue
+        dictionary_sources.append((source.name, entries))
+        path = out_dir / source.output_file
+        documents[source.output_file] = source.document(entries, load_json(path))
+
+    if models and not any(source.kind == 'translation_models' for source in failed):
+        documents[TRANSLATION_MODELS_FILE] = translation_models_document(models)
+
+    for filename, document in documents.items():
+        save_json(out_dir / filename, document)
+        if 'changes' in document:
+            rebuild = document['changes']['rebuild']
+            print(f"🔁 {filename}: {', '.join(rebuild) if rebuild else 'no changes'} need rebuild")
+
+    if unified and failed:
+        print(f"\n⚠️ Keeping the previous {UNIFIED_REGISTRY_FILE}: not every source was discovered")
+    elif unified:
+        print("\n📊 Creating unified registry from discovered data...")
+        translation_models = documents.get(TRANSLATION_MODELS_FILE, {}).get('translation_models', {})
+        registry = build_unified_registry(dictionary_sources, translation_models)
+        save_json(out_dir / UNIFIED_REGISTRY_FILE, registry)
+        documents[UNIFIED_REGISTRY_FILE] = registry
+        print_registry_summary(registry)
+
+    if failed:
+        raise DiscoveryError(f"{', '.join(source.name for source in failed)} failed; previous output kept")
+    return documents
+
+
+def print_registry_summary(unified):
+    print(f"✅ Unified registry created!")
+    print(f"📊 Summary:")
+    print(f"  - Bilingual dictionaries: {len(unified['bilingual_dictionaries'])}")
+    print(f"  - Monolingual dictionaries: {len(unified['monolingual_dictionaries'])}")
+    print(f"  - Translation models: {len(unified['translation_models'])}")
+    print(f"  - Languages covered: {len(unified['language_coverage'])}")
+
+    print(f"\n🏆 TOP LANGUAGE SUPPORT:")
+    sorted_recs = sorted(unified['recommendations'].items(),
+                         key=lambda x: x[1]['total_score'], reverse=True)[:10]
+    for lang, rec in sorted_recs:
+        print(f"  {lang}: {rec['support_level']} ({rec['dictionary_pairs']} dicts, {rec['translation_pairs']} models)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Discover dictionary sources and translation models')
+    parser.add_argument('--sources', default=','.join(DEFAULT_SOURCES),
+                        help=f"comma-separated plugins (available: {', '.join(SOURCES)})")
+    parser.add_argument('--out-dir', default='.', help='directory for the JSON outputs')
+    parser.add_argument('--no-registry', action='store_true', help='skip the unified registry')
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.sources.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SOURCES]
+    if unknown:
+        print(f"❌ Unknown sources: {', '.join(unknown)}")
+        return 1
+
+    print("🕷️ Discovering dictionary sources")
+    print("=" * 40)
+    started = time.monotonic()
+    cache = cache_from_env()
+    status = 0
+    try:
+        run_discovery(names, args.out_dir, unified=not args.no_registry, cache=cache)
+    except DiscoveryError as e:
+        print(f"❌ {e}")
+        status = 1
+    if cache:
+        print(f"🗄️ HTTP cache: {cache.stats()}")
+    print(f"\n⏱️ Discovery finished in {time.monotonic() - started:.1f}s")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Source plugins for the discovery engine (discovery.py)
+Each plugin lists the artifacts one upstream offers for our languages. All
+network access goes through the engine's shared UrlProber, so plugins never
+open their own sessions, probe serially or sleep.
+
+Adding a source: subclass Source, implement discover(), decorate with
+@register_source.
+"""
+
+import time
+
+from languages import (ALL, ISO3_TO_ISO1, TOP_10, TOP_15, get_language_code,
+                       language_name, names_for)
+from wiktionary_tree import diff_dictionaries, list_dictionaries
+
+SOURCES = {}
+
+
+def register_source(cls):
+    """Class decorator adding a Source subclass to the SOURCES registry"""
+    SOURCES[cls.name] = cls
+    return cls
+
+
+def size_mb(size_bytes):
+    return round(size_bytes / (1024 * 1024), 1) if size_bytes else None
+
+
+def lang_info(code):
+    return {'code': code, 'name': language_name(code)}
+
+
+class Source:
+    """Base class for discovery plugins
+
+    Attributes:
+        name         registry key / CLI name
+        kind         'dictionaries' or 'translation_models'
+        output_file  legacy per-source JSON file (None if merged by kind)
+        rate_limits  {host: (requests per second, burst)} hints for the prober
+    """
+
+    name = None
+    kind = 'dictionaries'
+    output_file = None
+    rate_limits = {}
+
+    def discover(self, prober):
+        """Return {pair: entry} for everything this source offers"""
+        raise NotImplementedError
+
+    def document(self, entries, previous):
+        """Wrap discovered entries into the JSON document saved for this source"""
+        return {
+            'source': self.name,
+            'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S UTC'),
+            'total_dictionaries_found': len(entries),
+            'dictionaries': entries
+        }
+
+
+def _sort_by_size(entries):
+    return dict(sorted(entries.items(), key=lambda x: x[1]['size_mb'] or 0, reverse=True))
+
+
+@register_source
+class FreeDictSource(Source):
+    """FreeDict StarDict releases from the freedict-database.json catalogue"""
+
+    name = 'freedict'
+    output_file = 'freedict-scraped.json'
+    catalogue_url = 'https://freedict.org/freedict-database.json'
+    rate_limits = {'freedict.org': (2, 2), 'download.freedict.org': (8, 8)}
+
+    def __init__(self, languages=TOP_15):
+        self.languages = set(languages)
+
+    def discover(self, prober):
+        print("📥 Fetching FreeDict catalogue...")
+        catalogue = prober.get_json(self.catalogue_url)
+        entries = {}
+        for dictionary in catalogue:
+            name = dictionary.get('name', '')
+            parts = name.split('-')
+            if len(parts) != 2:
+                continue
+            code1, code2 = (ISO3_TO_ISO1.get(part) for part in parts)
+            if code1 not in self.languages or code2 not in self.languages:
+                continue
+            releases = [r for r in dictionary.get('releases', []) if r.get('platform') == 'stardict']
+            if not releases:
+                continue
+            release = next((r for r in releases if r.get('version') == dictionary.get('edition')),
+                           releases[-1])
+            size = str(release.get('size', ''))
+            headwords = str(dictionary.get('headwords', ''))
+            pair = f"{code1}-{code2}"
+            entries[pair] = {
+                'pair': pair,
+                'lang1': lang_info(code1),
+                'lang2': lang_info(code2),
+                'source': self.name,
+                'url': release['URL'],
+                'version': release.get('version'),
+                'headwords': int(headwords) if headwords.isdigit() else None,
+                'size_bytes': int(size) if size.isdigit() else None,
+                'size_mb': size_mb(int(size)) if size.isdigit() else None,
+                'checksum': release.get('checksum'),
+                'type': 'bilingual'
+            }
+
+        # Only releases the catalogue did not size need a HEAD, all in one batch
+        unsized = [e for e in entries.values() if not e['size_bytes']]
+        sizes = prober.sizes([e['url'] for e in unsized])
+        for entry in unsized:
+            entry['size_bytes'] = sizes.get(entry['url'])
+            entry['size_mb'] = size_mb(entry['size_bytes'])
+        return _sort_by_size(entries)
+
+
+@register_source
+class WiktionarySource(Source):
+    """Vuizur/Wiktionary-Dictionaries StarDict archives via one git tree request"""
+
+    name = 'wiktionary'
+    output_file = 'wiktionary-scraped.json'
+    document_source = 'wiktionary_vuizur'
+    rate_limits = {'api.github.com': (1, 5)}
+
+    def __init__(self, languages=ALL, require_both=False):
+        self.names = names_for(languages)
+        self.require_both = require_both
+
+    def accept(self, lang1, lang2):
+        if self.require_both:
+            return lang1 in self.names and lang2 in self.names
+        return lang1 in self.names or lang2 in self.names
+
+    def make_entry(self, dict_info):
+        lang1, lang2 = dict_info['lang1'], dict_info['lang2']
+        lang1_code = get_language_code(lang1)
+        lang2_code = get_language_code(lang2)
+        pair = f"{lang1_code}-{lang2_code}"
+        return pair, {
+            'pair': pair,
+            'lang1': {
+                'code': lang1_code,
+                'name': self.names.get(lang1, lang1.title()),
+                'full_name': lang1.title()
+            },
+            'lang2': {
+                'code': lang2_code,
+                'name': self.names.get(lang2, lang2.title()),
+                'full_name': lang2.title()
+            },
+            'source': 'wiktionary_vuizur',
+            'filename': dict_info['filename'],
+            'url': dict_info['raw_url'],
+            'size_bytes': dict_info['size_bytes'],
+            'size_mb': size_mb(dict_info['size_bytes']),
+            'sha': dict_info['sha'],
+            'type': 'bilingual' if lang1 != lang2 else 'monolingual'
+        }
+
+    def discover(self, prober):
+        print(f"🕷️ Listing {self.name} dictionaries from the git tree...")
+        entries = {}
+        for dict_info in list_dictionaries(prober, self.accept):
+            pair, entry = self.make_entry(dict_info)
+            entries[pair] = entry
+        return _sort_by_size(entries)
+
+    def document(self, entries, previous):
+        pairs = list(entries)
+        return {
+            'source': self.document_source,
+            'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S UTC'),
+            'total_dictionaries_found': len(entries),
+            'languages_covered': list(set([p.split('-')[0] for p in pairs] +
+                                          [p.split('-')[1] for p in pairs])),
+            'dictionaries': entries,
+            'changes': diff_dictionaries(previous.get('dictionaries', {}), entries)
+        }
+
+
+@register_source
+class WiktionaryTop10Source(WiktionarySource):
+    """Wiktionary dictionaries where both languages are in the top 10"""
+
+    name = 'wiktionary-top10'
+    output_file = 'wiktionary-top10-scraped.json'
+    document_source = 'wiktionary_vuizur_top10'
+
+    def __init__(self):
+        super().__init__(languages=TOP_10, require_both=True)
+
+    def make_entry(self, dict_info):
+        pair, entry = super().make_entry(dict_info)
+        entry['bidirectional'] = True  # Wiktionary packs are typically bidirectional
+        entry['priority'] = 'high'  # All TOP 10 languages get high priority
+        return pair, entry
+
+    def document(self, entries, previous):
+        document = super().document(entries, previous)
+        document['target_languages'] = [language_name(code) for code in TOP_10]
+        return document
+
+
+def _model_entry(src_lang, tgt_lang, source, model_type, url, size_bytes, **extra):
+    pair = f"{src_lang}-{tgt_lang}"
+    entry = {
+        'pair': pair,
+        'source_lang': lang_info(src_lang),
+        'target_lang': lang_info(tgt_lang),
+        'source': source,
+        'model_type': model_type,
+        'url': url,
+        'size_bytes': size_bytes,
+        'size_mb': size_mb(size_bytes)
+    }
+    entry.update(extra)
+    return pair, entry
+
+
+@register_source
+class TranslateLocallySource(Source):
+    """Bergamot models listed in the translateLocally registry"""
+
+    name = 'translatelocally'
+    kind = 'translation_models'
+    priority = 1
+    registry_url = 'https://translatelocally.com/models.json'
+    rate_limits = {'translatelocally.com': (2, 2)}
+
+    def __init__(self, languages=TOP_15):
+        self.languages = set(languages)
+
+    def discover(self, prober):
+        print("📥 Fetching translateLocally model registry...")
+        models = prober.get_json(self.registry_url)
+        if isinstance(models, dict):
+            models = models.get('models', [])
+
+        # Format examples: en-es-tiny, de-en-base, etc.
+        candidates = []
+        for model in models:
+            parts = model.get('name', '').split('-')
+            if len(parts) >= 3 and parts[0] in self.languages and parts[1] in self.languages:
+                candidates.append((parts[0], parts[1], '-'.join(parts[2:]), model))
+
+        sizes = prober.sizes([m['url'] for _, _, _, m in candidates if m.get('url')])
+        entries = {}
+        for src_lang, tgt_lang, model_type, model in candidates:
+            pair, entry = _model_entry(
+                src_lang, tgt_lang, self.name, model_type, model.get('url', ''),
+                sizes.get(model.get('url')),
+                name=model['name'],
+                description=model.get('description', ''),
+                license=model.get('license', ''))
+            entries[pair] = entry
+        return entries
+
+
+@register_source
+class OpusMtSource(Source):
+    """OPUS-MT models from the OPUS-MT app registry"""
+
+    name = 'opus-mt'
+    kind = 'translation_models'
+    priority = 0
+    registry_url = 'https://object.pouta.csc.fi/OPUS-MT-models/app/models.json'
+    rate_limits = {'object.pouta.csc.fi': (4, 4)}
+
+    def __init__(self, languages=TOP_15):
+        self.languages = set(languages)
+
+    @staticmethod
+    def _iter_models(data):
+        """Yield (src, tgt, model dict) from list- or pair-keyed registries"""
+        if isinstance(data, dict):
+            data = data.get('models', data)
+        if isinstance(data, dict):
+            for key, models in data.items():
+                for model in models if isinstance(models, list) else [models]:
+                    src, _, tgt = key.partition('-')
+                    yield src, tgt, model if isinstance(model, dict) else {'url': model}
+            return
+        for model in data or []:
+            if not isinstance(model, dict):
+                continue
+            src = model.get('source') or model.get('src')
+            tgt = model.get('target') or model.get('trg') or model.get('tgt')
+            if not (src and tgt) and '-' in model.get('pair', ''):
+                src, tgt = model['pair'].split('-', 1)
+            if src and tgt:
+                yield src, tgt, model
+
+    def discover(self, prober):
+        print("📥 Fetching OPUS-MT model registry...")
+        data = prober.get_json(self.registry_url)
+        candidates = [
+            (src, tgt, model) for src, tgt, model in self._iter_models(data)
+            if src in self.languages and tgt in self.languages and (model.get('url') or model.get('download'))
+        ]
+        urls = [model.get('url') or model.get('download') for _, _, model in candidates]
+        sizes = prober.sizes(urls)
+        entries = {}
+        for (src, tgt, model), url in zip(candidates, urls):
+            pair, entry = _model_entry(src, tgt, self.name, model.get('type', 'opus-mt'),
+                                       url, sizes.get(url))
+            entries.setdefault(pair, entry)
+        return entries
+
+
+@register_source
+class BergamotStatmtSource(Source):
+    """Known-good Bergamot student models hosted on data.statmt.org"""
+
+    name = 'bergamot-statmt'
+    kind = 'translation_models'
+    priority = 2
+    base_url = 'https://data.statmt.org/bergamot/models'
+    rate_limits = {'data.statmt.org': (8, 8)}
+
+    # Known working models from our previous validation
+    KNOWN_MODELS = [
+        ('en', 'es', 'enes.student.tiny11.v1.a7203a8f8e9daea8.tar.gz', 'esen'),
+        ('es', 'en', 'esen.student.tiny11.v1.09576f06d0ad805e.tar.gz', 'esen'),
+        ('en', 'fr', 'enfr.student.tiny11.v1.805d112122af03d0.tar.gz', 'fren'),
+        ('fr', 'en', 'fren.student.tiny11.v1.dccea16d03c0a389.tar.gz', 'fren'),
+        ('en', 'de', 'ende.student.tiny11.v2.93821e13b3c511b5.tar.gz', 'deen'),
+        ('de', 'en', 'deen.student.tiny11.v2.8ebe3e43b6bb6cce.tar.gz', 'deen')
+    ]
+
+    def model_url(self, model_dir, filename):
+        return f"{self.base_url}/{model_dir}/{filename}"
+
+    def discover(self, prober):
+        print("🔍 Testing Bergamot URL patterns...")
+        urls = [self.model_url(model_dir, filename) for _, _, filename, model_dir in self.KNOWN_MODELS]
+        sizes = prober.sizes(urls)
+        entries = {}
+        for (src_lang, tgt_lang, filename, _), url in zip(self.KNOWN_MODELS, urls):
+            if sizes.get(url):
+                pair, entry = _model_entry(src_lang, tgt_lang, 'bergamot_statmt', 'tiny11',
+                                           url, sizes[url], filename=filename)
+                entries[pair] = entry
+        return entries
+
+
+def translation_models_document(results):
+    """Merge translation model sources into the legacy bergamot-scraped.json shape
+
+    Higher-priority sources win per pair (statmt direct URLs over registries).
+    """
+    merged = {}
+    for source in sorted(results, key=lambda s: s.priority):
+        merged.update(results[source])
+    sorted_results = _sort_by_size(merged)
+    return {
+        'source': 'bergamot_combined',
+        'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S UTC'),
+        'total_models_found': len(sorted_results),
+        'language_pairs_covered': len(sorted_results),
+        'translation_models': sorted_results
+    }
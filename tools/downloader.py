@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Resumable, streaming, checksum-verified artifact downloader
+Streams to a .part file in fixed-size chunks (constant memory), hashes with
+SHA-256 while writing, resumes interrupted downloads with HTTP Range
+requests guarded by If-Range (partial data is tied to the file's ETag or
+Last-Modified and discarded when it changes) and splits large files into
+parallel ranged segments when the server supports it
+
+Usage:
+    python3 downloader.py URL DEST [--sha256 HEX] [--segments N]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+CHUNK_SIZE = 1024 * 1024
+SEGMENT_THRESHOLD = 32 * 1024 * 1024
+DEFAULT_SEGMENTS = 4
+DEFAULT_RETRIES = 3
+DEFAULT_TIMEOUT = 30
+# Segment progress is flushed and saved to the .part.json after this many bytes
+STATE_INTERVAL = 8 * 1024 * 1024
+
+
+class DownloadError(Exception):
+    """Raised when a download cannot be completed or fails verification"""
+
+
+class UpstreamChanged(DownloadError):
+    """Raised when the file changed on the server while a partial copy was kept"""
+
+
+def sha256_file(path, chunk_size=CHUNK_SIZE, digest=None):
+    """Stream a file through SHA-256 (optionally continuing ``digest``)"""
+    digest = digest or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest
+
+
+def resume_validator(headers):
+    """Validator that ties partial data to one version of a file: a strong ETag, else Last-Modified"""
+    etag = headers.get('etag', '')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return headers.get('last-modified') or None
+
+
+def probe_download(session, url, timeout=DEFAULT_TIMEOUT):
+    """Return (size or None, accepts_ranges, resume validator or None) for ``url``"""
+    try:
+        response = session.head(url, timeout=timeout, allow_redirects=True)
+        response.close()
+    except requests.RequestException:
+        return None, False, None
+    if response.status_code != 200:
+        return None, False, None
+    length = response.headers.get('content-length', '')
+    size = int(length) if length.isdigit() else None
+    accepts_ranges = response.headers.get('accept-ranges', '').lower() == 'bytes'
+    return size, accepts_ranges, resume_validator(response.headers)
+
+
+def _range_start(response):
+    """First byte of a 206 response's Content-Range (None if missing or malformed)"""
+    match = re.match(r'bytes (\d+)-', response.headers.get('content-range', ''))
+    return int(match.group(1)) if match else None
+
+
+def _load_state(state):
+    try:
+        return json.loads(state.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+class Downloader:
+    """Download artifacts to disk; one instance can be shared between threads"""
+
+    def __init__(self, session=None, chunk_size=CHUNK_SIZE, segments=DEFAULT_SEGMENTS,
+                 segment_threshold=SEGMENT_THRESHOLD, retries=DEFAULT_RETRIES,
+                 timeout=DEFAULT_TIMEOUT):
+        self.session = session or requests.Session()
+        self.chunk_size = chunk_size
+        self.segments = segments
+        self.segment_threshold = segment_threshold
+        self.retries = retries
+        self.timeout = timeout
+
+    def download(self, url, dest, sha256=None):
+        """Download ``url`` to ``dest``; returns a summary dict
+
+        Partial data is kept in ``dest + '.part'`` so a later call resumes.
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        part = dest.with_name(dest.name + '.part')
+        state = dest.with_name(dest.name + '.part.json')
+
+        try:
+            digest, resumed, segmented, size = self._fetch(url, part, state)
+        except UpstreamChanged:
+            # Probe again so the restart is tied to the new version of the file
+            print(f"⚠️ {url} changed upstream; restarting")
+            part.unlink(missing_ok=True)
+            state.unlink(missing_ok=True)
+            digest, resumed, segmented, size = self._fetch(url, part, state)
+
+        if size is not None and part.stat().st_size != size:
+            raise DownloadError(f"Size mismatch for {url}: expected {size}, got {part.stat().st_size}")
+        if sha256 and digest != sha256.lower():
+            part.unlink()
+            state.unlink(missing_ok=True)
+            raise DownloadError(f"SHA-256 mismatch for {url}: expected {sha256}, got {digest}")
+
+        os.replace(part, dest)
+        state.unlink(missing_ok=True)
+        return {
+            'url': url,
+            'path': str(dest),
+            'bytes': dest.stat().st_size,
+            'sha256': digest,
+            'resumed': resumed,
+            'segments': self.segments if segmented else 1
+        }
+
+    def _fetch(self, url, part, state):
+        """Probe and download into ``part``; returns (hex digest, resumed, segmented, size)"""
+        size, accepts_ranges, validator = probe_download(self.session, url, self.timeout)
+        saved = _load_state(state) if part.exists() else {}
+        if part.exists() and (not validator or saved.get('url') != url or saved.get('validator') != validator):
+            # Partial bytes that cannot be tied to the current upstream file are discarded
+            part.unlink()
+            state.unlink(missing_ok=True)
+            saved = {}
+        segmented = (
+            accepts_ranges and size is not None and self.segments > 1
+            and size >= self.segment_threshold
+            and ('segments' in saved or not part.exists())
+        )
+        if segmented:
+            resumed = self._download_segmented(url, part, state, size, validator, saved)
+            return sha256_file(part, self.chunk_size).hexdigest(), resumed, True, size
+        if validator:
+            state.write_text(json.dumps({'url': url, 'validator': validator}))
+        digest, resumed = self._download_stream(url, part, accepts_ranges, validator)
+        return digest, resumed, False, size
+
+    def _download_stream(self, url, part, accepts_ranges, validator=None):
+        """Single-stream download with resume; returns (hex digest, resumed)"""
+        resumed = False
+        for attempt in range(self.retries + 1):
+            offset = part.stat().st_size if part.exists() else 0
+            headers = {}
+            if offset and accepts_ranges:
+                headers['Range'] = f"bytes={offset}-"
+                if validator:
+                    # The server answers 200 with the whole new file if it changed
+                    headers['If-Range'] = validator
+            try:
+                with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                    if response.status_code == 416 and offset:
+                        # The partial file is longer than the remote one: it is stale
+                        print(f"⚠️ Partial download of {url} is past the end of the file; restarting")
+                        part.unlink()
+                        continue
+                    if response.status_code not in (200, 206):
+                        raise DownloadError(f"HTTP {response.status_code} for {url}")
+                    if response.status_code == 206 and _range_start(response) != offset:
+                        print(f"⚠️ {url} answered a range that does not start at byte {offset}; restarting")
+                        part.unlink()
+                        continue
+
+                    if response.status_code == 206:
+                        digest = sha256_file(part, self.chunk_size)
+                        mode = 'ab'
+                        resumed = True
+                    else:
+                        digest = hashlib.sha256()
+                        mode = 'wb'
+                        resumed = False
+
+                    with open(part, mode) as f:
+                        for chunk in response.iter_content(self.chunk_size):
+                            f.write(chunk)
+                            digest.update(chunk)
+                    return digest.hexdigest(), resumed
+            except requests.RequestException as e:
+                if attempt == self.retries:
+                    raise DownloadError(f"Download of {url} failed after {attempt + 1} attempts: {e}")
+                print(f"⚠️ Download interrupted ({e}); resuming...")
+        raise DownloadError(f"Download of {url} did not complete after {self.retries + 1} attempts")
+
+    def _download_segmented(self, url, part, state, size, validator=None, saved=None):
+        """Parallel ranged download into a preallocated file; returns resumed flag
+
+        ``saved`` is the state of a previous attempt whose validator matched.
+        """
+        progress = None
+        if saved and part.exists() and saved.get('size') == size:
+            progress = saved.get('segments')
+        resumed = progress is not None
+
+        if progress is None:
+            step = -(-size // self.segments)
+            progress = [
+                {'start': start, 'end': min(start + step, size) - 1, 'done': 0}
+                for start in range(0, size, step)
+            ]
+            with open(part, 'wb') as f:
+                f.truncate(size)
+
+        lock = threading.Lock()
+
+        def save_state():
+            state.write_text(json.dumps({'url': url, 'size': size, 'validator': validator, 'segments': progress}))
+
+        def commit(f, segment, written):
+            # Progress is recorded only for bytes that are on disk
+            f.flush()
+            os.fsync(f.fileno())
+            with lock:
+                segment['done'] += written
+                save_state()
+
+        def fetch(segment):
+            for attempt in range(self.retries + 1):
+                start = segment['start'] + segment['done']
+                if start > segment['end']:
+                    return
+                headers = {'Range': f"bytes={start}-{segment['end']}"}
+                if validator:
+                    headers['If-Range'] = validator
+                try:
+                    with self.session.get(url, headers=headers, stream=True,
+                                          timeout=self.timeout) as response:
+                        if response.status_code == 200 and validator:
+                            raise UpstreamChanged(f"{url} changed since the partial download began")
+                        if response.status_code != 206:
+                            raise DownloadError(f"Server ignored range request for {url}")
+                        if _range_start(response) != start:
+                            raise DownloadError(f"Server answered range {start}-{segment['end']} of {url} "
+                                                f"from byte {_range_start(response)}")
+                        with open(part, 'r+b') as f:
+                            f.seek(start)
+                            remaining, written = segment['end'] - start + 1, 0
+                            try:
+                                for chunk in response.iter_content(self.chunk_size):
+                                    chunk = chunk[:remaining]
+                                    f.write(chunk)
+                                    remaining -= len(chunk)
+                                    written += len(chunk)
+                                    if written >= STATE_INTERVAL:
+                                        commit(f, segment, written)
+                                        written = 0
+                                    if not remaining:
+                                        break
+                            finally:
+                                if written:
+                                    commit(f, segment, written)
+                    if segment['start'] + segment['done'] > segment['end']:
+                        return
+                except requests.RequestException as e:
+                    if attempt == self.retries:
+                        raise DownloadError(f"Segment {start}-{segment['end']} of {url} failed: {e}")
+            raise DownloadError(f"Segment {segment['start']}-{segment['end']} of {url} ended short "
+                                f"after {self.retries + 1} attempts ({segment['done']} bytes)")
+
+        with ThreadPoolExecutor(max_workers=len(progress), thread_name_prefix='segment') as pool:
+            for future in [pool.submit(fetch, segment) for segment in progress]:
+                future.result()
+        return resumed
+
+
+def download(url, dest, sha256=None, **kwargs):
+    """One-shot helper around Downloader.download"""
+    return Downloader(**kwargs).download(url, dest, sha256=sha256)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Resumable, checksum-verified downloader')
+    parser.add_argument('url')
+    parser.add_argument('dest')
+    parser.add_argument('--sha256', help='expected SHA-256 of the file')
+    parser.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS,
+                        help='parallel ranged segments for large files')
+    args = parser.parse_args(argv)
+
+    print(f"📥 Downloading {args.url}")
+    try:
+        result = download(args.url, args.dest, sha256=args.sha256, segments=args.segments)
+    except DownloadError as e:
+        print(f"❌ {e}")
+        return 1
+    resumed = ' (resumed)' if result['resumed'] else ''
+    print(f"✅ {result['path']}: {result['bytes']} bytes in {result['segments']} segment(s){resumed}")
+    print(f"🔐 sha256 {result['sha256']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,89 +1,263 @@
 #!/usr/bin/env python3
 """
 Generate registry.json for dictionary packs
-Scans current directory for .zip and .json files and creates a registry
+Scans a directory for .zip packs and their <pack>.json metadata. Artifacts
+are hashed (SHA-256, streamed) in parallel, and every zipped SQLite pack is
+opened in place (the member is read into memory and deserialized, never
+extracted to disk) to record its real entry count, schema version, page
+size and uncompressed size. Digests and introspection results are cached
+keyed by file name, size and mtime, so regenerating an unchanged directory
+only stats the files. The cache lives in tools/.registry-cache/ (one file
+per scanned directory, or --cache), never next to the published packs.
+
+A dictionary pack whose entries cannot be counted, that has none, or whose
+definitions are compressed with a codec the app cannot decode is left out
+and reported on stderr with exit status 1: the registry never publishes
+`entries: 0`. Compressed packs record their `def_codec`.
+
+Packs collapsed by cas_store.py are listed from aliases.json: each keeps
+its own id and metadata but names the shared `file`, and every entry
+records its content-addressed `blob` name, so identical packs are stored,
+served and downloaded once.
+
+Usage:
+    python3 generate-registry.py                       # current directory, JSON to stdout
+    python3 generate-registry.py dist/packs --output dist/packs/registry.json --jobs 8
+    python3 generate-registry.py releases --cache /tmp/releases-registry-cache.json
 """
 
+import argparse
+import datetime
+import hashlib
 import json
 import os
-import glob
+import sqlite3
+import sys
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def get_file_size(filepath):
-    """Get file size in bytes"""
+from cas_store import blob_name, load_aliases
+from def_codec import APP_CODECS
+from languages import get_language_code
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / '.registry-cache'
+CACHE_VERSION = 3
+
+
+class RegistryError(Exception):
+    """Raised for a pack that cannot be published"""
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def introspect_zip(path):
+    """Entry count, schema version, page size and size of the SQLite pack inside a zip
+
+    None for zips that hold no SQLite database (e.g. translation models).
+    """
+    with zipfile.ZipFile(path) as zf:
+        member = next((info for info in zf.infolist() if info.filename.endswith('.sqlite')), None)
+        if member is None:
+            return None
+        data = zf.read(member)
+    conn = sqlite3.connect(':memory:')
     try:
-        return os.path.getsize(filepath)
-    except:
-        return 0
+        conn.deserialize(data)
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+        if 'entry' in tables and 'alias' in tables:
+            entries = conn.execute('SELECT (SELECT COUNT(*) FROM entry) + (SELECT COUNT(*) FROM alias)').fetchone()[0]
+        elif 'dict' in tables:
+            entries = conn.execute('SELECT COUNT(*) FROM dict').fetchone()[0]
+        else:
+            raise RegistryError(f"{path.name}: no dict table in {member.filename}")
+        meta = {}
+        if 'meta' in tables:
+            meta = {key: json.loads(value) for key, value in
+                    conn.execute("SELECT key, value FROM meta WHERE key IN ('lemma_norm', 'gloss_fts', 'def_codec')")}
+        return {
+            'member': member.filename,
+            'entries': entries,
+            # PRAGMA user_version as stamped: packwriter.PACK_SCHEMA_VERSION, or 0 for legacy dict-table packs
+            'schema_version': conn.execute('PRAGMA user_version').fetchone()[0],
+            'page_size': conn.execute('PRAGMA page_size').fetchone()[0],
+            'uncompressed_bytes': member.file_size,
+            'headword_language': meta.get('lemma_norm', {}).get('language'),
+            'gloss_language': meta.get('gloss_fts', {}).get('language'),
+            'def_codec': meta.get('def_codec', {}).get('codec'),
+        }
+    finally:
+        conn.close()
 
-def generate_registry():
-    """Generate registry.json from files in current directory"""
-    
-    registry = {
-        "version": "1.0",
-        "timestamp": "",
-        "packs": []
+
+def cache_path(directory):
+    """Default cache file for a scanned directory, kept out of that directory"""
+    key = hashlib.sha256(str(Path(directory).resolve()).encode('utf-8')).hexdigest()[:16]
+    return DEFAULT_CACHE_DIR / f"{key}.json"
+
+
+class RegistryCache:
+    """Digests and introspection results keyed by file name, size and mtime"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            cached = json.loads(self.path.read_text())
+            self._files = cached['files'] if cached.get('version') == CACHE_VERSION else {}
+        except (OSError, ValueError, KeyError):
+            self._files = {}
+        self._seen = {}
+        self.hits = 0
+        self.misses = 0
+
+    def describe(self, path):
+        """{'sha256', 'database'} for one artifact, from the cache when it is unchanged"""
+        stat = path.stat()
+        key = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        with self._lock:
+            entry = self._files.get(path.name)
+        if entry and entry['key'] == key:
+            with self._lock:
+                self.hits += 1
+                self._seen[path.name] = entry
+            return entry
+        entry = {'key': key, 'sha256': sha256_file(path),
+                 'database': introspect_zip(path) if path.suffix == '.zip' else None}
+        with self._lock:
+            self.misses += 1
+            self._seen[path.name] = entry
+        return entry
+
+    def save(self):
+        """Write the entries seen in this run (files that are gone drop out)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        tmp.write_text(json.dumps({'version': CACHE_VERSION, 'files': self._seen}, indent=1, sort_keys=True))
+        os.replace(tmp, self.path)
+
+
+def _pair_languages(pack_id):
+    """(source, target) as the pack id names them, e.g. ('eng', 'spa')"""
+    parts = pack_id.split('-')
+    if len(parts) == 2:
+        return parts[0], parts[1]
+    return pack_id, 'unknown'
+
+
+def _pack_id(name):
+    return name.replace('.sqlite.zip', '').replace('.zip', '')
+
+
+def pack_entry(zip_path, described, metadata, name=None):
+    """Registry record for one zip; raises RegistryError for packs that must not be published
+
+    ``name`` is the published name when it is an alias of ``zip_path``.
+    """
+    pack_id = _pack_id(name or zip_path.name)
+    database = described['database']
+    pair_source, pair_target = _pair_languages(pack_id)
+    pair_codes = (get_language_code(pair_source), get_language_code(pair_target)) if pack_id.count('-') == 1 \
+        else (None, None)
+    entry = {
+        'id': pack_id,
+        'source_language': pair_source,
+        'target_language': pair_target,
+        'name': metadata.get('name') or f"{pack_id.upper()} Dictionary",
+        'type': metadata.get('type', 'bilingual'),
+        'format': 'sqlite' if database else 'zip',
+        'file': zip_path.name,
+        'size_bytes': zip_path.stat().st_size,
+        'size_mb': round(zip_path.stat().st_size / (1024 * 1024), 1),
+        'sha256': described['sha256'],
+        'blob': blob_name(described['sha256'], zip_path.name),
     }
-    
-    # Find all .zip files in current directory
-    zip_files = glob.glob("*.zip")
-    
-    for zip_file in sorted(zip_files):
-        # Extract pack name (remove .sqlite.zip suffix)
-        pack_name = zip_file.replace('.sqlite.zip', '').replace('.zip', '')
-        
-        # Look for corresponding .json metadata file
-        json_file = f"{pack_name}.json"
-        metadata = {}
-        
-        if os.path.exists(json_file):
+    if database:
+        if database['entries'] <= 0:
+            raise RegistryError(f"{zip_path.name}: {database['member']} has no entries")
+        if database['def_codec'] not in (None,) + APP_CODECS:
+            raise RegistryError(f"{zip_path.name}: the app cannot decode {database['def_codec']} definitions")
+        # What the pack itself records about its headwords and glosses (ISO 639-1), next to the id's languages
+        lemma_norm = metadata.get('lemma_norm') or {}
+        entry['headword_language'] = database['headword_language'] or lemma_norm.get('language') or pair_codes[0]
+        entry['gloss_language'] = database['gloss_language'] or metadata.get('gloss_language') or pair_codes[1]
+        for key in ('entries', 'schema_version', 'page_size', 'uncompressed_bytes'):
+            entry[key] = database[key]
+        # Lets the app skip packs whose definitions it cannot decode
+        if database['def_codec']:
+            entry['def_codec'] = database['def_codec']
+    elif entry['type'] == 'bilingual':
+        raise RegistryError(f"{zip_path.name}: no SQLite database inside")
+    entry['source'] = metadata.get('source', 'Wiktionary')
+    entry['version'] = metadata.get('version', '1.0')
+    entry['description'] = metadata.get('description') or f"{entry['type'].capitalize()} pack {pack_id}"
+    # Row-level changeset from the previous release (see pack_delta.py)
+    if metadata.get('delta'):
+        entry['delta'] = metadata['delta']
+    return entry
+
+
+def _metadata(zip_path, name=None):
+    meta_path = zip_path.with_name(_pack_id(name or zip_path.name) + '.json')
+    try:
+        return json.loads(meta_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def generate_registry(directory='.', jobs=None, cache=None):
+    """Registry dict for every zip in ``directory``; returns (registry, [problems])"""
+    directory = Path(directory)
+    cache = cache or RegistryCache(cache_path(directory))
+    zips = sorted(directory.glob('*.zip'))
+    aliases = {name: directory / alias['file'] for name, alias in load_aliases(directory).items()
+               if name.endswith('.zip') and not (directory / name).exists() and (directory / alias['file']).exists()}
+    published = sorted([(path.name, path) for path in zips] + list(aliases.items()))
+    with ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) * 2)) as pool:
+        described = {path: pool.submit(cache.describe, path) for path in zips}
+        packs, problems = [], []
+        for name, path in published:
             try:
-                with open(json_file, 'r') as f:
-                    metadata = json.load(f)
-            except:
-                pass
-        
-        # Get file size
-        size_bytes = get_file_size(zip_file)
-        size_mb = round(size_bytes / (1024 * 1024), 1)
-        
-        # Determine languages from pack name
-        if '-' in pack_name:
-            parts = pack_name.split('-')
-            if len(parts) == 2:
-                source_lang = parts[0]
-                target_lang = parts[1]
-            else:
-                source_lang = pack_name
-                target_lang = "unknown"
-        else:
-            source_lang = pack_name
-            target_lang = "unknown"
-        
-        pack_entry = {
-            "id": pack_name,
-            "name": f"{source_lang.upper()}-{target_lang.upper()} Dictionary",
-            "source_language": source_lang,
-            "target_language": target_lang,
-            "type": "bilingual",
-            "format": "sqlite",
-            "file": zip_file,
-            "size_bytes": size_bytes,
-            "size_mb": size_mb,
-            "entries": metadata.get("entries", 0),
-            "source": metadata.get("source", "Wiktionary"),
-            "version": metadata.get("version", "1.0"),
-            "description": metadata.get("description", f"Bilingual dictionary for {source_lang} to {target_lang} translation")
-        }
-        
-        registry["packs"].append(pack_entry)
-    
-    # Set timestamp
-    import datetime
-    registry["timestamp"] = datetime.datetime.utcnow().isoformat() + "Z"
-    
-    return registry
+                packs.append(pack_entry(path, described[path].result(), _metadata(path, name), name))
+            except (RegistryError, zipfile.BadZipFile, sqlite3.Error, OSError) as e:
+                problems.append(str(e) if isinstance(e, RegistryError) else f"{name}: {e}")
+    cache.save()
+    registry = {
+        'version': '1.0',
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat().replace('+00:00', 'Z'),
+        'packs': packs,
+    }
+    return registry, problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate registry.json for the packs in a directory')
+    parser.add_argument('directory', nargs='?', default='.')
+    parser.add_argument('--output', help='write the registry here instead of stdout')
+    parser.add_argument('--jobs', type=int, help='parallel hashing threads')
+    parser.add_argument('--cache', help='digest cache file (default: one per directory under tools/.registry-cache/)')
+    args = parser.parse_args(argv)
+
+    cache = RegistryCache(args.cache or cache_path(args.directory))
+    registry, problems = generate_registry(args.directory, args.jobs, cache)
+    text = json.dumps(registry, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+    for problem in problems:
+        print(f"❌ Left out {problem}", file=sys.stderr)
+    print(f"📄 {len(registry['packs'])} pack(s): {cache.misses} hashed, {cache.hits} unchanged", file=sys.stderr)
+    return 1 if problems else 0
+
 
 if __name__ == "__main__":
-    registry = generate_registry()
-    print(json.dumps(registry, indent=2, ensure_ascii=False))
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Full-text index over definition glosses
+An optional pack stage: definitions are stripped of markup and indexed in a
+contentless FTS5 table `gloss` whose rowid is the entry id, so reverse
+lookups ("Spanish entries whose gloss contains 'house'") are an index
+query instead of a scan of the `def` HTML. The tokenizer follows the
+language the glosses are written in and is recorded in the pack's `meta`
+table ('gloss_fts') so the app builds matching queries.
+
+Usage:
+    python3 gloss_index.py PACK.sqlite "house"     # reverse lookup
+"""
+
+import argparse
+import html
+import json
+import re
+import sqlite3
+import sys
+
+from def_codec import load_codec
+
+GLOSS_VERSION = 1
+
+# Scripts written without spaces between words: match on trigrams
+TRIGRAM_LANGUAGES = {'zh', 'ja', 'th', 'lo', 'km', 'my'}
+
+_TAG = re.compile(r'<[^>]*>')
+_SPACE = re.compile(r'\s+')
+
+
+def tokenizer_for(language=None):
+    """FTS5 tokenizer for glosses written in ``language`` (ISO 639-1)"""
+    if language in TRIGRAM_LANGUAGES:
+        return 'trigram'
+    if language == 'en':
+        # Stemmed, so "houses" finds "house"
+        return 'porter unicode61 remove_diacritics 2'
+    return 'unicode61 remove_diacritics 2'
+
+
+def spec(language=None):
+    return {'version': GLOSS_VERSION, 'language': language, 'tokenizer': tokenizer_for(language)}
+
+
+def gloss_text(definition):
+    """Plain text of a definition: tags dropped, entities decoded, whitespace collapsed"""
+    text = html.unescape(_TAG.sub(' ', definition))
+    return _SPACE.sub(' ', text).strip()
+
+
+def create_sql(language=None):
+    tokenizer = tokenizer_for(language).replace("'", "''")
+    return f"CREATE VIRTUAL TABLE gloss USING fts5 (text, content='', tokenize='{tokenizer}')"
+
+
+def index_bytes(conn):
+    """Bytes the gloss index and its shadow tables occupy in the pack"""
+    try:
+        return conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'gloss%'").fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        # SQLite built without dbstat: the index segments are nearly all of it
+        return conn.execute('SELECT SUM(LENGTH(block)) FROM gloss_data').fetchone()[0] or 0
+
+
+def match_query(text, tokenizer=''):
+    """FTS5 MATCH expression for user input
+
+    Word tokenizers need every word (quoted); trigram indexes match the
+    whole input as a substring, which takes at least three characters.
+    """
+    if tokenizer == 'trigram':
+        text = text.strip()
+        return '"' + text.replace('"', '""') + '"' if len(text) >= 3 else ''
+    return ' '.join('"' + word + '"' for word in re.findall(r'\w+', text))
+
+
+def search(conn, text, limit=20):
+    """Best-ranked (lemma, def) rows whose gloss matches ``text``"""
+    gloss = json.loads(conn.execute("SELECT value FROM meta WHERE key = 'gloss_fts'").fetchone()[0])
+    query = match_query(text, gloss['tokenizer'])
+    if not query:
+        return []
+    return conn.execute('SELECT entry.lemma, entry.def FROM gloss JOIN entry ON entry.id = gloss.rowid '
+                        'WHERE gloss MATCH ? ORDER BY rank LIMIT ?', (query, limit)).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Search the definitions of a pack built with a gloss index')
+    parser.add_argument('pack')
+    parser.add_argument('query')
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(f"file:{args.pack}?mode=ro", uri=True)
+    try:
+        codec = load_codec(conn)
+        rows = search(conn, args.query, args.limit)
+    except (sqlite3.OperationalError, TypeError) as e:
+        print(f"❌ {args.pack} has no gloss index ({e})")
+        return 1
+    finally:
+        conn.close()
+    for lemma, definition in rows:
+        definition = codec.decode(definition) if codec else definition
+        print(f"📖 {lemma}: {gloss_text(definition)[:100]}")
+    print(f"🔎 {len(rows)} match(es) for {args.query!r}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
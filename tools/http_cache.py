@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP validator cache for the discovery scrapers
+Stores ETag, Last-Modified, content length and bodies in an on-disk SQLite
+file so repeat runs revalidate with conditional requests (304) instead of
+re-downloading registries and re-probing artifacts. 404 and 410 answers are
+cached too, so dead URLs are not re-fetched on every run
+
+Configuration (environment):
+    POLYBOOK_HTTP_CACHE      cache file path, or "off" to disable caching
+    POLYBOOK_HTTP_CACHE_TTL  seconds an entry is served without revalidation
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent / '.http-cache' / 'cache.sqlite'
+DEFAULT_TTL = 6 * 60 * 60
+
+
+class CachedResponse:
+    """Minimal response object returned by HttpCache (cached or live)"""
+
+    def __init__(self, url, status_code, headers, content, from_cache=False, revalidated=False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = {k.lower(): v for k, v in headers.items()}
+        self.content = content
+        self.from_cache = from_cache
+        self.revalidated = revalidated
+
+    @property
+    def ok(self):
+        return self.status_code == 200
+
+    @property
+    def content_length(self):
+        value = self.headers.get('content-length')
+        return int(value) if value and value.isdigit() else None
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"HTTP {self.status_code} for {self.url}", response=self)
+
+
+class HttpCache:
+    """On-disk cache of HTTP validators and bodies keyed by (method, url)
+
+    Entries younger than ``ttl`` are served without touching the network.
+    Older entries are revalidated with If-None-Match / If-Modified-Since;
+    a 304 refreshes the entry (and its validators), anything else replaces it.
+    """
+
+    _VALIDATOR_HEADERS = ('etag', 'last-modified', 'cache-control', 'content-length', 'content-type')
+    # Headers a 304 may update on the stored entry (it describes the same body)
+    _REVALIDATED_HEADERS = ('etag', 'last-modified', 'cache-control')
+    # Statuses worth remembering: the document, or a definite "not there"
+    _CACHED_STATUSES = (200, 404, 410)
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS http_cache (
+                method TEXT NOT NULL,
+                url TEXT NOT NULL,
+                final_url TEXT,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (method, url)
+            )
+        ''')
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _load(self, method, url):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT final_url, status, headers, body, stored_at FROM http_cache '
+                'WHERE method = ? AND url = ?', (method, url)).fetchone()
+        if row is None:
+            return None
+        final_url, status, headers, body, stored_at = row
+        return {
+            'final_url': final_url,
+            'status': status,
+            'headers': json.loads(headers),
+            'body': body or b'',
+            'stored_at': stored_at
+        }
+
+    def _store(self, method, url, final_url, status, headers, body):
+        kept = {k.lower(): v for k, v in headers.items() if k.lower() in self._VALIDATOR_HEADERS}
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO http_cache '
+                '(method, url, final_url, status, headers, body, stored_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (method, url, final_url, status, json.dumps(kept), body, time.time()))
+            self._conn.commit()
+
+    def _refresh(self, method, url, headers):
+        with self._lock:
+            self._conn.execute('UPDATE http_cache SET headers = ?, stored_at = ? WHERE method = ? AND url = ?',
+                               (json.dumps(headers), time.time(), method, url))
+            self._conn.commit()
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def request(self, session, method, url, timeout=30):
+        """Perform a (possibly conditional) request through ``session``"""
+        method = method.upper()
+        entry = self._load(method, url)
+
+        if entry and time.time() - entry['stored_at'] < self.ttl:
+            self._count('hits')
+            return CachedResponse(entry['final_url'] or url, entry['status'],
+                                  entry['headers'], entry['body'], from_cache=True)
+
+        conditional = {}
+        if entry:
+            headers = {k.lower(): v for k, v in entry['headers'].items()}
+            if headers.get('etag'):
+                conditional['If-None-Match'] = headers['etag']
+            if headers.get('last-modified'):
+                conditional['If-Modified-Since'] = headers['last-modified']
+
+        response = session.request(method, url, headers=conditional, timeout=timeout,
+                                   allow_redirects=True)
+        try:
+            if response.status_code == 304 and entry:
+                self._count('revalidations')
+                headers = {k.lower(): v for k, v in entry['headers'].items()}
+                headers.update((k.lower(), v) for k, v in response.headers.items()
+                               if k.lower() in self._REVALIDATED_HEADERS)
+                self._refresh(method, url, headers)
+                return CachedResponse(entry['final_url'] or url, entry['status'],
+                                      headers, entry['body'],
+                                      from_cache=True, revalidated=True)
+
+            self._count('misses')
+            body = response.content if method == 'GET' else b''
+            if response.status_code in self._CACHED_STATUSES:
+                self._store(method, url, response.url, response.status_code,
+                            dict(response.headers), body)
+            return CachedResponse(response.url, response.status_code,
+                                  dict(response.headers), body)
+        finally:
+            response.close()
+
+    def get(self, session, url, timeout=30):
+        return self.request(session, 'GET', url, timeout=timeout)
+
+    def head(self, session, url, timeout=10):
+        return self.request(session, 'HEAD', url, timeout=timeout)
+
+    def get_json(self, session, url, timeout=30):
+        """GET a JSON document through the cache, raising on non-200"""
+        response = self.get(session, url, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def stats(self):
+        return {'hits': self.hits, 'revalidated': self.revalidations, 'fetched': self.misses}
+
+
+def cache_from_env():
+    """Build the cache configured by POLYBOOK_HTTP_CACHE[_TTL], or None if disabled"""
+    path = os.environ.get('POLYBOOK_HTTP_CACHE', str(DEFAULT_CACHE_PATH))
+    if path.lower() in ('off', '0', 'false', 'no'):
+        return None
+    ttl = float(os.environ.get('POLYBOOK_HTTP_CACHE_TTL', DEFAULT_TTL))
+    return HttpCache(path, ttl=ttl)
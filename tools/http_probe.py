@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Concurrent, connection-pooled URL prober shared by the discovery scrapers
+Sends HEAD requests from a thread pool over one keep-alive session, capping
+in-flight requests globally and per host, with an optional token-bucket
+rate limit per host. When given an HttpCache, probes and JSON fetches
+become conditional requests against stored validators
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_PER_HOST = 4
+DEFAULT_TIMEOUT = 10
+
+
+def make_session(per_host=DEFAULT_PER_HOST, max_hosts=32):
+    """Create a requests session whose connection pool is sized for the prober"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=per_host)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, up to ``burst`` banked"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until it is available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now (may go negative) so waiters queue fairly
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class UrlProber:
+    """Probe many URLs concurrently, reusing connections per host
+
+    Results are plain dicts:
+        {'url', 'ok', 'status', 'size_bytes', 'final_url', 'error'}
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, per_host=DEFAULT_PER_HOST,
+                 timeout=DEFAULT_TIMEOUT, session=None, cache=None, rate_limits=None):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.cache = cache
+        self._buckets = {}
+        for host, (rate, burst) in (rate_limits or {}).items():
+            self.set_rate_limit(host, rate, burst)
+        self.session = session or make_session(per_host=per_host)
+        self._owns_session = session is None
+        self._in_flight = threading.BoundedSemaphore(max_workers)
+        self._host_slots = {}
+        self._host_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='probe')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Shut down worker threads and release pooled connections"""
+        self._executor.shutdown(wait=True)
+        if self._owns_session:
+            self.session.close()
+
+    def set_rate_limit(self, host, rate, burst=1):
+        """Limit requests to ``host`` to ``rate`` per second (bursts of ``burst``)"""
+        self._buckets[host.lower()] = TokenBucket(rate, burst)
+
+    def _throttle(self, url):
+        bucket = self._buckets.get(urlsplit(url).netloc.lower())
+        if bucket is not None:
+            bucket.acquire()
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._host_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host)
+                self._host_slots[host] = slot
+            return slot
+
+    def head(self, url):
+        """Probe a single URL (blocking) and return its result dict"""
+        result = {
+            'url': url,
+            'ok': False,
+            'status': None,
+            'size_bytes': None,
+            'final_url': None,
+            'error': None
+        }
+        self._throttle(url)
+        with self._in_flight, self._host_slot(url):
+            try:
+                if self.cache is not None:
+                    response = self.cache.head(self.session, url, timeout=self.timeout)
+                else:
+                    response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+                    response.close()
+            except requests.RequestException as e:
+                result['error'] = str(e)
+                return result
+
+        result['status'] = response.status_code
+        result['final_url'] = response.url
+        result['ok'] = response.status_code == 200
+        content_length = response.headers.get('content-length')
+        if result['ok'] and content_length and content_length.isdigit():
+            result['size_bytes'] = int(content_length)
+        return result
+
+    def get_json(self, url, timeout=30):
+        """GET a JSON document over the shared session (through the cache if set)"""
+        self._throttle(url)
+        with self._in_flight, self._host_slot(url):
+            if self.cache is not None:
+                return self.cache.get_json(self.session, url, timeout=timeout)
+            response = self.session.get(url, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+
+    def probe_many(self, urls):
+        """Probe all URLs concurrently; returns {url: result} in input order"""
+        unique = list(dict.fromkeys(urls))
+        futures = [(url, self._executor.submit(self.head, url)) for url in unique]
+        return {url: future.result() for url, future in futures}
+
+    def sizes(self, urls):
+        """Probe all URLs concurrently; returns {url: size_bytes or None}"""
+        return {url: result['size_bytes'] for url, result in self.probe_many(urls).items()}
+
+
+def probe_sizes(urls, **kwargs):
+    """One-shot helper: HEAD every URL concurrently and return {url: size or None}"""
+    with UrlProber(**kwargs) as prober:
+        return prober.sizes(urls)
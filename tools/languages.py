@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Shared language table for the discovery tools
+One place for ISO 639-1/639-3 codes, display names and the language names
+used in Wiktionary archive filenames
+"""
+
+# (ISO 639-1, ISO 639-3, display name), ordered by priority for language learners
+LANGUAGES = [
+    # Top 10 core languages
+    ('en', 'eng', 'English'),
+    ('es', 'spa', 'Spanish'),
+    ('fr', 'fra', 'French'),
+    ('de', 'deu', 'German'),
+    ('it', 'ita', 'Italian'),
+    ('pt', 'por', 'Portuguese'),
+    ('ru', 'rus', 'Russian'),
+    ('zh', 'zho', 'Chinese'),
+    ('ja', 'jpn', 'Japanese'),
+    ('ko', 'kor', 'Korean'),
+    ('ar', 'ara', 'Arabic'),
+    ('hi', 'hin', 'Hindi'),
+
+    # Additional valuable languages for language learners
+    ('nl', 'nld', 'Dutch'),
+    ('pl', 'pol', 'Polish'),
+    ('tr', 'tur', 'Turkish'),
+    ('el', 'ell', 'Greek'),
+    ('cs', 'ces', 'Czech'),
+    ('hu', 'hun', 'Hungarian'),
+    ('fi', 'fin', 'Finnish'),
+    ('sv', 'swe', 'Swedish'),
+    ('no', 'nor', 'Norwegian'),
+    ('da', 'dan', 'Danish'),
+    ('uk', 'ukr', 'Ukrainian'),
+    ('bg', 'bul', 'Bulgarian'),
+    ('ro', 'ron', 'Romanian'),
+    ('sr', 'srp', 'Serbian'),
+    ('hr', 'hrv', 'Croatian'),
+    ('sl', 'slv', 'Slovenian'),
+    ('sk', 'slk', 'Slovak'),
+    ('lt', 'lit', 'Lithuanian'),
+    ('lv', 'lav', 'Latvian'),
+    ('et', 'est', 'Estonian'),
+
+    # Asian languages
+    ('vi', 'vie', 'Vietnamese'),
+    ('th', 'tha', 'Thai'),
+    ('id', 'ind', 'Indonesian'),
+    ('ms', 'msa', 'Malay'),
+    ('tl', 'tgl', 'Tagalog'),
+    ('bn', 'ben', 'Bengali'),
+    ('ta', 'tam', 'Tamil'),
+    ('te', 'tel', 'Telugu'),
+    ('gu', 'guj', 'Gujarati'),
+    ('mr', 'mar', 'Marathi'),
+    ('kn', 'kan', 'Kannada'),
+    ('ml', 'mal', 'Malayalam'),
+    ('pa', 'pan', 'Punjabi'),
+    ('ur', 'urd', 'Urdu'),
+    ('fa', 'fas', 'Persian'),
+    ('he', 'heb', 'Hebrew'),
+
+    # Classical/Academic languages
+    ('la', 'lat', 'Latin'),
+    ('eo', 'epo', 'Esperanto'),
+]
+
+# Extra spellings seen in source filenames / registries
+_ALIASES = {
+    'mandarin': 'zh',
+    'chn': 'zh',
+}
+
+NAMES = {code: name for code, _, name in LANGUAGES}
+ISO3_TO_ISO1 = {iso3: code for code, iso3, _ in LANGUAGES}
+ISO1_TO_ISO3 = {code: iso3 for code, iso3, _ in LANGUAGES}
+NAME_TO_CODE = dict({name.lower(): code for code, _, name in LANGUAGES}, **_ALIASES)
+
+TOP_7 = ['en', 'es', 'fr', 'de', 'it', 'pt', 'ru']
+TOP_10 = TOP_7 + ['zh', 'ja', 'ko']
+TOP_15 = ['en', 'es', 'fr', 'de', 'it', 'pt', 'ru', 'ar', 'hi', 'zh', 'ja', 'ko', 'nl', 'pl', 'tr']
+ALL = [code for code, _, _ in LANGUAGES]
+
+
+def get_language_code(language):
+    """Convert a language name or ISO 639-3 code to our 2-letter app code"""
+    key = language.lower()
+    if key in NAME_TO_CODE:
+        return NAME_TO_CODE[key]
+    if key in ISO3_TO_ISO1:
+        return ISO3_TO_ISO1[key]
+    if key in NAMES:
+        return key
+    return key[:2]
+
+
+def language_name(code):
+    """Display name for a 2-letter code (falls back to the code itself)"""
+    return NAMES.get(code, code)
+
+
+def names_for(codes):
+    """{lowercase language name: display name} for the given codes, aliases included"""
+    wanted = set(codes)
+    return {name: NAMES[code] for name, code in NAME_TO_CODE.items() if code in wanted}
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Lookup-key normalization for dictionary lemmas
+Packs carry a `lemma_norm` column built with these rules and store the
+rules themselves (as JSON in the pack's `meta` table) so the app can
+normalize query keys exactly the same way and probe the lemma_norm index
+instead of scanning with COLLATE NOCASE.
+
+The steps are plain enough to reproduce in JavaScript: NFD, drop the
+language's stripped combining marks, lower(), apply the extra case folds,
+NFC.
+"""
+
+import json
+import unicodedata
+
+NORM_VERSION = 1
+
+# Case folds that lower() (and JS toLowerCase) leave out
+FOLDS = {'ß': 'ss', 'ς': 'σ', 'ſ': 's'}
+
+# Combining marks readers leave out when typing or that books omit:
+# Cyrillic stress accents, Arabic harakat, Hebrew niqqud
+_STRESS = '\u0300\u0301'
+_HARAKAT = ''.join(chr(c) for c in range(0x064B, 0x0653)) + '\u0670'
+_NIQQUD = ''.join(chr(c) for c in range(0x0591, 0x05C8) if unicodedata.category(chr(c)) == 'Mn')
+STRIP_MARKS = {
+    'ru': _STRESS,
+    'uk': _STRESS,
+    'be': _STRESS,
+    'bg': _STRESS,
+    'ar': _HARAKAT,
+    'fa': _HARAKAT,
+    'ur': _HARAKAT,
+    'he': _NIQQUD,
+}
+
+
+def rules_for(language=None, strip_marks=None):
+    """Normalization rules for a lemma language (ISO 639-1); JSON-serializable
+
+    ``strip_marks`` overrides the language's default set of stripped
+    combining marks ('' keeps every diacritic).
+    """
+    if strip_marks is None:
+        strip_marks = STRIP_MARKS.get(language, '')
+    return {
+        'version': NORM_VERSION,
+        'language': language,
+        'strip_marks': strip_marks,
+        'folds': dict(FOLDS),
+    }
+
+
+def normalizer(rules):
+    """A fast normalize(text) function for one set of rules"""
+    strip = {ord(mark): None for mark in rules.get('strip_marks', '')}
+    folds = list(rules.get('folds', {}).items())
+
+    def normalize(text):
+        text = unicodedata.normalize('NFD', text)
+        if strip:
+            text = text.translate(strip)
+        text = text.lower()
+        for source, target in folds:
+            if source in text:
+                text = text.replace(source, target)
+        return unicodedata.normalize('NFC', text).strip()
+
+    return normalize
+
+
+def normalize(text, rules=None):
+    """Normalize one lookup key (default rules: case folding only)"""
+    return normalizer(rules or rules_for())(text)
+
+
+def rules_json(rules):
+    return json.dumps(rules, ensure_ascii=False, sort_keys=True)
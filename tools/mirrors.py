@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Hedged multi-mirror fetching for dictionary sources
+Takes a ranked list of mirror URLs for one artifact, starts the best-known
+mirror first and launches a hedged request on the next one when the first
+is slow to deliver bytes. Whichever mirror reaches the probe threshold first
+wins; its partial file is handed to the resumable downloader (downloader.py),
+which finishes it with a Range request tied to the validator the racer saw.
+An interrupted download therefore resumes on the next run instead of racing
+from byte 0. Per-mirror throughput is remembered in a JSON stats file so
+later runs start with the fastest mirror.
+
+Only URLs serving byte-identical content count as mirrors of an artifact.
+
+Usage:
+    python3 mirrors.py DEST URL [URL ...] [--sha256 HEX]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+
+from downloader import CHUNK_SIZE, DownloadError, Downloader, resume_validator
+
+DEFAULT_STATS_PATH = Path(__file__).resolve().parent / '.mirror-stats.json'
+HEDGE_AFTER = 2.0
+PROBE_BYTES = 256 * 1024
+EWMA_WEIGHT = 0.3
+
+_GITHUB_RAW = re.compile(r'^https://github\.com/([^/]+)/([^/]+)/raw/([^/]+)/(.+)$')
+_RAW_GITHUBUSERCONTENT = re.compile(r'^https://raw\.githubusercontent\.com/([^/]+)/([^/]+)/([^/]+)/(.+)$')
+
+
+def expand_mirrors(urls):
+    """Add the equivalent github.com/raw <-> raw.githubusercontent.com URLs"""
+    expanded = []
+    for url in urls:
+        expanded.append(url)
+        match = _GITHUB_RAW.match(url)
+        if match:
+            expanded.append('https://raw.githubusercontent.com/{}/{}/{}/{}'.format(*match.groups()))
+        match = _RAW_GITHUBUSERCONTENT.match(url)
+        if match:
+            expanded.append('https://github.com/{}/{}/raw/{}/{}'.format(*match.groups()))
+    return list(dict.fromkeys(expanded))
+
+
+class MirrorStats:
+    """Persistent per-mirror-host throughput (EWMA, bytes/s) and failure counts
+
+    Share one instance between concurrent fetches: each instance rewrites
+    the whole file, so separate ones would drop each other's samples.
+    """
+
+    def __init__(self, path=DEFAULT_STATS_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            self.hosts = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.hosts = {}
+
+    @staticmethod
+    def key(url):
+        return urlsplit(url).netloc.lower()
+
+    def throughput(self, url):
+        return self.hosts.get(self.key(url), {}).get('throughput')
+
+    def record(self, url, nbytes, seconds):
+        if nbytes <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            host = self.hosts.setdefault(self.key(url), {'throughput': None, 'samples': 0, 'failures': 0})
+            sample = nbytes / seconds
+            previous = host['throughput']
+            host['throughput'] = sample if previous is None else (
+                EWMA_WEIGHT * sample + (1 - EWMA_WEIGHT) * previous)
+            host['samples'] += 1
+
+    def record_failure(self, url):
+        with self._lock:
+            host = self.hosts.setdefault(self.key(url), {'throughput': None, 'samples': 0, 'failures': 0})
+            host['failures'] += 1
+            if host['throughput']:
+                host['throughput'] *= 0.5
+
+    def rank(self, urls):
+        """Order mirrors by remembered throughput; unmeasured ones keep their given rank"""
+        measured = sorted((u for u in urls if self.throughput(u)), key=self.throughput, reverse=True)
+        return measured + [u for u in urls if not self.throughput(u)]
+
+    def save(self):
+        with self._lock:
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            tmp.write_text(json.dumps(self.hosts, indent=2, sort_keys=True))
+            os.replace(tmp, self.path)
+
+
+class _Racer(threading.Thread):
+    """Streams one mirror into its own .part file until the race is decided"""
+
+    def __init__(self, fetcher, url, part, race):
+        super().__init__(daemon=True)
+        self.fetcher = fetcher
+        self.url = url
+        self.part = part
+        self.race = race
+        self.error = None
+        self.response = None
+        self.bytes = 0
+        self.complete = False
+        self.validator = None
+        self.digest = hashlib.sha256()
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    def run(self):
+        try:
+            with self.fetcher.session.get(self.url, stream=True, timeout=self.fetcher.timeout) as response:
+                self.response = response
+                if response.status_code != 200:
+                    raise DownloadError(f"HTTP {response.status_code} for {self.url}")
+                self.validator = resume_validator(response.headers)
+                with open(self.part, 'wb') as f:
+                    for chunk in response.iter_content(self.fetcher.chunk_size):
+                        if self.race.lost(self):
+                            return
+                        f.write(chunk)
+                        self.digest.update(chunk)
+                        self.bytes += len(chunk)
+                        if self.bytes >= self.fetcher.probe_bytes:
+                            # The winner's remaining bytes come through the resumable downloader
+                            self.race.claim(self)
+                            return
+            self.complete = True
+            self.race.claim(self)
+        except Exception as e:
+            # A cancelled loser may fail in odd ways once its socket is closed
+            if not self.race.lost(self):
+                self.error = e
+        finally:
+            self.elapsed = time.monotonic() - self.started
+            if self.race.lost(self) or self.error:
+                Path(self.part).unlink(missing_ok=True)
+            self.race.finished(self)
+
+    def cancel(self):
+        """Close a losing racer's connection so its thread unblocks promptly"""
+        if self.response is not None:
+            try:
+                self.response.close()
+            except Exception:
+                pass
+
+
+class _Race:
+    def __init__(self):
+        self.winner = None
+        self.changed = threading.Condition()
+
+    def claim(self, racer):
+        with self.changed:
+            if self.winner is None:
+                self.winner = racer
+            self.changed.notify_all()
+
+    def lost(self, racer):
+        return self.winner is not None and self.winner is not racer
+
+    def finished(self, racer):
+        with self.changed:
+            self.changed.notify_all()
+
+
+class HedgedFetcher:
+    """Fetch one artifact from the fastest of several byte-identical mirrors"""
+
+    def __init__(self, session=None, stats=None, hedge_after=HEDGE_AFTER,
+                 probe_bytes=PROBE_BYTES, chunk_size=CHUNK_SIZE, timeout=30):
+        self.session = session or requests.Session()
+        self.stats = stats if stats is not None else MirrorStats()
+        self.hedge_after = hedge_after
+        self.probe_bytes = probe_bytes
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.downloader = Downloader(session=self.session, chunk_size=chunk_size, timeout=timeout)
+
+    def fetch(self, mirrors, dest, sha256=None):
+        """Download ``dest`` from ``mirrors`` (best first); returns a summary dict"""
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        ranked = self.stats.rank(list(dict.fromkeys(mirrors)))
+        if not ranked:
+            raise DownloadError("No mirrors given")
+        interrupted = self._interrupted_url(dest)
+        if interrupted in ranked:
+            # Resume the earlier run's partial file rather than race from byte 0
+            return self._fallback([interrupted] + [url for url in ranked if url != interrupted], dest, sha256, [])
+
+        race = _Race()
+        racers = []
+        pending = list(ranked)
+        with race.changed:
+            while race.winner is None:
+                alive = [r for r in racers if r.is_alive()]
+                if pending and (not alive or self._should_hedge(racers)):
+                    racer = _Racer(self, pending.pop(0), dest.with_name(f"{dest.name}.part{len(racers)}"), race)
+                    racers.append(racer)
+                    racer.start()
+                    continue
+                if not alive:
+                    break
+                race.changed.wait(timeout=self.hedge_after if pending else None)
+
+        for racer in racers:
+            if racer is race.winner:
+                continue
+            # Losers clean up after themselves; only their numbers are kept
+            racer.cancel()
+            if racer.error:
+                self.stats.record_failure(racer.url)
+            elif racer.bytes:
+                self.stats.record(racer.url, racer.bytes, time.monotonic() - racer.started)
+
+        winner = race.winner
+        if winner is not None:
+            winner.join()
+        if winner is None or winner.error:
+            if winner is not None:
+                self.stats.record_failure(winner.url)
+            self.stats.save()
+            return self._fallback(ranked, dest, sha256, racers)
+
+        others = [url for url in ranked if url != winner.url]
+        if winner.complete:
+            nbytes, digest = winner.bytes, winner.digest.hexdigest()
+            if sha256 and digest != sha256.lower():
+                # A mirror serving other bytes is dropped; the rest are tried in order
+                Path(winner.part).unlink(missing_ok=True)
+                self.stats.record_failure(winner.url)
+                self.stats.save()
+                mismatch = f"{winner.url}: SHA-256 mismatch: expected {sha256}, got {digest}"
+                return self._fallback(others, dest, sha256, racers, [mismatch])
+            os.replace(winner.part, dest)
+        else:
+            try:
+                nbytes, digest = self._finish(winner, dest, sha256)
+            except DownloadError as e:
+                self.stats.record_failure(winner.url)
+                self.stats.save()
+                return self._fallback(others, dest, sha256, racers, [f"{winner.url}: {e}"])
+
+        seconds = time.monotonic() - winner.started
+        self.stats.record(winner.url, nbytes, seconds)
+        self.stats.save()
+        return {
+            'url': winner.url,
+            'path': str(dest),
+            'bytes': nbytes,
+            'sha256': digest,
+            'mirrors_tried': [r.url for r in racers],
+            'seconds': round(seconds, 3)
+        }
+
+    @staticmethod
+    def _interrupted_url(dest):
+        """Mirror an earlier run's resumable partial download of ``dest`` came from, if any"""
+        if not dest.with_name(dest.name + '.part').exists():
+            return None
+        try:
+            return json.loads(dest.with_name(dest.name + '.part.json').read_text()).get('url')
+        except (OSError, ValueError):
+            return None
+
+    def _finish(self, winner, dest, sha256):
+        """Hand the winner's partial file to the resumable downloader; returns (bytes, hex digest)
+
+        The state file ties the bytes to the validator the racer saw, so the
+        downloader continues them with If-Range (or restarts if the file changed).
+        """
+        os.replace(winner.part, dest.with_name(dest.name + '.part'))
+        if winner.validator:
+            state = {'url': winner.url, 'validator': winner.validator}
+            dest.with_name(dest.name + '.part.json').write_text(json.dumps(state))
+        result = self.downloader.download(winner.url, dest, sha256=sha256)
+        return result['bytes'], result['sha256']
+
+    def _should_hedge(self, racers):
+        """Hedge when the newest racer has gone hedge_after without winning"""
+        newest = racers[-1]
+        return not newest.is_alive() or time.monotonic() - newest.started >= self.hedge_after
+
+    def _fallback(self, ranked, dest, sha256, racers, errors=()):
+        """Download from mirrors in order with the resumable downloader (no racing)"""
+        errors = list(errors) + [f"{r.url}: {r.error}" for r in racers if r.error]
+        for url in ranked:
+            try:
+                result = self.downloader.download(url, dest, sha256=sha256)
+                result['mirrors_tried'] = [r.url for r in racers] + [url]
+                return result
+            except DownloadError as e:
+                self.stats.record_failure(url)
+                errors.append(f"{url}: {e}")
+        self.stats.save()
+        raise DownloadError("All mirrors failed:\n  " + "\n  ".join(errors))
+
+
+def fetch(mirrors, dest, sha256=None, **kwargs):
+    """One-shot helper around HedgedFetcher.fetch (github mirrors expanded)
+
+    Concurrent callers should pass one shared ``stats=MirrorStats()``.
+    """
+    return HedgedFetcher(**kwargs).fetch(expand_mirrors(mirrors), dest, sha256=sha256)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Hedged download from ranked mirrors')
+    parser.add_argument('dest')
+    parser.add_argument('urls', nargs='+', help='mirror URLs, best first')
+    parser.add_argument('--sha256', help='expected SHA-256 of the file')
+    parser.add_argument('--hedge-after', type=float, default=HEDGE_AFTER,
+                        help='seconds before starting a hedged request on the next mirror')
+    args = parser.parse_args(argv)
+
+    print(f"📥 Fetching {args.dest} from {len(expand_mirrors(args.urls))} mirror(s)")
+    try:
+        result = fetch(args.urls, args.dest, sha256=args.sha256, hedge_after=args.hedge_after)
+    except DownloadError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ {result['path']}: {result['bytes']} bytes from {result['url']}")
+    print(f"🔐 sha256 {result['sha256']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
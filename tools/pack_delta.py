@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Row-level changesets between two versions of a pack
+A changeset lists the entries inserted, updated and deleted (keyed by
+lemma) and the aliases inserted, updated and deleted (keyed by form) since
+the previously published pack, as gzipped JSON. Packs are rebuilt
+deterministically from their rows (packwriter.py), so applying a changeset
+to the base pack and rewriting it reproduces the new pack byte for byte;
+the target database's SHA-256 is stored in the changeset and checked.
+
+Definitions are diffed decoded, so a changeset does not depend on the
+definition codec of either pack.
+
+Usage:
+    python3 pack_delta.py diff OLD.sqlite.zip NEW.sqlite.zip OUT.delta.json.gz
+    python3 pack_delta.py apply BASE.sqlite.zip CHANGESET.delta.json.gz OUT.sqlite
+"""
+
+import argparse
+import contextlib
+import gzip
+import json
+import sqlite3
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+from def_codec import load_codec
+from downloader import sha256_file
+from packwriter import PackWriter
+
+DELTA_FORMAT = 'polybook-delta'
+DELTA_VERSION = 1
+
+
+class DeltaError(Exception):
+    """Raised when a changeset cannot be made or does not reproduce its target"""
+
+
+@contextlib.contextmanager
+def pack_database(pack_path):
+    """Path of the SQLite database of a .sqlite pack or of a .sqlite.zip containing one"""
+    pack_path = Path(pack_path)
+    if pack_path.suffix != '.zip':
+        yield pack_path
+        return
+    with tempfile.TemporaryDirectory(prefix='delta-') as tmp, zipfile.ZipFile(pack_path) as zf:
+        name = next(n for n in zf.namelist() if n.endswith('.sqlite'))
+        yield Path(zf.extract(name, tmp))
+
+
+def _connect(path):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if not {'entry', 'alias', 'meta'} <= tables:
+        conn.close()
+        raise DeltaError(f"{path} predates the entry/alias schema; changesets need both packs rebuilt")
+    return conn
+
+
+def _entries(conn):
+    """(lemma, definition) in lemma order, definitions decoded"""
+    codec = load_codec(conn)
+    for lemma, definition in conn.execute('SELECT lemma, def FROM entry ORDER BY lemma'):
+        yield lemma, codec.decode(definition) if codec else definition
+
+
+def _aliases(conn):
+    """(form, lemma) in form order"""
+    yield from conn.execute('SELECT form, entry.lemma FROM alias JOIN entry ON entry.id = alias.entry_id '
+                            'ORDER BY form')
+
+
+def _writer_options(conn):
+    """PackWriter arguments that rebuild this pack from its rows"""
+    meta = dict(conn.execute(
+        "SELECT key, value FROM meta WHERE key IN ('lemma_norm', 'def_codec', 'gloss_fts', 'completion')"))
+    codec = json.loads(meta['def_codec'])['codec'] if 'def_codec' in meta else None
+    gloss = json.loads(meta['gloss_fts']) if 'gloss_fts' in meta else None
+    completions = json.loads(meta['completion']) if 'completion' in meta else None
+    if completions and completions['rank'] != 'definition_length':
+        # The rows alone do not carry the frequency list the ranks came from
+        raise DeltaError("Completions ranked by a frequency list cannot be rebuilt from a changeset")
+    return {
+        'language': json.loads(meta['lemma_norm'])['language'],
+        'compression': codec,
+        'fts': gloss is not None,
+        'gloss_language': gloss and gloss['language'],
+        'completions': completions is not None,
+    }
+
+
+def diff_rows(old_rows, new_rows):
+    """Merge two key-ordered (key, value) streams into {'insert', 'update', 'delete'}
+
+    SQLite's BINARY order on UTF-8 text is code point order, the same order
+    Python compares strings in.
+    """
+    changes = {'insert': [], 'update': [], 'delete': []}
+    old_row, new_row = next(old_rows, None), next(new_rows, None)
+    while old_row is not None or new_row is not None:
+        if new_row is None or (old_row is not None and old_row[0] < new_row[0]):
+            changes['delete'].append(old_row[0])
+            old_row = next(old_rows, None)
+        elif old_row is None or new_row[0] < old_row[0]:
+            changes['insert'].append(list(new_row))
+            new_row = next(new_rows, None)
+        else:
+            if old_row[1] != new_row[1]:
+                changes['update'].append(list(new_row))
+            old_row, new_row = next(old_rows, None), next(new_rows, None)
+    return changes
+
+
+def diff(old_pack, new_pack):
+    """Changeset that turns ``old_pack`` into ``new_pack`` (.sqlite or .sqlite.zip)"""
+    with pack_database(old_pack) as old_path, pack_database(new_pack) as new_path:
+        old, new = _connect(old_path), _connect(new_path)
+        try:
+            changeset = {
+                'format': DELTA_FORMAT,
+                'version': DELTA_VERSION,
+                'base': {'sha256': sha256_file(old_path).hexdigest()},
+                'target': dict(_writer_options(new), sha256=sha256_file(new_path).hexdigest()),
+                'entries': diff_rows(_entries(old), _entries(new)),
+                'aliases': diff_rows(_aliases(old), _aliases(new)),
+            }
+        finally:
+            old.close()
+            new.close()
+    return changeset
+
+
+def _patched(rows, changes):
+    """Base (key, value) rows with a diff_rows() result applied"""
+    replaced = dict(changes['insert'])
+    replaced.update(changes['update'])
+    dropped = set(changes['delete'])
+    for key, value in rows:
+        if key not in dropped and key not in replaced:
+            yield key, value
+    yield from replaced.items()
+
+
+def apply(base_pack, changeset, out_path):
+    """Rebuild the target pack from ``base_pack`` and a changeset; returns its SHA-256
+
+    Raises DeltaError if the base is not the one the changeset was made
+    against or the rebuilt database does not match the target byte for byte.
+    """
+    if changeset.get('format') != DELTA_FORMAT or changeset.get('version') != DELTA_VERSION:
+        raise DeltaError(f"Unsupported changeset: {changeset.get('format')} v{changeset.get('version')}")
+    target = changeset['target']
+    with pack_database(base_pack) as base_path:
+        base_sha256 = sha256_file(base_path).hexdigest()
+        if base_sha256 != changeset['base']['sha256']:
+            raise DeltaError(f"{base_pack} is not the changeset's base "
+                             f"({base_sha256[:12]}… != {changeset['base']['sha256'][:12]}…)")
+        conn = _connect(base_path)
+        try:
+            with PackWriter(out_path, language=target['language'], compression=target['compression'],
+                            fts=target.get('fts', False), gloss_language=target.get('gloss_language'),
+                            completions=target.get('completions', False)) as writer:
+                for lemma, definition in _patched(_entries(conn), changeset['entries']):
+                    writer.add(lemma, definition)
+                for form, lemma in _patched(_aliases(conn), changeset['aliases']):
+                    writer.add_alias(form, lemma)
+        finally:
+            conn.close()
+    sha256 = sha256_file(out_path).hexdigest()
+    if sha256 != target['sha256']:
+        raise DeltaError(f"Applying the changeset produced {sha256[:12]}…, expected {target['sha256'][:12]}…")
+    return sha256
+
+
+def write_changeset(changeset, path):
+    """Gzipped JSON with no timestamp, so equal changesets are equal files"""
+    data = json.dumps(changeset, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    with open(path, 'wb') as raw, gzip.GzipFile(filename='', mode='wb', fileobj=raw, mtime=0) as f:
+        f.write(data)
+
+
+def read_changeset(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def change_counts(changeset):
+    return {table: {kind: len(rows) for kind, rows in changeset[table].items()} for table in ('entries', 'aliases')}
+
+
+def make_delta(base_pack, new_pack, out_path):
+    """Diff, write and verify a changeset; returns {'sha256', 'bytes', 'changes'}"""
+    changeset = diff(base_pack, new_pack)
+    write_changeset(changeset, out_path)
+    with tempfile.TemporaryDirectory(prefix='delta-') as tmp:
+        apply(base_pack, read_changeset(out_path), Path(tmp) / 'rebuilt.sqlite')
+    return {
+        'sha256': sha256_file(out_path).hexdigest(),
+        'bytes': Path(out_path).stat().st_size,
+        'changes': change_counts(changeset),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Make or apply row-level pack changesets')
+    commands = parser.add_subparsers(dest='command', required=True)
+    diff_parser = commands.add_parser('diff', help='write and verify the changeset from OLD to NEW')
+    diff_parser.add_argument('old')
+    diff_parser.add_argument('new')
+    diff_parser.add_argument('out')
+    apply_parser = commands.add_parser('apply', help='rebuild a pack from its base and a changeset')
+    apply_parser.add_argument('base')
+    apply_parser.add_argument('changeset')
+    apply_parser.add_argument('out')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'diff':
+            delta = make_delta(args.old, args.new, args.out)
+            changes = delta['changes']['entries']
+            print(f"📦 {args.out}: {delta['bytes']} bytes, {changes['insert']} inserted, "
+                  f"{changes['update']} updated, {changes['delete']} deleted entries")
+            print("✅ Applying it reproduces the new pack byte for byte")
+        else:
+            sha256 = apply(args.base, read_changeset(args.changeset), args.out)
+            print(f"✅ {args.out} matches the changeset target (sha256 {sha256[:12]}…)")
+    except (DeltaError, sqlite3.Error, zipfile.BadZipFile, OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
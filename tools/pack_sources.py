@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Upstream sources for the bilingual dictionary packs
+One table of verified Wiktionary archives (Vuizur/Wiktionary-Dictionaries)
+with the pack ids that build from each, plus a loader for
+optimal-strategy-style JSON files
+"""
+
+import json
+
+from languages import get_language_code
+from wiktionary_tree import raw_url
+
+WIKTIONARY_REASON = 'Wiktionary bilingual - rich definitions, examples, IPA, bidirectional'
+
+# (archive language, upstream size, pack ids built from that archive)
+WIKTIONARY_PACKS = [
+    ('Spanish', '4.6MB', ['eng-spa', 'spa-eng', 'es-en', 'en-es']),
+    ('French', '3.2MB', ['eng-fra', 'fra-eng', 'fr-en', 'en-fr']),
+    ('German', '6.9MB', ['eng-deu', 'deu-eng', 'de-en', 'en-de']),
+    ('Italian', '5.3MB', ['eng-ita', 'ita-eng', 'it-en', 'en-it']),
+    ('Portuguese', '2.6MB', ['eng-por', 'por-eng', 'pt-en', 'en-pt']),
+    ('Russian', '4.2MB', ['eng-rus', 'rus-eng', 'ru-en', 'en-ru']),
+    ('Chinese', '4.6MB', ['eng-chn', 'chn-eng', 'zh-en', 'en-zh']),
+    ('Japanese', '5.9MB', ['eng-jpn', 'jpn-eng', 'ja-en', 'en-ja']),
+    ('Korean', '2.1MB', ['eng-kor', 'kor-eng', 'ko-en', 'en-ko']),
+    ('Arabic', '2.9MB', ['eng-ara', 'ara-eng', 'ar-en', 'en-ar']),
+    ('Hindi', '1.0MB', ['eng-hin', 'hin-eng', 'hi-en', 'en-hi']),
+]
+
+# What CI publishes: both directions of every archive
+DEFAULT_PAIRS = [pair for _, _, pairs in WIKTIONARY_PACKS for pair in pairs[:2]]
+
+
+def wiktionary_url(language):
+    return raw_url(f"{language}-English Wiktionary dictionary stardict.tar.gz")
+
+
+def pack_source(pair):
+    """Source info for a pack id, or None if the pair is not supported"""
+    for language, size, pairs in WIKTIONARY_PACKS:
+        if pair in pairs:
+            return {
+                'pair': pair,
+                'source': 'wiktionary',
+                'url': wiktionary_url(language),
+                # Headword language of the archive (picks lemma_norm rules)
+                'language': get_language_code(language),
+                # The archives gloss every headword in English
+                'gloss_language': 'en',
+                'size': size,
+                'reason': WIKTIONARY_REASON,
+            }
+    return None
+
+
+def load_strategy(path):
+    """{pair: source info} from the optimal_sources of a strategy JSON file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        strategy = json.load(f)
+    sources = {}
+    for pair, data in strategy.get('optimal_sources', {}).items():
+        sources[pair] = {
+            'pair': pair,
+            'source': data.get('choice', 'unknown'),
+            'url': data['url'],
+            'mirrors': data.get('mirrors', []),
+            'language': data.get('language'),
+            'gloss_language': data.get('gloss_language'),
+            'size': f"{data['size_mb']}MB" if data.get('size_mb') is not None else '',
+            'reason': data.get('reason', ''),
+            'warning': data.get('warning'),
+        }
+    return sources
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Bulk SQLite pack writer
+Each definition is stored once in `entry`; inflected and alternate forms go
+in a compact `alias(form -> entry_id)` table. The `dict(lemma, def,
+lemma_norm)` view joins the two, so the app's existing queries keep their
+shape. Both tables carry an indexed `lemma_norm` lookup key and the
+normalization rules are stored in the `meta` table (lemma_norm.py).
+Definitions can optionally be compressed per row with a dictionary trained
+on the pack itself (def_codec.py), indexed for full-text search over
+their glosses (gloss_index.py) and for ranked prefix completion
+(completion.py).
+Rows are staged with executemany in large transactions under load-optimized
+pragmas, then inserted once in lemma order; ANALYZE and VACUUM run once at
+the end. The same input always produces the same file.
+
+Text is NUL-stripped and NFC-normalized inline. Entries that cannot be
+imported are counted by reason and, when a quarantine path is given,
+written there as JSON lines instead of stopping the import.
+"""
+
+import itertools
+import json
+import sqlite3
+import unicodedata
+from pathlib import Path
+
+import completion
+from def_codec import Codec, sample_stride
+from gloss_index import create_sql, gloss_text, index_bytes, spec
+from lemma_norm import normalizer, rules_for, rules_json
+
+# PRAGMA user_version of built packs (legacy packs with a plain dict table are 0)
+PACK_SCHEMA_VERSION = 2
+BATCH_SIZE = 50000
+PAGE_SIZE = 4096
+CACHE_KIB = 65536
+# group_concat(... ORDER BY ...) needs SQLite 3.44
+ORDERED_AGGREGATES = (3, 44, 0)
+
+# entry stays a rowid table: alias.entry_id, the gloss FTS rowid and entry_rank all
+# point at its integer id. Rows go in sorted by lemma, so rowid order is lemma order
+# and the UNIQUE lemma index serves exact lookups; alias and meta are WITHOUT ROWID.
+SCHEMA = """
+CREATE TABLE entry (
+    id INTEGER PRIMARY KEY,
+    lemma TEXT NOT NULL UNIQUE,
+    def TEXT NOT NULL,
+    lemma_norm TEXT NOT NULL
+);
+CREATE TABLE alias (
+    form TEXT PRIMARY KEY,
+    entry_id INTEGER NOT NULL REFERENCES entry (id),
+    form_norm TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE VIEW dict (lemma, def, lemma_norm) AS
+    SELECT lemma, def, lemma_norm FROM entry
+    UNION ALL
+    SELECT alias.form, entry.def, alias.form_norm
+    FROM alias JOIN entry ON entry.id = alias.entry_id;
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def clean_text(text):
+    """Strip NULs and surrounding whitespace, NFC-normalize"""
+    text = text.replace('\0', '').strip()
+    if not unicodedata.is_normalized('NFC', text):
+        text = unicodedata.normalize('NFC', text)
+    return text
+
+
+class Rejected:
+    """A source entry that could not be decoded, yielded in place of (lemma, definition, synonyms)"""
+
+    def __init__(self, lemma, reason, raw=b''):
+        self.lemma = lemma
+        self.reason = reason
+        self.raw = raw
+
+
+def _grouped(rows):
+    """(lemma, rows, first seq) for (lemma, def, seq) rows sorted by lemma, seq"""
+    for lemma, group in itertools.groupby(rows, key=lambda row: row[0]):
+        group = list(group)
+        yield lemma, group, group[0][2]
+
+
+class PackWriter:
+    """Collect headwords and aliases, then write the pack in one sorted pass
+
+    Duplicate headwords have their definitions joined (in insertion order);
+    an alias points at its headword's definition unless it is a headword
+    itself. ``language`` (ISO 639-1 code of the headwords) picks the
+    lemma_norm rules; ``compression`` ('deflate' or 'zstd') turns on
+    trained-dictionary compression of definitions; ``fts`` adds the FTS5
+    gloss index, tokenized for ``gloss_language`` (the definitions' language);
+    ``completions`` adds the prefix completion index, ranked by
+    ``frequencies`` ({word: count}) when given.
+    """
+
+    def __init__(self, path, *, batch_size=BATCH_SIZE, quarantine=None, language=None, compression=None,
+                 fts=False, gloss_language=None, completions=False, frequencies=None):
+        self.path = Path(path)
+        self.path.unlink(missing_ok=True)
+        self.batch_size = batch_size
+        self.counts = {'headwords': 0, 'synonyms': 0, 'skipped': 0, 'reasons': {}}
+        self._entries = []
+        self._aliases = []
+        self._seq = 0
+        self._quarantine = open(quarantine, 'w', encoding='utf-8') if quarantine else None
+        self.norm_rules = rules_for(language)
+        self.compression = compression
+        self.gloss_spec = spec(gloss_language) if fts else None
+        self.completions = completions
+        self.frequencies = frequencies
+
+        self.conn = sqlite3.connect(self.path, isolation_level=None)
+        self.conn.executescript(f"""
+            PRAGMA page_size={PAGE_SIZE};
+            PRAGMA user_version={PACK_SCHEMA_VERSION};
+            PRAGMA journal_mode=OFF;
+            PRAGMA synchronous=OFF;
+            PRAGMA locking_mode=EXCLUSIVE;
+            PRAGMA cache_size=-{CACHE_KIB};
+            {SCHEMA}
+            CREATE TEMP TABLE staging (seq INTEGER PRIMARY KEY, lemma TEXT NOT NULL, def TEXT NOT NULL);
+            CREATE TEMP TABLE staged_alias (seq INTEGER PRIMARY KEY, w TEXT NOT NULL, lemma TEXT NOT NULL);
+        """)
+        self.conn.create_function('lemma_norm', 1, normalizer(self.norm_rules), deterministic=True)
+
+    def add(self, lemma, definition, synonyms=()):
+        """Stage one entry; returns False if it was skipped as empty"""
+        lemma, definition = clean_text(lemma), clean_text(definition)
+        if not lemma or not definition:
+            self.reject(lemma or definition[:80], 'empty headword' if not lemma else 'empty definition')
+            return False
+        self._seq += 1
+        self._entries.append((self._seq, lemma, definition))
+        self.counts['headwords'] += 1
+        for synonym in synonyms:
+            self.add_alias(synonym, lemma)
+        if len(self._entries) >= self.batch_size:
+            self.flush()
+        return True
+
+    def add_alias(self, alias, lemma):
+        alias = clean_text(alias)
+        if not alias:
+            return
+        self._seq += 1
+        self._aliases.append((self._seq, alias, lemma))
+        self.counts['synonyms'] += 1
+        if len(self._aliases) >= self.batch_size:
+            self.flush()
+
+    def reject(self, lemma, reason, raw=b''):
+        """Count a source entry that is left out of the pack and quarantine it"""
+        self.counts['skipped'] += 1
+        self.counts['reasons'][reason] = self.counts['reasons'].get(reason, 0) + 1
+        if self._quarantine:
+            record = {'lemma': lemma, 'reason': reason}
+            if raw:
+                record['raw'] = bytes(raw).decode('utf-8', 'backslashreplace')
+            self._quarantine.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def flush(self):
+        """Stage the buffered rows in the database (done every ``batch_size`` rows and on close)"""
+        self.conn.execute('BEGIN')
+        self.conn.executemany('INSERT INTO staging VALUES (?, ?, ?)', self._entries)
+        self.conn.executemany('INSERT INTO staged_alias VALUES (?, ?, ?)', self._aliases)
+        self.conn.execute('COMMIT')
+        self._entries.clear()
+        self._aliases.clear()
+
+    def _merge(self):
+        """Fold staged rows into one row per lemma, definitions joined in input order"""
+        self.conn.execute('BEGIN')
+        if sqlite3.sqlite_version_info >= ORDERED_AGGREGATES:
+            self.conn.execute("""
+                CREATE TEMP TABLE merged AS
+                    SELECT lemma, group_concat(def, char(10) ORDER BY seq) AS def, min(seq) AS seq
+                    FROM staging GROUP BY lemma
+            """)
+        else:
+            # A subquery's ORDER BY does not fix aggregate input order; join in Python instead
+            self.conn.execute('CREATE TEMP TABLE merged (lemma TEXT, def TEXT, seq INTEGER)')
+            rows = self.conn.cursor().execute('SELECT lemma, def, seq FROM staging ORDER BY lemma, seq')
+            self.conn.executemany('INSERT INTO merged VALUES (?, ?, ?)', (
+                (lemma, '\n'.join(row[1] for row in group), first)
+                for lemma, group, first in _grouped(rows)))
+        self.conn.execute('DROP TABLE staging')
+        self.conn.execute('COMMIT')
+
+    def close(self):
+        """Write the final tables, optimize once and return the counts"""
+        self.flush()
+        self.conn.execute("INSERT INTO meta VALUES ('lemma_norm', ?)", (rules_json(self.norm_rules),))
+        self._merge()
+        def_expr = self._train_codec() if self.compression else 'def'
+        self.conn.executescript(f"""
+            BEGIN;
+            INSERT INTO entry (lemma, def, lemma_norm)
+                SELECT lemma, {def_expr}, lemma_norm(lemma) FROM merged ORDER BY lemma;
+            {self._gloss_sql() if self.gloss_spec else ''}
+            {self._rank_sql() if self.completions else ''}
+            DROP TABLE merged;
+            -- A form that is also a headword keeps the headword's own entry
+            INSERT OR IGNORE INTO alias (form, entry_id, form_norm)
+                SELECT staged.w, entry.id, lemma_norm(staged.w)
+                FROM staged_alias AS staged JOIN entry ON entry.lemma = staged.lemma
+                WHERE NOT EXISTS (SELECT 1 FROM entry AS headword WHERE headword.lemma = staged.w)
+                ORDER BY staged.w, staged.seq;
+            DROP TABLE staged_alias;
+            CREATE INDEX entry_lemma_norm ON entry (lemma_norm);
+            CREATE INDEX alias_form_norm ON alias (form_norm);
+            COMMIT;
+        """)
+        if self.completions:
+            self.conn.execute('BEGIN')
+            prefixes = completion.build(self.conn)
+            self.conn.execute('COMMIT')
+        self.conn.executescript('ANALYZE; VACUUM;')
+        distinct = self.conn.execute('SELECT COUNT(*) FROM entry').fetchone()[0]
+        aliases = self.conn.execute('SELECT COUNT(*) FROM alias').fetchone()[0]
+        # Lookup rows the dict view exposes; rows folded into an existing headword
+        self.counts['entries'] = distinct + aliases
+        self.counts['merged'] = self.counts['headwords'] - distinct
+        self.counts['aliases'] = aliases
+        if self.compression:
+            self.counts['compression'] = self._compression_counts()
+        if self.gloss_spec:
+            self.counts['gloss_index'] = {'tokenizer': self.gloss_spec['tokenizer'],
+                                          'bytes': index_bytes(self.conn)}
+        if self.completions:
+            self.counts['completion'] = {'prefixes': prefixes, 'rank': self._ranked_by,
+                                         'bytes': completion.table_bytes(self.conn)}
+        self._close()
+        return dict(self.counts)
+
+    def _train_codec(self):
+        """Train the definition codec on a sample of merged rows; returns the SQL to encode with"""
+        rows = self.conn.execute('SELECT COUNT(*) FROM merged').fetchone()[0]
+        samples = (d for (d,) in self.conn.execute('SELECT def FROM merged WHERE rowid % ? = 0',
+                                                    (sample_stride(rows),)))
+        codec = Codec.train(self.compression, samples)
+        self.conn.execute("INSERT INTO meta VALUES ('def_codec', ?)", (json.dumps(codec.spec(), sort_keys=True),))
+        self.conn.execute("INSERT INTO meta VALUES ('def_dict', ?)", (codec.dictionary,))
+        self.conn.create_function('def_encode', 1, codec.encode, deterministic=True)
+        self._raw_bytes = self.conn.execute('SELECT SUM(LENGTH(CAST(def AS BLOB))) FROM merged').fetchone()[0] or 0
+        return 'def_encode(def)'
+
+    def _gloss_sql(self):
+        """SQL that indexes the plain text of every merged definition under its entry id"""
+        self.conn.execute("INSERT INTO meta VALUES ('gloss_fts', ?)", (json.dumps(self.gloss_spec, sort_keys=True),))
+        self.conn.create_function('gloss_text', 1, gloss_text, deterministic=True)
+        return f"""
+            {create_sql(self.gloss_spec['language'])};
+            INSERT INTO gloss (rowid, text)
+                SELECT entry.id, gloss_text(merged.def) FROM merged JOIN entry ON entry.lemma = merged.lemma
+                ORDER BY entry.id;
+            INSERT INTO gloss (gloss) VALUES ('optimize');
+        """
+
+    def _rank_sql(self):
+        """SQL that ranks every entry for completion: word frequency, or definition length as a proxy"""
+        if self.frequencies is not None:
+            folded = completion.folded_frequencies(self.frequencies, normalizer(self.norm_rules))
+            self.conn.create_function('word_frequency', 1, lambda key: folded.get(key, 0), deterministic=True)
+            self._ranked_by, rank_expr = 'frequency', 'word_frequency(entry.lemma_norm)'
+        else:
+            # Short, richly defined headwords are the common ones
+            self._ranked_by, rank_expr = 'definition_length', 'LENGTH(merged.def) * 100 / LENGTH(merged.lemma)'
+        self.conn.execute("INSERT INTO meta VALUES ('completion', ?)",
+                          (json.dumps(completion.spec(self._ranked_by), sort_keys=True),))
+        return f"""
+            {completion.SCHEMA}
+            INSERT INTO entry_rank (entry_id, rank)
+                SELECT entry.id, {rank_expr} FROM merged JOIN entry ON entry.lemma = merged.lemma
+                ORDER BY entry.id;
+        """
+
+    def _compression_counts(self):
+        stored, compressed = self.conn.execute(
+            "SELECT SUM(LENGTH(CAST(def AS BLOB))), SUM(typeof(def) = 'blob') FROM entry").fetchone()
+        dict_bytes = self.conn.execute("SELECT LENGTH(value) FROM meta WHERE key = 'def_dict'").fetchone()[0]
+        stored = (stored or 0) + dict_bytes
+        return {
+            'codec': self.compression,
+            'raw_bytes': self._raw_bytes,
+            'stored_bytes': stored,
+            'compressed_rows': compressed or 0,
+            'ratio': round(self._raw_bytes / stored, 3) if stored else 0.0,
+        }
+
+    def _close(self):
+        self.conn.close()
+        if self._quarantine:
+            self._quarantine.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._close()
+
+
+def write_pack(entries, out_path, **options):
+    """Write (lemma, definition, synonyms) entries into a pack; returns conversion counts
+
+    ``entries`` may also yield Rejected items, which are quarantined.
+    ``options`` are PackWriter's keyword options.
+    """
+    writer = PackWriter(out_path, **options)
+    with writer:
+        for entry in entries:
+            if isinstance(entry, Rejected):
+                writer.reject(entry.lemma, entry.reason, entry.raw)
+            else:
+                writer.add(*entry)
+    return writer.counts
+
+
+def pack_options(args, **options):
+    """write_pack options from a converter's --quarantine, --compress-defs, --fts, --completions
+    and --frequencies flags (the frequency list is loaded here), plus ``options``
+    """
+    frequencies = completion.load_frequencies(args.frequencies) if args.frequencies else None
+    return dict(options, quarantine=args.quarantine, compression=args.compress_defs, fts=args.fts,
+                completions=args.completions or bool(frequencies), frequencies=frequencies)
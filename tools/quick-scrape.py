@@ -4,31 +4,24 @@ Quick scraper for top 10 language dictionaries
 Focuses on the most important pairs and tests them efficiently
 """
 
-import requests
 import json
 import time
 
+from http_cache import cache_from_env
+from http_probe import UrlProber
+from languages import ISO1_TO_ISO3, TOP_7, language_name
+
 # Top 7 languages with their ISO codes
-TOP_7_LANGUAGES = {
-    'eng': 'English',
-    'spa': 'Spanish', 
-    'fra': 'French',
-    'deu': 'German',
-    'ita': 'Italian',
-    'por': 'Portuguese',
-    'rus': 'Russian'
-}
+TOP_7_LANGUAGES = {ISO1_TO_ISO3[code]: language_name(code) for code in TOP_7}
 
-def test_url(url, timeout=5):
-    """Test if URL exists and get size"""
-    try:
-        response = requests.head(url, timeout=timeout, allow_redirects=True)
-        if response.status_code == 200:
-            size = response.headers.get('content-length')
-            return int(size) if size else None
-        return None
-    except:
-        return None
+def test_urls(urls, timeout=5):
+    """Test many URLs concurrently; returns {url: size or None}"""
+    cache = cache_from_env()
+    with UrlProber(timeout=timeout, cache=cache) as prober:
+        sizes = prober.sizes(urls)
+    if cache:
+        print(f"🗄️ HTTP cache: {cache.stats()}")
+    return sizes
 
 def main():
     print("🚀 Quick Dictionary Discovery for Top 7 Languages")
@@ -45,10 +38,6 @@ def main():
         'summary': {}
     }
     
-    # 1. Test key FreeDict pairs (known working from our validation)
-    print("\n1️⃣ TESTING FREEDICT PAIRS")
-    print("-" * 30)
-    
     freedict_tests = [
         ('eng-spa', 'https://download.freedict.org/dictionaries/eng-spa/2024.10.10/freedict-eng-spa-2024.10.10.stardict.tar.xz'),
         ('spa-eng', 'https://download.freedict.org/dictionaries/spa-eng/0.3.1/freedict-spa-eng-0.3.1.stardict.tar.xz'),
@@ -62,9 +51,39 @@ def main():
         ('ara-eng', 'https://download.freedict.org/dictionaries/ara-eng/0.6.3/freedict-ara-eng-0.6.3.stardict.tar.xz')
     ]
     
+    wiktionary_tests = [
+        ('eng-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/English-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
+        ('fra-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/French-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
+        ('deu-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/German-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
+        ('ita-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/Italian-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
+        ('por-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/Portuguese-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
+        ('rus-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/Russian-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
+        ('ara-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/Arabic-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
+        ('hin-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/Hindi-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
+        ('zho-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/Chinese-English%20Wiktionary%20dictionary%20stardict.tar.gz')
+    ]
+    
+    bergamot_tests = [
+        ('en-es', 'https://data.statmt.org/bergamot/models/esen/enes.student.tiny11.v1.a7203a8f8e9daea8.tar.gz'),
+        ('es-en', 'https://data.statmt.org/bergamot/models/esen/esen.student.tiny11.v1.09576f06d0ad805e.tar.gz'),
+        ('en-fr', 'https://data.statmt.org/bergamot/models/fren/enfr.student.tiny11.v1.805d112122af03d0.tar.gz'),
+        ('fr-en', 'https://data.statmt.org/bergamot/models/fren/fren.student.tiny11.v1.dccea16d03c0a389.tar.gz'),
+        ('en-de', 'https://data.statmt.org/bergamot/models/deen/ende.student.tiny11.v2.93821e13b3c511b5.tar.gz'),
+        ('de-en', 'https://data.statmt.org/bergamot/models/deen/deen.student.tiny11.v2.8ebe3e43b6bb6cce.tar.gz')
+    ]
+    
+    # Probe every candidate URL concurrently up front
+    print("\n🔍 Probing all candidate URLs...")
+    sizes = test_urls([url for tests in (freedict_tests, wiktionary_tests, bergamot_tests)
+                       for _, url in tests])
+    
+    # 1. Test key FreeDict pairs (known working from our validation)
+    print("\n1️⃣ TESTING FREEDICT PAIRS")
+    print("-" * 30)
+    
     for pair, url in freedict_tests:
         print(f"Testing {pair}...", end=' ')
-        size = test_url(url)
+        size = sizes.get(url)
         if size:
             size_mb = round(size / (1024 * 1024), 1)
             results['freedict'][pair] = {
@@ -80,21 +99,9 @@ def main():
     print("\n2️⃣ TESTING WIKTIONARY PAIRS")
     print("-" * 30)
     
-    wiktionary_tests = [
-        ('eng-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/English-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
-        ('fra-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/French-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
-        ('deu-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/German-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
-        ('ita-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/Italian-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
-        ('por-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/Portuguese-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
-        ('rus-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/Russian-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
-        ('ara-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/Arabic-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
-        ('hin-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/Hindi-English%20Wiktionary%20dictionary%20stardict.tar.gz'),
-        ('zho-eng', 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/Chinese-English%20Wiktionary%20dictionary%20stardict.tar.gz')
-    ]
-    
     for pair, url in wiktionary_tests:
         print(f"Testing {pair}...", end=' ')
-        size = test_url(url)
+        size = sizes.get(url)
         if size:
             size_mb = round(size / (1024 * 1024), 1)
             results['wiktionary'][pair] = {
@@ -110,18 +117,9 @@ def main():
     print("\n3️⃣ TESTING BERGAMOT MODELS")
     print("-" * 30)
     
-    bergamot_tests = [
-        ('en-es', 'https://data.statmt.org/bergamot/models/esen/enes.student.tiny11.v1.a7203a8f8e9daea8.tar.gz'),
-        ('es-en', 'https://data.statmt.org/bergamot/models/esen/esen.student.tiny11.v1.09576f06d0ad805e.tar.gz'),
-        ('en-fr', 'https://data.statmt.org/bergamot/models/fren/enfr.student.tiny11.v1.805d112122af03d0.tar.gz'),
-        ('fr-en', 'https://data.statmt.org/bergamot/models/fren/fren.student.tiny11.v1.dccea16d03c0a389.tar.gz'),
-        ('en-de', 'https://data.statmt.org/bergamot/models/deen/ende.student.tiny11.v2.93821e13b3c511b5.tar.gz'),
-        ('de-en', 'https://data.statmt.org/bergamot/models/deen/deen.student.tiny11.v2.8ebe3e43b6bb6cce.tar.gz')
-    ]
-    
     for pair, url in bergamot_tests:
         print(f"Testing {pair}...", end=' ')
-        size = test_url(url)
+        size = sizes.get(url)
         if size:
             size_mb = round(size / (1024 * 1024), 1)
             results['bergamot'][pair] = {
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Replay a book's word taps against a pack through the app's lookup cascade
+Tokenizes a plain-text or EPUB book the way the reader does (whitespace
+segments, each one tappable), cleans every token like
+Validator.sanitizeWordForLookup (JavaScript's ASCII-only \\w, so accented
+letters are dropped exactly as in the app) and lowercases it, then runs
+the same queries sqliteDictionaryService.ts runs, in the same order, until
+one returns a row:
+    dict                lemma_norm index probe, or COLLATE NOCASE on packs without it
+    dict_lowercase      exact lowercase lemma (the lookupInDatabase fallback)
+    translation         WikiDict detailed translations
+    simple_translation  WikiDict simple translations
+    word                PyGlossary word table
+A stage whose table is missing fails like it does in the app (translation
+and simple_translation share one try block, so a missing translation table
+skips both). Reports p50/p95/p99 latency per tap and per stage, the hit
+rate of every stage, the pages each lookup read and the query plan of every
+stage, flagging plans that scan a whole table or index.
+
+Pages are counted from SQLite's page cache statistics (sqlite3_db_status),
+read through ctypes on CPython versions whose connection layout has been
+checked; elsewhere they are reported as null.
+
+Usage:
+    python3 replay_lookups.py ../public/dictionaries/en-es_dict.sqlite.gz ../sampleBooks/pg37106.txt
+    python3 replay_lookups.py dist/packs/eng-spa.sqlite.zip ../sampleBooks/pg77133-images-3.epub --json replay.json
+    python3 replay_lookups.py PACK BOOK --limit 5000 --fail-on-scan
+"""
+
+import argparse
+import ctypes
+import json
+import posixpath
+import re
+import sqlite3
+import statistics
+import sys
+import sysconfig
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from html.parser import HTMLParser
+from pathlib import Path
+
+import _sqlite3
+
+from bench_completion import unpack
+from def_codec import load_codec
+from lemma_norm import NORM_VERSION, normalizer
+from pack_delta import pack_database
+
+DICT_NORM_SQL = 'SELECT lemma, def FROM dict WHERE lemma_norm = ? ORDER BY lemma = ? DESC LIMIT 1'
+DICT_NOCASE_SQL = 'SELECT lemma, def FROM dict WHERE lemma = ? COLLATE NOCASE LIMIT 1'
+# Stages in cascade order, grouped by the try block that guards them in the app
+CASCADE = [
+    [('dict', None),
+     ('dict_lowercase', 'SELECT def FROM dict WHERE lemma = ? LIMIT 1')],
+    [('translation', 'SELECT lexentry, sense, trans_list FROM translation '
+                     'WHERE written_rep = ? COLLATE NOCASE LIMIT 3'),
+     ('simple_translation',
+      'SELECT written_rep, trans_list FROM simple_translation WHERE written_rep = ? COLLATE NOCASE LIMIT 1')],
+    [('word', 'SELECT w, m FROM word WHERE w = ? COLLATE NOCASE LIMIT 1')],
+]
+STAGES = [name for block in CASCADE for name, _ in block]
+
+# sqlite3_db_status() operations
+DBSTATUS_CACHE_HIT = 7
+DBSTATUS_CACHE_MISS = 8
+
+_SANITIZE = re.compile(r"[^\w\s'-]", re.ASCII)
+_SCAN = re.compile(r'SCAN (\S+)')
+_SKIPPED_TAGS = {'script', 'style', 'head'}
+
+
+def sanitize(token):
+    """Validator.sanitizeWordForLookup followed by lookupWord's lowercase + trim"""
+    return _SANITIZE.sub('', token.strip().lower()).lower().strip()
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag in ('p', 'div', 'br', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS and self._skipping:
+            self._skipping -= 1
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def epub_text(path):
+    """Text of an EPUB's spine documents, in reading order"""
+    with zipfile.ZipFile(path) as zf:
+        container = ET.fromstring(zf.read('META-INF/container.xml'))
+        opf_path = next(el.get('full-path') for el in container.iter() if _local(el.tag) == 'rootfile')
+        opf = ET.fromstring(zf.read(opf_path))
+        manifest = {el.get('id'): el.get('href') for el in opf.iter() if _local(el.tag) == 'item'}
+        spine = [el.get('idref') for el in opf.iter() if _local(el.tag) == 'itemref']
+        base = posixpath.dirname(opf_path)
+        texts = []
+        for idref in spine:
+            href = manifest.get(idref)
+            if not href:
+                continue
+            extractor = _TextExtractor()
+            extractor.feed(zf.read(posixpath.normpath(posixpath.join(base, href))).decode('utf-8', 'replace'))
+            texts.append(''.join(extractor.parts))
+    return '\n'.join(texts)
+
+
+def book_tokens(path):
+    """Whitespace-separated segments of a .txt or .epub book, as the reader makes them tappable"""
+    path = Path(path)
+    text = epub_text(path) if path.suffix == '.epub' else path.read_text(encoding='utf-8-sig', errors='replace')
+    return text.split()
+
+
+def handle_layout_known(conn):
+    """Whether ``conn`` is a CPython sqlite3.Connection whose first field is its sqlite3* handle
+
+    True for the pysqlite_Connection struct of CPython 3.8 to 3.13 with the
+    GIL; anything else is never dereferenced.
+    """
+    return (sys.implementation.name == 'cpython' and (3, 8) <= sys.version_info[:2] <= (3, 13)
+            and not sysconfig.get_config_var('Py_GIL_DISABLED') and type(conn) is sqlite3.Connection)
+
+
+class PageCounter:
+    """Pages a connection has requested from its page cache (hits + misses)"""
+
+    def __init__(self, conn, path):
+        lib = ctypes.CDLL(_sqlite3.__file__)
+        self._status = lib.sqlite3_db_status
+        self._status.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.POINTER(ctypes.c_int),
+                                 ctypes.POINTER(ctypes.c_int), ctypes.c_int]
+        filename = lib.sqlite3_db_filename
+        filename.restype = ctypes.c_char_p
+        filename.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+        if not handle_layout_known(conn):
+            raise OSError('sqlite3.Connection layout not checked for this interpreter')
+        # The sqlite3* handle follows the object header of a sqlite3.Connection
+        self._db = ctypes.c_void_p.from_address(id(conn) + object.__basicsize__).value
+        opened = filename(self._db, b'main') if self._db else None
+        if not opened or Path(opened.decode()).resolve() != Path(path).resolve():
+            raise OSError('cannot reach the connection handle')
+        self._current = ctypes.c_int()
+        self._high = ctypes.c_int()
+
+    def __call__(self):
+        total = 0
+        for op in (DBSTATUS_CACHE_HIT, DBSTATUS_CACHE_MISS):
+            self._status(self._db, op, ctypes.byref(self._current), ctypes.byref(self._high), 0)
+            total += self._current.value
+        return total
+
+
+def page_counter(conn, path):
+    """A PageCounter for ``conn``, or None where the C API cannot be reached"""
+    try:
+        return PageCounter(conn, path)
+    except (OSError, AttributeError, ValueError):
+        return None
+
+
+def percentiles(values):
+    """p50/p95/p99 (nearest rank), mean and max of ``values``"""
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, -(-len(ordered) * p // 100) - 1))]
+
+    return {'p50': rank(50), 'p95': rank(95), 'p99': rank(99),
+            'mean': round(statistics.fmean(ordered), 1), 'max': ordered[-1]}
+
+
+def query_plan(conn, sql, params):
+    """(plan text, whether it scans a whole table or index); None if the tables are missing
+
+    Scans of a view's materialized rows (the dict view's co-routine) read
+    only what the searches under them found and are not flagged.
+    """
+    try:
+        details = [row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+    except sqlite3.OperationalError:
+        return None, False
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    scans = [match.group(1) for match in map(_SCAN.match, details) if match]
+    return ' | '.join(details), any(name in tables for name in scans)
+
+
+def _norm_rules(conn):
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'lemma_norm'").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    rules = json.loads(row[0]) if row else None
+    return rules if rules and rules.get('version') == NORM_VERSION else None
+
+
+class Replay:
+    """Run words through the lookup cascade on one open pack, collecting timings"""
+
+    def __init__(self, conn, path):
+        self.conn = conn
+        self.pages = page_counter(conn, path)
+        rules = _norm_rules(conn)
+        self.normalize = normalizer(rules) if rules else None
+        self.codec = load_codec(conn)
+        self.sql = {name: sql for block in CASCADE for name, sql in block}
+        self.sql['dict'] = DICT_NORM_SQL if rules else DICT_NOCASE_SQL
+        self.stages = {name: {'queries': 0, 'hits': 0, 'errors': 0, 'latency_us': [], 'pages': []}
+                       for name in STAGES}
+        self.latency_us, self.page_reads, self.hits = [], [], []
+
+    def _params(self, name, word):
+        if name == 'dict' and self.normalize:
+            return (self.normalize(word), word)
+        return (word,)
+
+    def lookup(self, word):
+        """Run one word through the cascade; returns the stage that answered, or None"""
+        started, pages_before = time.perf_counter(), self.pages() if self.pages else 0
+        answered = None
+        for block in CASCADE:
+            try:
+                for name, _ in block:
+                    stats = self.stages[name]
+                    stats['queries'] += 1
+                    query_started, query_pages = time.perf_counter(), self.pages() if self.pages else 0
+                    try:
+                        rows = self.conn.execute(self.sql[name], self._params(name, word)).fetchall()
+                        # The app inflates only the row it shows
+                        if rows and name.startswith('dict') and self.codec:
+                            self.codec.decode(rows[0][-1])
+                    finally:
+                        stats['latency_us'].append((time.perf_counter() - query_started) * 1e6)
+                        if self.pages:
+                            stats['pages'].append(self.pages() - query_pages)
+                    if rows:
+                        stats['hits'] += 1
+                        answered = name
+                        break
+            except sqlite3.OperationalError:
+                # Missing table: the app logs it and moves to the next format
+                self.stages[name]['errors'] += 1
+            if answered:
+                break
+        self.latency_us.append((time.perf_counter() - started) * 1e6)
+        if self.pages:
+            self.page_reads.append(self.pages() - pages_before)
+        self.hits.append(answered)
+        return answered
+
+    def report(self, sample_word='the'):
+        lookups = len(self.hits)
+        stages = {}
+        for name in STAGES:
+            stats = self.stages[name]
+            plan, full_scan = query_plan(self.conn, self.sql[name], self._params(name, sample_word))
+            stages[name] = {
+                'available': plan is not None,
+                'queries': stats['queries'],
+                'hits': stats['hits'],
+                'errors': stats['errors'],
+                'hit_rate': round(stats['hits'] / lookups, 4) if lookups else 0.0,
+                'latency_us': _rounded(percentiles(stats['latency_us'])),
+                'pages': percentiles(stats['pages']) if self.pages else None,
+                'plan': plan,
+                'full_scan': full_scan,
+            }
+        answered = sum(1 for hit in self.hits if hit)
+        return {
+            'lookups': lookups,
+            'hit_rate': round(answered / lookups, 4) if lookups else 0.0,
+            'latency_us': _rounded(percentiles(self.latency_us)),
+            'pages': percentiles(self.page_reads) if self.pages else None,
+            'stages': stages,
+            # Only stages that queries actually reached matter for a shipped pack
+            'full_scans': [name for name, stats in stages.items() if stats['full_scan'] and stats['queries']],
+        }
+
+
+def _rounded(stats):
+    return {key: round(value, 1) for key, value in stats.items()} if stats else None
+
+
+def replay(pack_path, book_path, limit=None):
+    """Replay every token of a book against a pack; returns the report"""
+    tokens = book_tokens(book_path)[:limit]
+    with tempfile.TemporaryDirectory(prefix='replay-') as tmp, pack_database(pack_path) as database:
+        database = unpack(database, tmp)
+        conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+        try:
+            replayer = Replay(conn, database)
+            skipped = 0
+            for token in tokens:
+                word = sanitize(token)
+                if not word:
+                    skipped += 1
+                    continue
+                replayer.lookup(word)
+            result = replayer.report()
+        finally:
+            conn.close()
+    return dict({'pack': Path(pack_path).name, 'book': Path(book_path).name, 'tokens': len(tokens),
+                 'skipped': skipped}, **result)
+
+
+def print_report(result):
+    print(f"📚 {result['pack']} × {result['book']}: {result['tokens']} tokens, {result['lookups']} lookups "
+          f"({result['skipped']} tokens empty after sanitizing), {result['hit_rate']:.1%} answered")
+    latency = result['latency_us']
+    if latency:
+        print(f"   per tap   p50 {latency['p50']:>9.1f} µs   p95 {latency['p95']:>9.1f} µs   "
+              f"p99 {latency['p99']:>9.1f} µs")
+    if result['pages']:
+        pages = result['pages']
+        print(f"   pages     p50 {pages['p50']:>9}      p95 {pages['p95']:>9}      p99 {pages['p99']:>9}")
+    for name, stats in result['stages'].items():
+        if not stats['available']:
+            print(f"   {name:<18} (no table)")
+            continue
+        timing = stats['latency_us'] or {'p50': 0, 'p95': 0, 'p99': 0}
+        pages = f"   pages p95 {stats['pages']['p95']}" if stats['pages'] else ''
+        print(f"   {name:<18} {stats['queries']:>7} queries  {stats['hit_rate']:>6.1%} hits   "
+              f"p50 {timing['p50']:>8.1f} µs   p99 {timing['p99']:>8.1f} µs{pages}")
+        if stats['full_scan']:
+            print(f"      ⚠️ full scan: {stats['plan']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a book's taps through the app's lookup cascade")
+    parser.add_argument('pack', help='.sqlite, .sqlite.gz or .sqlite.zip pack')
+    parser.add_argument('book', help='.txt or .epub book')
+    parser.add_argument('--limit', type=int, help='replay only the first N tokens')
+    parser.add_argument('--json', help='write the report here')
+    parser.add_argument('--fail-on-scan', action='store_true',
+                        help='exit 1 when a stage that lookups reached scans a whole table')
+    args = parser.parse_args(argv)
+
+    try:
+        result = replay(args.pack, args.book, args.limit)
+    except (sqlite3.Error, zipfile.BadZipFile, ET.ParseError, KeyError, OSError, StopIteration) as e:
+        print(f"❌ Replay failed: {e}")
+        return 1
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"📄 Report: {args.json}")
+    if result['full_scans']:
+        print(f"⚠️ Full scans in: {', '.join(result['full_scans'])}")
+        if args.fail_on_scan:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Write small StarDict dictionaries for exercising the converter tools
+without downloading real packs
+"""
+
+import gzip
+import struct
+from pathlib import Path
+
+from dictzip import write_dictzip
+
+
+def _bytes(text):
+    return text if isinstance(text, bytes) else text.encode('utf-8')
+
+
+def write_sample_stardict(directory, name, entries, synonyms=None, offset_bits=32,
+                          sametypesequence='m', gzip_idx=False, dictzip_chunk=None):
+    """Write NAME.{ifo,idx,dict[,syn]} into ``directory``; returns the .ifo path
+
+    ``entries`` is [(headword, definition)] (sorted here the way StarDict
+    requires; either may be raw bytes to write malformed data);
+    ``synonyms`` is {synonym: headword}. With ``dictzip_chunk`` the
+    data is written as .dict.dz using that chunk length.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    entries = sorted(entries, key=lambda e: (_bytes(e[0]).lower(), _bytes(e[0])))
+    offset_format = '>Q' if offset_bits == 64 else '>L'
+
+    data = bytearray()
+    idx = bytearray()
+    for word, definition in entries:
+        payload = _bytes(definition)
+        if not sametypesequence:
+            payload = b'm' + payload + b'\0'
+        idx += _bytes(word) + b'\0' + struct.pack(offset_format, len(data)) + struct.pack('>L', len(payload))
+        data += payload
+
+    if dictzip_chunk:
+        write_dictzip(bytes(data), directory / f"{name}.dict.dz", chunk_length=dictzip_chunk)
+    else:
+        (directory / f"{name}.dict").write_bytes(bytes(data))
+    if gzip_idx:
+        (directory / f"{name}.idx.gz").write_bytes(gzip.compress(bytes(idx)))
+    else:
+        (directory / f"{name}.idx").write_bytes(bytes(idx))
+
+    lines = ["StarDict's dict ifo file", 'version=3.0.0', f"bookname={name}",
+             f"wordcount={len(entries)}", f"idxfilesize={len(idx)}"]
+    if offset_bits == 64:
+        lines.append('idxoffsetbits=64')
+    if sametypesequence:
+        lines.append(f"sametypesequence={sametypesequence}")
+
+    if synonyms:
+        positions = {word: i for i, (word, _) in enumerate(entries)}
+        syn = bytearray()
+        for synonym, headword in sorted(synonyms.items()):
+            syn += _bytes(synonym) + b'\0' + struct.pack('>L', positions[headword])
+        (directory / f"{name}.syn").write_bytes(bytes(syn))
+        lines.append(f"synwordcount={len(synonyms)}")
+
+    ifo = directory / f"{name}.ifo"
+    ifo.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return ifo
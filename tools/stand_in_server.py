@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Local stand-in HTTP server for exercising the tooling without the network
+Serves in-memory files with injected latency, a per-response bandwidth
+cap, ETag revalidation and HTTP Range requests (honouring If-Range), can cut responses short to
+simulate dropped connections, and records request statistics
+"""
+
+import hashlib
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Bodies are paced in chunks of this size when a bandwidth cap is set
+THROTTLE_CHUNK = 16 * 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _begin(self):
+        server = self.server.stand_in
+        server._enter(self.client_address)
+        if server.latency:
+            time.sleep(server.latency)
+        return server
+
+    def _send_headers(self, status, body, etag=None, content_range=None):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Content-Type', 'application/octet-stream')
+        if self.server.stand_in.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        if content_range:
+            self.send_header('Content-Range', content_range)
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+
+    def _requested_range(self, size, etag):
+        """Parse a single "bytes=a-b" / "bytes=a-" range; None if absent, unsupported or stale
+
+        An If-Range that no longer matches the ETag asks for the whole file.
+        """
+        match = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if not match or not self.server.stand_in.ranges:
+            return None
+        if self.headers.get('If-Range', etag) != etag:
+            return None
+        start = int(match.group(1))
+        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+        return start, end
+
+    def _respond(self, send_body):
+        server = self._begin()
+        try:
+            # Like a static file server, the query string does not pick the file
+            body = server.files.get(self.path.split('?', 1)[0])
+            if body is None:
+                self._send_headers(404, b'')
+                return
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get('If-None-Match') == etag:
+                server._count('not_modified')
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            requested = self._requested_range(len(body), etag)
+            if requested and requested[0] >= len(body):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(body)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if requested:
+                start, end = requested
+                server._count('range_requests')
+                payload = body[start:end + 1]
+                self._send_headers(206, payload, etag, f"bytes {start}-{end}/{len(body)}")
+            else:
+                payload = body
+                self._send_headers(200, payload, etag)
+            if send_body:
+                self._write_body(server, payload)
+        finally:
+            server._leave()
+
+    def _write_body(self, server, payload):
+        cut = server._take_interrupt()
+        if cut is not None and cut < len(payload):
+            self._send(server, payload[:cut])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self._send(server, payload)
+
+    def _send(self, server, payload):
+        if not server.bandwidth:
+            self.wfile.write(payload)
+            server._count('bytes_sent', len(payload))
+            return
+        started = time.monotonic()
+        for offset in range(0, len(payload), THROTTLE_CHUNK):
+            chunk = payload[offset:offset + THROTTLE_CHUNK]
+            self.wfile.write(chunk)
+            server._count('bytes_sent', len(chunk))
+            # Sleep until the bytes sent so far fit the cap
+            ahead = (offset + len(chunk)) / server.bandwidth - (time.monotonic() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+
+class StandInServer:
+    """Threaded HTTP server on 127.0.0.1 with configurable per-request latency
+
+    ``bandwidth`` caps each response body at that many bytes per second.
+
+    Usage:
+        with StandInServer({'/a.tar.gz': b'...'}, latency=0.2) as server:
+            url = server.url('/a.tar.gz')
+    """
+
+    def __init__(self, files=None, latency=0.0, ranges=True, bandwidth=None):
+        self.files = dict(files or {})
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.ranges = ranges
+        self.interrupts = []
+        self.requests = 0
+        self.not_modified = 0
+        self.range_requests = 0
+        self.bytes_sent = 0
+        self.max_concurrent = 0
+        self.connections = set()
+        self._active = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.stand_in = self
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._httpd.server_address[1]
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def _enter(self, client_address):
+        with self._lock:
+            self.requests += 1
+            self.connections.add(client_address)
+            self._active += 1
+            self.max_concurrent = max(self.max_concurrent, self._active)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def interrupt_next(self, after_bytes, times=1):
+        """Drop the next ``times`` GET bodies after ``after_bytes`` bytes"""
+        with self._lock:
+            self.interrupts.extend([after_bytes] * times)
+
+    def _take_interrupt(self):
+        with self._lock:
+            return self.interrupts.pop(0) if self.interrupts else None
+
+    def _leave(self):
+        with self._lock:
+            self._active -= 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
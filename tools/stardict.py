@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Native StarDict reader and StarDict -> SQLite pack converter
+Reads .ifo, .idx/.idx.gz (32- or 64-bit offsets), .syn and .dict/.dict.dz
+directly (.dict.dz through dictzip random access); the index is
+memory-mapped and entries are yielded as (lemma, definition, synonyms)
+straight into the pack writer (packwriter.py), without an intermediate SQL
+dump. Text is decoded strictly: entries with invalid UTF-8 or truncated
+data are yielded as Rejected (and quarantined by the writer) rather than
+silently mangled or aborting the conversion.
+
+Usage:
+    python3 stardict.py DICT.ifo OUT.sqlite
+"""
+
+import argparse
+import gzip
+import mmap
+import struct
+import sys
+import zlib
+from pathlib import Path
+
+from dictzip import DictzipError, DictzipReader
+from def_codec import APP_CODECS, CodecError
+from packwriter import Rejected, pack_options, write_pack
+
+IFO_MAGIC = "StarDict's dict ifo file"
+
+# Entry field types whose payload is text (lowercase types are NUL-terminated)
+TEXT_TYPES = set('mltgxykwhnr')
+
+
+class StarDictError(Exception):
+    """Raised for missing or malformed StarDict files"""
+
+
+def read_ifo(path):
+    """Parse an .ifo file into a {key: value} dict"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return parse_ifo(f.read(), path)
+
+
+def parse_ifo(text, name='.ifo'):
+    """Parse .ifo text into a {key: value} dict"""
+    lines = text.splitlines()
+    if not lines or lines[0].strip().lstrip('\ufeff') != IFO_MAGIC:
+        raise StarDictError(f"{name} is not a StarDict .ifo file")
+    info = {}
+    for line in lines[1:]:
+        key, sep, value = line.partition('=')
+        if sep:
+            info[key.strip()] = value.strip()
+    return info
+
+
+def _find(base, *suffixes):
+    for suffix in suffixes:
+        path = base.with_name(base.name + suffix)
+        if path.exists():
+            return path
+    return None
+
+
+def _map(path):
+    """Memory-map a plain file, or decompress a .gz one into memory"""
+    if path.suffix == '.gz':
+        with gzip.open(path, 'rb') as f:
+            return f.read()
+    with open(path, 'rb') as f:
+        if path.stat().st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class StarDict:
+    """One StarDict dictionary, opened from its .ifo path"""
+
+    def __init__(self, ifo_path):
+        ifo_path = Path(ifo_path)
+        base = ifo_path.with_suffix('')
+        self.idx_path = _find(base, '.idx', '.idx.gz')
+        self.dict_path = _find(base, '.dict', '.dict.dz')
+        self.syn_path = _find(base, '.syn')
+        if not self.idx_path or not self.dict_path:
+            raise StarDictError(f"Missing .idx or .dict next to {ifo_path}")
+        self._idx = self._syn = None
+        self._configure(read_ifo(ifo_path))
+
+    @classmethod
+    def from_buffers(cls, info, idx, syn=None):
+        """A dictionary whose .idx/.syn are already in memory (data passed to entries())"""
+        stardict = cls.__new__(cls)
+        stardict.idx_path = stardict.dict_path = stardict.syn_path = None
+        stardict._idx, stardict._syn = idx, syn
+        stardict._configure(info)
+        return stardict
+
+    def _configure(self, info):
+        self.info = info
+        self.wordcount = int(self.info.get('wordcount', 0))
+        self.sametypesequence = self.info.get('sametypesequence', '')
+        offset_bits = self.info.get('idxoffsetbits', '32')
+        if offset_bits not in ('32', '64'):
+            raise StarDictError(f"Unsupported idxoffsetbits={offset_bits}")
+        self._offset = struct.Struct('>Q' if offset_bits == '64' else '>L')
+        self._entry = struct.Struct(self._offset.format + 'L')
+
+    @property
+    def bookname(self):
+        return self.info.get('bookname', '')
+
+    def iter_index(self):
+        """Yield (headword, offset, size) in .idx order"""
+        for word, offset, size in self._iter_raw_index():
+            yield word.decode('utf-8', 'replace'), offset, size
+
+    def _iter_raw_index(self):
+        idx = self._idx if self._idx is not None else _map(self.idx_path)
+        try:
+            pos, end, entry = 0, len(idx), self._entry
+            while pos < end:
+                nul = idx.find(b'\0', pos)
+                if nul < 0 or nul + 1 + entry.size > end:
+                    raise StarDictError(f"Truncated index entry at byte {pos} of {self.idx_path or '.idx'}")
+                word = bytes(idx[pos:nul])
+                offset, size = entry.unpack_from(idx, nul + 1)
+                yield word, offset, size
+                pos = nul + 1 + entry.size
+        finally:
+            if isinstance(idx, mmap.mmap):
+                idx.close()
+
+    def synonyms(self):
+        """{index position: [synonym, ...]} from the .syn file (empty if absent)"""
+        return {position: [word.decode('utf-8', 'replace') for word in words]
+                for position, words in self._raw_synonyms().items()}
+
+    def _raw_synonyms(self):
+        result = {}
+        data = self._syn if self._syn is not None else (
+            self.syn_path.read_bytes() if self.syn_path else b'')
+        pos = 0
+        while pos < len(data):
+            nul = data.find(b'\0', pos)
+            if nul < 0 or nul + 5 > len(data):
+                raise StarDictError(f"Truncated synonym entry at byte {pos} of {self.syn_path or '.syn'}")
+            (target,) = struct.unpack_from('>L', data, nul + 1)
+            result.setdefault(target, []).append(bytes(data[pos:nul]))
+            pos = nul + 5
+        return result
+
+    def open_data(self):
+        """Random-access reader for the definition data: read(offset, size) -> bytes"""
+        return open_data(self.dict_path)
+
+    def decode_definition(self, data):
+        """Turn raw entry data into definition text (text fields joined by newlines)
+
+        Raises UnicodeDecodeError for invalid UTF-8 and struct.error for
+        truncated binary fields.
+        """
+        fields = []
+        pos = 0
+        types = self.sametypesequence
+        if types:
+            for i, kind in enumerate(types):
+                last = i == len(types) - 1
+                pos = self._read_field(data, pos, kind, last, fields)
+        else:
+            while pos < len(data):
+                kind = chr(data[pos])
+                pos = self._read_field(data, pos + 1, kind, False, fields)
+        return '\n'.join(fields)
+
+    @staticmethod
+    def _read_field(data, pos, kind, last, fields):
+        if kind.isupper():
+            # Binary resource (wav, picture, ...): 32-bit size unless it is the last field
+            if last:
+                return len(data)
+            (size,) = struct.unpack_from('>L', data, pos)
+            return pos + 4 + size
+        if last:
+            end = len(data)
+            next_pos = end
+        else:
+            end = data.find(b'\0', pos)
+            end = len(data) if end < 0 else end
+            next_pos = end + 1
+        if kind in TEXT_TYPES:
+            fields.append(bytes(data[pos:end]).decode('utf-8'))
+        return next_pos
+
+    def entries(self, data=None):
+        """Yield (lemma, definition, synonyms) for every headword in index order
+
+        Malformed entries and synonyms are yielded as Rejected items. ``data``
+        is any object with read(offset, size) and close(); by default the
+        dictionary's own .dict/.dict.dz is opened, and damage to it is raised
+        as StarDictError.
+        """
+        synonyms = self._raw_synonyms()
+        own_data = data is None
+        data = data or self.open_data()
+        try:
+            for position, (raw_word, offset, size) in enumerate(self._iter_raw_index()):
+                try:
+                    word = raw_word.decode('utf-8')
+                except UnicodeDecodeError:
+                    yield Rejected(raw_word.decode('utf-8', 'replace'), 'invalid utf-8 headword', raw_word)
+                    continue
+                try:
+                    raw = data.read(offset, size)
+                except (DictzipError, zlib.error, EOFError) as e:
+                    if not own_data:
+                        # A caller's reader is reported by the caller, which knows its source
+                        raise
+                    raise StarDictError(f"{self.dict_path}: damaged definition data ({e})") from e
+                try:
+                    if len(raw) < size:
+                        raise struct.error('short read')
+                    definition = self.decode_definition(raw)
+                except UnicodeDecodeError:
+                    yield Rejected(word, 'invalid utf-8 definition', raw)
+                    continue
+                except struct.error:
+                    yield Rejected(word, 'truncated definition', raw)
+                    continue
+                aliases = []
+                for synonym in synonyms.get(position, []):
+                    try:
+                        aliases.append(synonym.decode('utf-8'))
+                    except UnicodeDecodeError:
+                        yield Rejected(synonym.decode('utf-8', 'replace'), 'invalid utf-8 synonym', synonym)
+                yield word, definition, aliases
+        finally:
+            data.close()
+
+
+class _MappedData:
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) \
+            if path.stat().st_size else b''
+
+    def read(self, offset, size):
+        return self._map[offset:offset + size]
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+
+class _GzipData:
+    """Fallback for .dict.dz files that are plain gzip (no dictzip chunk table)"""
+
+    def __init__(self, path):
+        self._file = gzip.open(path, 'rb')
+
+    def read(self, offset, size):
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def close(self):
+        self._file.close()
+
+
+def open_data(path):
+    """Random-access reader for a .dict or .dict.dz file"""
+    path = Path(path)
+    if path.suffix == '.dz':
+        try:
+            return DictzipReader(path)
+        except DictzipError:
+            # Plain gzip without a chunk table
+            return _GzipData(path)
+    return _MappedData(path)
+
+
+def convert(ifo_path, out_path, **options):
+    """Convert a StarDict dictionary on disk into a pack; returns conversion counts
+
+    ``options`` are write_pack's keyword options.
+    """
+    return write_pack(StarDict(ifo_path).entries(), out_path, **options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert a StarDict dictionary to a SQLite pack')
+    parser.add_argument('ifo')
+    parser.add_argument('out')
+    parser.add_argument('--min-entries', type=int, default=1000,
+                        help='warn when the pack has fewer entries than this')
+    parser.add_argument('--quarantine', help='write rejected entries here as JSON lines')
+    parser.add_argument('--language', help='ISO 639-1 code of the headwords (picks lemma_norm rules)')
+    parser.add_argument('--compress-defs', choices=APP_CODECS,
+                        help='compress definitions with a dictionary trained on the pack')
+    parser.add_argument('--fts', action='store_true', help='add an FTS5 index over the definition glosses')
+    parser.add_argument('--gloss-language', help='ISO 639-1 code of the definitions (picks the FTS tokenizer)')
+    parser.add_argument('--completions', action='store_true', help='add the ranked prefix completion index')
+    parser.add_argument('--frequencies', help="'word count' list to rank completions by")
+    args = parser.parse_args(argv)
+
+    print(f"🔄 Converting {args.ifo} -> {args.out}")
+    try:
+        counts = convert(args.ifo, args.out,
+                         **pack_options(args, language=args.language, gloss_language=args.gloss_language))
+    except (StarDictError, CodecError, OSError, struct.error) as e:
+        print(f"❌ Conversion failed: {e}")
+        return 1
+    return report(counts, args.min_entries)
+
+
+def report(counts, min_entries, max_loss=0.2):
+    """Print conversion counts; returns the exit code (1 on significant data loss)
+
+    Loss is measured exactly: the share of source entries that were
+    rejected. Duplicate headwords merged into one row are not loss.
+    """
+    source = counts['headwords'] + counts['skipped']
+    print("📊 Dictionary conversion results:")
+    print(f"   Source entries: {source}")
+    print(f"   Headwords:      {counts['headwords']} ({counts.get('merged', 0)} merged into duplicates)")
+    print(f"   Synonyms:       {counts['synonyms']} ({counts.get('aliases', 0)} added as rows)")
+    print(f"   Rejected:       {counts['skipped']}")
+    for reason, n in sorted(counts.get('reasons', {}).items()):
+        print(f"      {reason}: {n}")
+    print(f"   Final dict:     {counts['entries']} entries")
+    if 'compression' in counts:
+        c = counts['compression']
+        print(f"   Definitions:    {c['raw_bytes']} -> {c['stored_bytes']} bytes with {c['codec']} "
+              f"(ratio {c['ratio']})")
+    if 'gloss_index' in counts:
+        print(f"   Gloss index:    {counts['gloss_index']['bytes']} bytes "
+              f"({counts['gloss_index']['tokenizer']})")
+    if 'completion' in counts:
+        print(f"   Completions:    {counts['completion']['prefixes']} stored prefixes, "
+              f"{counts['completion']['bytes']} bytes (ranked by {counts['completion']['rank']})")
+
+    if counts['entries'] < min_entries:
+        print(f"⚠️ Warning: only {counts['entries']} entries - check the source dictionary")
+    if source and counts['skipped'] > source * max_loss:
+        print(f"❌ CRITICAL: Significant data loss detected ({counts['skipped']} of {source} entries rejected)")
+        return 1
+    print("✅ Data integrity check passed")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
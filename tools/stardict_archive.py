@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Stream StarDict dictionaries straight out of .tar.gz/.tar.xz/.tar.bz2 archives
+Tar members are read in streaming mode and never extracted: .ifo, .idx and
+.syn are kept in memory, and when the .dict(.dz) member arrives after its
+index it is decoded sequentially as it streams by. Only a .dict that shows
+up before its index (or whose entries are out of order) needs random access
+and is spilled to a temporary file.
+
+Usage:
+    python3 stardict_archive.py ARCHIVE OUT.sqlite
+"""
+
+import argparse
+import gzip
+import lzma
+import shutil
+import struct
+import sys
+import tarfile
+import tempfile
+import zlib
+from pathlib import Path
+
+from def_codec import APP_CODECS, CodecError
+from dictzip import DictzipError
+from packwriter import pack_options, write_pack
+from stardict import StarDict, StarDictError, open_data, parse_ifo, report
+
+# Member suffix -> part name
+PARTS = {
+    '.ifo': 'ifo',
+    '.idx': 'idx',
+    '.idx.gz': 'idx',
+    '.syn': 'syn',
+    '.dict': 'dict',
+    '.dict.dz': 'dict',
+}
+
+
+def split_member(name):
+    """('dir/base', part) for StarDict member names, else (None, None)"""
+    for suffix in sorted(PARTS, key=len, reverse=True):
+        if name.endswith(suffix):
+            return name[:-len(suffix)], PARTS[suffix]
+    return None, None
+
+
+class _SequentialData:
+    """read(offset, size) over a forward-only stream; offsets must not go back"""
+
+    def __init__(self, fileobj):
+        self._file = fileobj
+        self._pos = 0
+
+    def read(self, offset, size):
+        if offset < self._pos:
+            raise StarDictError(f"Entry at {offset} is behind the stream position {self._pos}")
+        while self._pos < offset:
+            skipped = len(self._file.read(min(offset - self._pos, 1024 * 1024)))
+            if not skipped:
+                raise StarDictError("Unexpected end of .dict data")
+            self._pos += skipped
+        data = self._file.read(size)
+        self._pos += len(data)
+        return data
+
+    def close(self):
+        pass
+
+
+def _is_sequential(stardict):
+    """True if every entry starts at or after the end of the previous one"""
+    end = 0
+    for _, offset, size in stardict.iter_index():
+        if offset < end:
+            return False
+        end = offset + size
+    return True
+
+
+class ArchiveReader:
+    """Yield StarDict entries from an archive without extracting it
+
+    ``spilled`` lists members written to temporary files (empty when the
+    whole dictionary was converted while streaming).
+    """
+
+    def __init__(self, archive_path, spill_dir=None):
+        self.archive_path = Path(archive_path)
+        self.spill_dir = spill_dir
+        self.spilled = []
+        self.bookname = None
+
+    def entries(self):
+        with tempfile.TemporaryDirectory(dir=self.spill_dir, prefix='stardict-') as tmp:
+            try:
+                yield from self._entries(Path(tmp))
+            except (EOFError, zlib.error, lzma.LZMAError, tarfile.ReadError, DictzipError) as e:
+                # Decompressors report a cut-off or damaged archive in their own terms
+                raise StarDictError(f"{self.archive_path}: truncated or corrupt archive ({e})") from e
+
+    def _entries(self, tmp):
+        base, parts, spilled_dict = None, {}, None
+        with tarfile.open(self.archive_path, 'r|*') as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                member_base, part = split_member(member.name)
+                if part is None:
+                    continue
+                if base is None:
+                    base = member_base
+                elif member_base != base:
+                    print(f"⚠️ Ignoring {member.name}: only {base} is converted")
+                    continue
+
+                stream = tar.extractfile(member)
+                if part != 'dict':
+                    data = stream.read()
+                    if member.name.endswith('.gz'):
+                        data = gzip.decompress(data)
+                    parts[part] = data
+                    continue
+
+                stardict = self._stardict(parts)
+                if stardict is not None and self._can_stream(stardict, parts):
+                    # Index already known and in data order: decode while streaming
+                    fileobj = gzip.GzipFile(fileobj=stream) if member.name.endswith('.dz') else stream
+                    yield from stardict.entries(data=_SequentialData(fileobj))
+                    return
+
+                spilled_dict = tmp / Path(member.name).name
+                with open(spilled_dict, 'wb') as out:
+                    shutil.copyfileobj(stream, out, 1024 * 1024)
+                self.spilled.append(member.name)
+
+        stardict = self._stardict(parts)
+        if stardict is None or spilled_dict is None:
+            missing = [p for p in ('ifo', 'idx') if p not in parts] + ([] if spilled_dict else ['dict'])
+            raise StarDictError(f"{self.archive_path} has no complete StarDict dictionary "
+                                f"(missing {', '.join(missing)})")
+        yield from stardict.entries(data=open_data(spilled_dict))
+
+    @staticmethod
+    def _can_stream(stardict, parts):
+        """The .syn (if any) must already be in hand and the data laid out in index order"""
+        if 'synwordcount' in stardict.info and 'syn' not in parts:
+            return False
+        return _is_sequential(stardict)
+
+    def _stardict(self, parts):
+        if 'ifo' not in parts or 'idx' not in parts:
+            return None
+        info = parse_ifo(parts['ifo'].decode('utf-8', 'replace'))
+        self.bookname = info.get('bookname')
+        return StarDict.from_buffers(info, parts['idx'], parts.get('syn'))
+
+
+def convert_archive(archive_path, out_path, *, spill_dir=None, **options):
+    """Convert the StarDict dictionary inside an archive into a pack
+
+    ``options`` are write_pack's keyword options. Returns (conversion counts,
+    spilled member names).
+    """
+    reader = ArchiveReader(archive_path, spill_dir)
+    counts = write_pack(reader.entries(), out_path, **options)
+    return counts, reader.spilled
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert a StarDict archive to a SQLite pack without extracting it')
+    parser.add_argument('archive')
+    parser.add_argument('out')
+    parser.add_argument('--min-entries', type=int, default=1000,
+                        help='warn when the pack has fewer entries than this')
+    parser.add_argument('--quarantine', help='write rejected entries here as JSON lines')
+    parser.add_argument('--language', help='ISO 639-1 code of the headwords (picks lemma_norm rules)')
+    parser.add_argument('--compress-defs', choices=APP_CODECS,
+                        help='compress definitions with a dictionary trained on the pack')
+    parser.add_argument('--fts', action='store_true', help='add an FTS5 index over the definition glosses')
+    parser.add_argument('--gloss-language', help='ISO 639-1 code of the definitions (picks the FTS tokenizer)')
+    parser.add_argument('--completions', action='store_true', help='add the ranked prefix completion index')
+    parser.add_argument('--frequencies', help="'word count' list to rank completions by")
+    args = parser.parse_args(argv)
+
+    print(f"🔄 Streaming {args.archive} -> {args.out}")
+    try:
+        options = pack_options(args, language=args.language, gloss_language=args.gloss_language)
+        counts, spilled = convert_archive(args.archive, args.out, **options)
+    except (StarDictError, CodecError, tarfile.TarError, OSError, struct.error) as e:
+        print(f"❌ Conversion failed: {e}")
+        return 1
+    if spilled:
+        print(f"💾 Spilled for random access: {', '.join(spilled)}")
+    else:
+        print("🌊 Converted while streaming (nothing written to disk)")
+    return report(counts, args.min_entries)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
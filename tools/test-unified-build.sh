@@ -19,9 +19,9 @@ cd "$TEST_DIR"
 
 # Make sure we have dependencies
 echo "📦 Checking dependencies..."
-if ! command -v pyglossary &> /dev/null; then
-    echo "⚠️ PyGlossary not found. Installing..."
-    pip3 install pyglossary
+if ! python3 -c "import requests" &> /dev/null; then
+    echo "⚠️ requests not found. Installing..."
+    pip3 install requests
 fi
 
 # Test each priority pair
@@ -46,16 +46,11 @@ for pair in "${TEST_PAIRS[@]}"; do
             
             echo "📊 Result: ${size_mb}MB, ${entries} entries, source: ${source}"
             
-            # Quick SQLite validation
-            if command -v sqlite3 &> /dev/null; then
-                unzip -q "dist/packs/${pair}.sqlite.zip"
-                if sqlite3 "${pair}.sqlite" "SELECT COUNT(*) FROM dict;" > /dev/null 2>&1; then
-                    actual_entries=$(sqlite3 "${pair}.sqlite" "SELECT COUNT(*) FROM dict;")
-                    echo "✅ SQLite validation: ${actual_entries} entries accessible"
-                    rm "${pair}.sqlite"
-                else
-                    echo "❌ SQLite validation failed"
-                fi
+            # Quality report written by the builder in a single pass over the pack
+            if python3 ../analyze_pack.py --gate "dist/packs/${pair}.report.json"; then
+                echo "✅ Quality validation passed"
+            else
+                echo "❌ Quality validation failed"
             fi
         else
             echo "❌ Missing output files"
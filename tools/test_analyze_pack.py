@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test the single-pass pack quality analyzer
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from analyze_pack import analyze, analyze_rows, gate
+from analyze_pack import main as analyze_main
+from packwriter import write_pack
+from testing import run_tests
+
+
+def test_metrics_from_one_pass():
+    rows = [('casa', 'house'), ('casas', 'house'), ('Casa', 'House (surname)'),
+            ('mal', 'bad �'), ('vacío', ' '), ('largo', 'x' * 5000)]
+    report = analyze_rows(iter(rows))
+    assert report['entries'] == 6
+    assert report['empty_definitions'] == 1 and report['empty_lemmas'] == 0
+    assert report['replacement_rows'] == 1
+    assert report['casefold_collisions'] == 1
+    assert report['alt_forms'] == 1 and report['distinct_definitions'] == 5
+    assert report['definition_length']['histogram'] == {
+        '0': 0, '1-16': 5, '17-64': 0, '65-256': 0, '257-1024': 0, '1025-4096': 0, '4097+': 1}
+
+
+def test_gate_flags_bad_packs():
+    report = analyze_rows([(f"w{i}", '�' if i % 10 == 0 else 'ok') for i in range(1200)])
+    assert gate(report) == ['replacement-character rate 10.00% > 1.00%']
+    assert gate(report, min_entries=2000, max_replacement_rate=0.2) == ['only 1200 entries (minimum 2000)']
+    assert gate(dict(report, def_codec='deflate'), max_replacement_rate=0.2) == []
+    assert gate(dict(report, def_codec='zstd'), max_replacement_rate=0.2) == [
+        'definition codec zstd cannot be decoded by the app']
+
+
+def test_cli_writes_report_that_the_gate_reads():
+    with tempfile.TemporaryDirectory() as tmp:
+        pack = Path(tmp) / 'eng-spa.sqlite'
+        write_pack([(f"w{i:04d}", f"def {i}", [f"alt{i:04d}"] if i % 2 else []) for i in range(1500)], pack)
+        assert analyze_main([str(pack)]) == 0
+        report_file = Path(tmp) / 'eng-spa.report.json'
+        report = json.loads(report_file.read_text())
+        assert report == analyze(pack)
+        assert report['entries'] == 2250 and report['alt_forms'] == 750 and report['alt_coverage'] == 0.5
+
+        report['replacement_rate'] = 0.5
+        report_file.write_text(json.dumps(report))
+        assert analyze_main(['--gate', str(report_file)]) == 1
+
+
+def test_alt_forms_come_from_the_alias_table():
+    with tempfile.TemporaryDirectory() as tmp:
+        pack = Path(tmp) / 'eng-spa.sqlite'
+        # Unrelated headwords that share a gloss are not alt forms of each other
+        write_pack([('banco', 'bank', ['bancos']), ('orilla', 'bank', []), ('ribera', 'bank', [])], pack)
+        report = analyze(pack)
+    assert report['entries'] == 4 and report['distinct_definitions'] == 1
+    assert report['alt_forms'] == 1 and report['alt_coverage'] == round(1 / 3, 6)
+    assert report['alt_forms_from'] == 'alias'
+    assert analyze_rows([('banco', 'bank'), ('orilla', 'bank')])['alt_forms_from'] == 'shared_definitions'
+    # Alias rows carry their headword's id, so the counts come from the same pass
+    report = analyze_rows([('banco', 'bank', None), ('orilla', 'shore', None),
+                           ('bancos', 'bank', 1), ('bancas', 'bank', 1)], aliases=True)
+    assert (report['entries'], report['alt_forms'], report['alt_coverage']) == (4, 2, 0.5)
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Pack Analyzer Test', globals()))
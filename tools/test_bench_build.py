@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test the pack build benchmark and the stand-in's bandwidth cap
+"""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+import bench_build
+from bench_build import STAGES, compare, load_history, run_benchmark
+from stand_in_server import StandInServer
+from testing import run_tests
+
+
+def test_bandwidth_cap_paces_response_bodies():
+    body = b'x' * 200_000
+    with StandInServer({'/a.bin': body}, bandwidth=1_000_000) as server:
+        started = time.monotonic()
+        response = requests.get(server.url('/a.bin'), timeout=10)
+        elapsed = time.monotonic() - started
+    assert response.content == body and server.bytes_sent == len(body)
+    assert elapsed >= 0.18, elapsed
+
+
+def test_every_stage_is_timed():
+    with tempfile.TemporaryDirectory() as tmp:
+        stages = run_benchmark(tmp, entries=300, pairs=2, latency=0, bandwidth=None)
+    assert list(stages) == STAGES
+    assert stages['discovery']['entries'] == 2 and stages['download']['entries'] == 2
+    for name in ('extract', 'convert', 'optimize', 'package', 'registry'):
+        assert stages[name]['entries'] == 600, name
+    for stats in stages.values():
+        assert stats['seconds'] > 0 and stats['bytes'] > 0 and stats['entries_per_s'] > 0
+        assert stats['peak_rss_mb'] is None or stats['peak_rss_mb'] > 0
+
+
+def test_runs_are_appended_to_the_history():
+    with tempfile.TemporaryDirectory() as tmp:
+        history = Path(tmp) / 'history.json'
+        args = ['--entries', '200', '--pairs', '1', '--latency', '0', '--history', str(history)]
+        assert bench_build.main(args) == 0 and bench_build.main(args + ['--json', str(Path(tmp) / 'run.json')]) == 0
+        runs = load_history(history)
+        latest = json.loads((Path(tmp) / 'run.json').read_text())
+    assert len(runs) == 2 and runs[-1] == latest
+    assert latest['params'] == {'entries': 200, 'pairs': 1, 'latency': 0.0, 'bandwidth': None}
+    assert compare({'convert': {'seconds': 2.0}}, {'convert': {'seconds': 3.0}}) == {'convert': 50.0}
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Build Benchmark Test', globals()))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test the content-addressed build cache and reproducible pack builds
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+from build_cache import BuildCache
+from build_packs import build_packs
+from stand_in_server import StandInServer
+from test_build_packs import sample_archive, source
+from testing import run_tests
+
+
+def build(server, out, cache=None):
+    sources = [source('eng-spa', server.url('/es.tar.gz')), source('spa-eng', server.url('/es.tar.gz'))]
+    built, failed = build_packs(sources, out, jobs=1, registry=False, cache=cache)
+    assert failed == {}
+    return {pair: metadata['sha256'] for pair, metadata in built.items()}
+
+
+def test_uncached_builds_are_byte_identical():
+    with tempfile.TemporaryDirectory() as tmp:
+        with StandInServer({'/es.tar.gz': sample_archive(tmp, 'es', 1200)}) as server:
+            first = build(server, Path(tmp) / 'a')
+            second = build(server, Path(tmp) / 'b')
+        assert first == second
+        assert (Path(tmp) / 'a' / 'eng-spa.json').read_bytes() == (Path(tmp) / 'b' / 'eng-spa.json').read_bytes()
+
+
+def test_unchanged_upstream_is_restored_without_downloading():
+    with tempfile.TemporaryDirectory() as tmp:
+        with StandInServer({'/es.tar.gz': sample_archive(tmp, 'es', 1200)}) as server:
+            cache = BuildCache(Path(tmp) / 'cache')
+            first = build(server, Path(tmp) / 'a', cache)
+            assert cache.hits == 0
+            downloaded = server.bytes_sent
+
+            cache = BuildCache(Path(tmp) / 'cache')
+            second = build(server, Path(tmp) / 'b', cache)
+            # Only a HEAD request went out
+            assert server.bytes_sent == downloaded
+            assert cache.hits == 2
+        assert first == second
+        assert (Path(tmp) / 'b' / 'spa-eng.sqlite.zip').exists()
+
+
+def test_converter_change_misses_the_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        with StandInServer({'/es.tar.gz': sample_archive(tmp, 'es', 1200)}) as server:
+            build(server, Path(tmp) / 'a', BuildCache(Path(tmp) / 'cache', version='v1'))
+            downloaded = server.bytes_sent
+
+            cache = BuildCache(Path(tmp) / 'cache', version='v2')
+            build(server, Path(tmp) / 'b', cache)
+            assert server.bytes_sent == 2 * downloaded
+            # One lookup per job: the downloaded archive is the one already looked up
+            assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_language_change_misses_and_leftovers_stay_out():
+    with tempfile.TemporaryDirectory() as tmp:
+        with StandInServer({'/es.tar.gz': sample_archive(tmp, 'es', 1200)}) as server:
+            out = Path(tmp) / 'a'
+            out.mkdir()
+            (out / 'eng-spa.delta.json.gz').write_bytes(b'old release')
+            cache = BuildCache(Path(tmp) / 'cache', version='v1')
+            build(server, out, cache)
+            assert not list((Path(tmp) / 'cache').glob('*/eng-spa.delta.json.gz'))
+
+            cache = BuildCache(Path(tmp) / 'cache', version='v1')
+            sources = [dict(source('eng-spa', server.url('/es.tar.gz')), language='es', gloss_language='en')]
+            built, failed = build_packs(sources, Path(tmp) / 'b', jobs=1, registry=False, cache=cache)
+            assert failed == {} and cache.hits == 0
+        assert built['eng-spa']['gloss_language'] == 'en'
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Build Cache Test', globals()))
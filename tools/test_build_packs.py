@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test the parallel pack builder against a local stand-in server
+"""
+
+import io
+import json
+import sqlite3
+import sys
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path
+
+from build_packs import BuildError, build_packs, plan_jobs, resolve_sources
+from sample_stardict import write_sample_stardict
+from stand_in_server import StandInServer
+from testing import run_tests
+
+
+def sample_archive(tmp, name, count):
+    entries = [(f"{name}{i:04d}", f"definition {i}") for i in range(count)]
+    src = write_sample_stardict(Path(tmp) / name, name, entries).parent
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+        for path in sorted(src.iterdir(), key=lambda p: p.suffix != '.ifo'):
+            tar.add(path, arcname=f"{name}/{path.name}")
+    return buffer.getvalue()
+
+
+def source(pair, url):
+    return {'pair': pair, 'source': 'wiktionary', 'url': url, 'size': '1MB', 'reason': 'test'}
+
+
+def test_pairs_sharing_an_archive_are_planned_once():
+    jobs = plan_jobs([source('eng-spa', 'u1'), source('spa-eng', 'u1'), source('eng-fra', 'u2')])
+    assert [len(job['sources']) for job in jobs] == [2, 1]
+
+
+def test_unknown_pairs_are_rejected():
+    try:
+        resolve_sources(['eng-xxx'])
+    except BuildError as e:
+        assert 'eng-xxx' in str(e)
+    else:
+        raise AssertionError('expected BuildError')
+    assert resolve_sources(['es-en'])[0]['url'].endswith('Spanish-English%20Wiktionary%20dictionary%20stardict.tar.gz')
+
+
+def test_builds_all_packs_and_registry_in_one_run():
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {'/es.tar.gz': sample_archive(tmp, 'es', 1200), '/fr.tar.gz': sample_archive(tmp, 'fr', 1500)}
+        with StandInServer(files) as server:
+            sources = [source('eng-spa', server.url('/es.tar.gz')), source('spa-eng', server.url('/es.tar.gz')),
+                       source('eng-fra', server.url('/fr.tar.gz'))]
+            out = Path(tmp) / 'out'
+            built, failed = build_packs(sources, out, jobs=2, work_root=tmp)
+            # Each archive is downloaded once
+            assert server.requests == 2
+        assert failed == {} and set(built) == {'eng-spa', 'spa-eng', 'eng-fra'}
+        assert built['eng-fra']['entries'] == 1500
+
+        with zipfile.ZipFile(out / 'spa-eng.sqlite.zip') as zf:
+            assert zf.namelist() == ['spa-eng.sqlite']
+            (Path(tmp) / 'x').mkdir()
+            zf.extractall(Path(tmp) / 'x')
+        conn = sqlite3.connect(Path(tmp) / 'x' / 'spa-eng.sqlite')
+        assert conn.execute('SELECT COUNT(*) FROM dict').fetchone()[0] == 1200
+        conn.close()
+
+        assert json.loads((out / 'eng-spa.json').read_text())['sha256'] == built['eng-spa']['sha256']
+        assert json.loads((out / 'eng-fra.report.json').read_text())['entries'] == 1500
+        registry = json.loads((out / 'registry.json').read_text())
+        assert sorted(p['id'] for p in registry['packs']) == ['eng-fra', 'eng-spa', 'spa-eng']
+        # Work directories are cleaned up
+        assert not [p for p in Path(tmp).iterdir() if p.name.startswith('polybook-build-')]
+
+
+def test_failed_download_is_reported_per_pair():
+    with tempfile.TemporaryDirectory() as tmp, StandInServer({}) as server:
+        built, failed = build_packs([source('eng-spa', server.url('/missing.tar.gz'))],
+                                    Path(tmp) / 'out', jobs=1, registry=False)
+        assert built == {} and list(failed) == ['eng-spa']
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Pack Builder Test', globals()))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test the content-addressed artifact store
+"""
+
+import hashlib
+import importlib
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from cas_store import ALIASES_FILE, CasStore, StoreError, blob_name, collapse, resolve
+from test_generate_registry import zip_pack
+from testing import run_tests
+
+registry_tool = importlib.import_module('generate-registry')
+# packRegistry.test.ts in the app reads a registry written by this scenario; keep their shapes in step
+APP_FIXTURE = Path(__file__).resolve().parent.parent / 'packages/app/src/__tests__/fixtures/generated-registry.json'
+
+
+def test_collapse_keeps_the_referenced_copy():
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        for name in ('en_dict.sqlite.gz', 'en-es_dict.sqlite.gz', 'es-en.sqlite.zip', 'test-download.zip'):
+            (directory / name).write_bytes(b'same bytes')
+        (directory / 'de-en.sqlite.zip').write_bytes(b'other bytes')
+        (directory / 'package-registry.json').write_text(json.dumps(
+            {'packages': {'en': {'url': '/dictionaries/en-es_dict.sqlite.gz'}}}))
+
+        dry = collapse(directory, dry_run=True)
+        assert (dry['files'], dry['blobs'], dry['bytes_saved']) == (5, 2, 30)
+        assert len(list(directory.iterdir())) == 6
+
+        summary = collapse(directory)
+        [group] = summary['collapsed']
+        # Referenced by the registry, even though en_dict is shorter
+        assert group['kept'] == 'en-es_dict.sqlite.gz' and summary['bytes_saved'] == 30
+        assert sorted(p.name for p in directory.iterdir()) == [ALIASES_FILE, 'de-en.sqlite.zip', 'en-es_dict.sqlite.gz',
+                                                               'package-registry.json']
+        assert resolve(directory, 'test-download.zip') == directory / 'en-es_dict.sqlite.gz'
+        assert resolve(directory, 'missing.zip') is None
+        # Nothing left to collapse; the aliases survive
+        assert collapse(directory)['bytes_saved'] == 0 and resolve(directory, 'en_dict.sqlite.gz')
+
+
+def test_identical_packs_are_registered_as_aliases_of_one_blob():
+    entries = [(f"w{i}", f"def {i}", []) for i in range(10)]
+    with tempfile.TemporaryDirectory() as tmp:
+        zip_path, _ = zip_pack(tmp, 'eng-spa', entries, metadata={'source': 'FreeDict'})
+        (Path(tmp) / 'eng-esp.sqlite.zip').write_bytes(zip_path.read_bytes())
+        (Path(tmp) / 'eng-esp.json').write_text(json.dumps({'source': 'Wiktionary'}))
+        zip_pack(tmp, 'eng-fra', entries[:5])
+        collapse(tmp)
+        registry, problems = registry_tool.generate_registry(tmp)
+        assert problems == []
+        packs = {pack['id']: pack for pack in registry['packs']}
+        assert sorted(packs) == ['eng-esp', 'eng-fra', 'eng-spa']
+        assert packs['eng-spa']['file'] == packs['eng-esp']['file'] == 'eng-esp.sqlite.zip'
+        assert packs['eng-spa']['blob'] == packs['eng-esp']['blob'] != packs['eng-fra']['blob']
+        # Each alias keeps its own metadata
+        assert (packs['eng-spa']['source'], packs['eng-esp']['source']) == ('FreeDict', 'Wiktionary')
+        digest = hashlib.sha256((Path(tmp) / 'eng-esp.sqlite.zip').read_bytes()).hexdigest()
+        assert packs['eng-spa']['blob'] == blob_name(digest, 'eng-spa.sqlite.zip') == f"sha256-{digest}.zip"
+        fixture = json.loads(APP_FIXTURE.read_text())['packs']
+        assert [(p['id'], p['file'], sorted(p)) for p in fixture] == \
+            [(p['id'], p['file'], sorted(p)) for p in registry['packs']]
+
+
+def test_store_holds_each_blob_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / 'packs'
+        source.mkdir()
+        for name in ('es-en.sqlite.zip', 'github-es-en.sqlite.zip', 'test-download.zip'):
+            (source / name).write_bytes(b'es-en pack')
+        (source / 'de-en.sqlite.zip').write_bytes(b'de-en pack')
+        store = CasStore(Path(tmp) / 'store')
+        summary = store.pack(source)
+        assert (summary['files'], summary['blobs'], summary['stored'], summary['reused']) == (4, 2, 2, 2)
+        assert len(list(store.blobs.iterdir())) == 2
+        assert store.resolve('test-download.zip').read_bytes() == b'es-en pack'
+
+        # A second run over the same artifacts stores nothing new
+        again = CasStore(Path(tmp) / 'store')
+        assert again.pack(source)['stored'] == 0
+        try:
+            again.resolve('fr-en.sqlite.zip')
+            assert False, 'unknown alias resolved'
+        except StoreError:
+            pass
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Content-Addressed Store Test', globals()))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the prefix completion index and its benchmark
+"""
+
+import gzip
+import random
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_completion import bench_pack, sample_prefixes
+from completion import COMPLETIONS, complete, heavy_prefixes, prefix_upper
+from pack_delta import apply, diff
+from packwriter import write_pack
+from testing import run_tests
+
+
+def words(count, seed=7):
+    rng = random.Random(seed)
+    return sorted({''.join(rng.choice('abcé') for _ in range(rng.randint(1, 6))) for _ in range(count)})
+
+
+def test_heavy_prefixes_match_a_brute_force_ranking():
+    keys = words(400)
+    rows = [(key, i + 1, (i * 7919) % 101) for i, key in enumerate(keys)]
+    stored = dict(heavy_prefixes(iter(rows), limit=5))
+    prefixes = {key[:n] for key in keys for n in range(1, len(key) + 1)}
+    for prefix in prefixes:
+        matches = [(rank, -i) for key, i, rank in rows if key.startswith(prefix)]
+        if len(matches) > 5:
+            assert stored[prefix] == [-i for _, i in sorted(matches, reverse=True)[:5]], prefix
+        else:
+            assert prefix not in stored
+    assert prefix_upper('ab') == 'ac' and 'abzzz' < prefix_upper('ab')
+
+
+def test_completions_are_ranked_and_read_a_bounded_range():
+    entries = [(f"Ho{word}", 'x' * (len(word) + 3) * 10, [f"ho{word}s"]) for word in words(300)]
+    entries += [('house', 'a building for people; a family; a household', []), ('hotel', 'an inn', [])]
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / 'pack.sqlite'
+        counts = write_pack(entries, out, completions=True, frequencies={'HOUSE': 900, 'hotel': 50, 'hôtel': 40})
+        assert counts['completion']['rank'] == 'frequency' and counts['completion']['prefixes'] > 0
+        conn = sqlite3.connect(out)
+        heavy, light = complete(conn, 'ho'), complete(conn, 'hou')
+        stored = conn.execute("SELECT 1 FROM completion WHERE prefix = 'ho'").fetchone()
+        plan = ' '.join(row[-1] for row in conn.execute(
+            'EXPLAIN QUERY PLAN SELECT lemma FROM entry JOIN entry_rank ON entry_rank.entry_id = entry.id '
+            "WHERE lemma_norm >= 'hou' AND lemma_norm < 'hov' ORDER BY rank DESC, id LIMIT 10"))
+        conn.close()
+        # Frequencies fold like lemmas; unknown words rank by lemma order
+        assert stored and heavy[:2] == ['house', 'hotel'] and len(heavy) == COMPLETIONS
+        assert light == ['house']
+        assert 'USING INDEX entry_lemma_norm' in plan and 'SCAN entry' not in plan, plan
+
+
+def test_indexed_packs_rebuild_from_a_changeset():
+    entries = [(f"w{word}", f"definition of {word}", []) for word in words(300)]
+    with tempfile.TemporaryDirectory() as tmp:
+        old, new, out = Path(tmp) / 'old.sqlite', Path(tmp) / 'new.sqlite', Path(tmp) / 'out.sqlite'
+        write_pack(entries, old, completions=True)
+        write_pack(entries[:-3] + [('wab', 'a much longer definition than the others', [])], new, completions=True)
+        apply(old, diff(old, new), out)
+        assert out.read_bytes() == new.read_bytes()
+
+
+def test_benchmark_runs_on_a_legacy_pack():
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = Path(tmp) / 'en-es_dict.sqlite'
+        conn = sqlite3.connect(legacy)
+        conn.execute('CREATE TABLE dict (lemma TEXT PRIMARY KEY, def TEXT NOT NULL, syns TEXT, examples TEXT)')
+        conn.executemany('INSERT INTO dict (lemma, def) VALUES (?, ?)',
+                         [(word, f"sense of {word}") for word in words(500)])
+        conn.commit()
+        conn.close()
+        packed = Path(tmp) / 'en-es_dict.sqlite.gz'
+        packed.write_bytes(gzip.compress(legacy.read_bytes()))
+        (Path(tmp) / 'work').mkdir()
+        result = bench_pack(packed, Path(tmp) / 'work', repeat=1)
+    assert result['entries'] == len(words(500)) and result['prefixes'] == len(sample_prefixes(words(500)))
+    assert set(result['methods']) == {'like', 'like_ranked', 'completion'}
+    assert 'SCAN dict' in result['methods']['like']['plan']
+    assert 'SEARCH completion' in result['methods']['completion']['plan']
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Completion Index Test', globals()))
@@ -5,43 +5,46 @@ Test StarDict to SQLite conversion using PyGlossary
 
 import os
 import sys
-import requests
 import tarfile
-import gzip
 import sqlite3
 from pathlib import Path
 
+from dictzip import DictzipReader
+from downloader import download
+from stardict import StarDict
+from stardict_archive import split_member
+
 def download_test_dict():
     """Download a small test dictionary"""
     url = "https://download.freedict.org/dictionaries/spa-eng/0.3.1/freedict-spa-eng-0.3.1.stardict.tar.xz"
     print(f"📥 Downloading test dictionary: spa-eng (small: ~0.1MB)")
     
-    response = requests.get(url)
-    response.raise_for_status()
-    
-    with open("test-dict.tar.xz", "wb") as f:
-        f.write(response.content)
+    # Streamed to disk in chunks; resumes if a previous run was interrupted
+    result = download(url, "test-dict.tar.xz")
     
-    print(f"✅ Downloaded {len(response.content)} bytes")
+    print(f"✅ Downloaded {result['bytes']} bytes (sha256 {result['sha256'][:12]}…)")
     return "test-dict.tar.xz"
 
 def extract_dict(archive_path):
-    """Extract StarDict archive"""
+    """Extract only the StarDict members of the archive (streaming read)"""
     print(f"📂 Extracting {archive_path}")
     
-    with tarfile.open(archive_path, 'r:xz') as tar:
-        tar.extractall()
-    
-    # Find the extracted directory
-    for item in os.listdir('.'):
-        if os.path.isdir(item) and item != '__pycache__':
-            print(f"📁 Found directory: {item}")
-            return item
+    dict_dir = None
+    with tarfile.open(archive_path, 'r|*') as tar:
+        for member in tar:
+            base, part = split_member(member.name)
+            if part is None or not member.isfile():
+                continue
+            tar.extract(member)
+            dict_dir = dict_dir or os.path.dirname(base) or '.'
     
-    raise Exception("No directory found after extraction")
+    if dict_dir is None:
+        raise Exception("No StarDict files found in archive")
+    print(f"📁 Found directory: {dict_dir}")
+    return dict_dir
 
 def prepare_stardict_files(dict_dir):
-    """Decompress and prepare StarDict files"""
+    """Check StarDict files and spot-check the dictzip data in place"""
     print(f"🔧 Preparing StarDict files in {dict_dir}")
     
     # Find the base name
@@ -52,35 +55,19 @@ def prepare_stardict_files(dict_dir):
     base_name = ifo_files[0].stem
     print(f"📖 Dictionary base name: {base_name}")
     
-    # Decompress files if needed
-    dict_dz = Path(dict_dir) / f"{base_name}.dict.dz"
-    idx_gz = Path(dict_dir) / f"{base_name}.idx.gz"
-    
-    if dict_dz.exists():
-        print(f"🗜️ Decompressing {dict_dz}")
-        with gzip.open(dict_dz, 'rb') as gz_file:
-            with open(Path(dict_dir) / f"{base_name}.dict", 'wb') as out_file:
-                out_file.write(gz_file.read())
-    
-    if idx_gz.exists():
-        print(f"🗜️ Decompressing {idx_gz}")
-        with gzip.open(idx_gz, 'rb') as gz_file:
-            with open(Path(dict_dir) / f"{base_name}.idx", 'wb') as out_file:
-                out_file.write(gz_file.read())
-    
-    # Verify all files exist
-    required_files = [
-        Path(dict_dir) / f"{base_name}.ifo",
-        Path(dict_dir) / f"{base_name}.idx", 
-        Path(dict_dir) / f"{base_name}.dict"
-    ]
-    
-    for file_path in required_files:
-        if not file_path.exists():
-            raise Exception(f"Missing required file: {file_path}")
+    # .dict.dz and .idx.gz are read as they are - no decompressed copies
+    stardict = StarDict(ifo_files[0])
+    for file_path in [ifo_files[0], stardict.idx_path, stardict.dict_path]:
         print(f"✅ Found: {file_path} ({file_path.stat().st_size} bytes)")
     
-    return str(Path(dict_dir) / f"{base_name}.ifo")
+    if stardict.dict_path.suffix == '.dz':
+        # Only the chunks holding the first entry are inflated
+        word, offset, size = next(stardict.iter_index())
+        with DictzipReader(stardict.dict_path) as reader:
+            definition = stardict.decode_definition(reader.read(offset, size))
+            print(f"🗜️ dictzip: {reader.chunk_count} chunks, spot check {word!r} -> {definition[:40]!r}")
+    
+    return str(ifo_files[0])
 
 def test_pyglossary_conversion(ifo_path, output_path):
     """Test PyGlossary conversion"""
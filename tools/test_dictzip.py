@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test random-access dictzip reading
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from dictzip import DictzipError, DictzipReader, write_dictzip
+from sample_stardict import write_sample_stardict
+from stardict import StarDict
+from testing import run_tests
+
+DATA = os.urandom(40 * 1024) + b'abcdefghij' * 10000
+
+
+def test_written_file_is_still_plain_gzip():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'd.dict.dz'
+        write_dictzip(DATA, path, chunk_length=4096)
+        assert gzip.decompress(path.read_bytes()) == DATA
+
+
+def test_reads_ranges_inflating_only_covering_chunks():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'd.dict.dz'
+        write_dictzip(DATA, path, chunk_length=4096)
+        with DictzipReader(path, cache_chunks=4) as reader:
+            assert reader.chunk_count == -(-len(DATA) // 4096)
+            assert reader.read(5000, 3000) == DATA[5000:8000]
+            assert reader.inflated == 1
+            # Spans a chunk boundary
+            assert reader.read(8000, 500) == DATA[8000:8500]
+            assert reader.inflated == 2
+            # Served from the LRU
+            assert reader.read(4096, 10) == DATA[4096:4106]
+            assert reader.inflated == 2
+            assert reader.read(len(DATA) - 5, 100) == DATA[-5:]
+
+
+def test_plain_gzip_is_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'd.dict.dz'
+        path.write_bytes(gzip.compress(DATA))
+        try:
+            DictzipReader(path)
+        except DictzipError:
+            pass
+        else:
+            raise AssertionError('expected DictzipError')
+
+
+def test_damaged_chunks_raise_dictzip_error():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'd.dict.dz'
+        write_dictzip(DATA, path, chunk_length=4096)
+        data = path.read_bytes()
+        corrupt, truncated = Path(tmp) / 'corrupt.dict.dz', Path(tmp) / 'truncated.dict.dz'
+        # The repetitive tail compresses into real deflate blocks (the random head is stored)
+        corrupt.write_bytes(data[:-300] + b'\xff' * 200 + data[-100:])
+        truncated.write_bytes(data[:len(data) // 2])
+        for damaged, problem in ((corrupt, 'is corrupt'), (truncated, 'is truncated')):
+            with DictzipReader(damaged) as reader:
+                try:
+                    reader.read(0, len(DATA))
+                except DictzipError as e:
+                    assert problem in str(e) and 'chunk' in str(e), e
+                else:
+                    raise AssertionError(f"{damaged.name} read")
+
+
+def test_stardict_reads_dictzip_data():
+    entries = [(f"palabra{i:04d}", f"word number {i}") for i in range(500)]
+    with tempfile.TemporaryDirectory() as tmp:
+        ifo = write_sample_stardict(tmp, 'es-en', entries, dictzip_chunk=512)
+        assert dict((lemma, d) for lemma, d, _ in StarDict(ifo).entries()) == dict(entries)
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Dictzip Test', globals()))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test the discovery engine, source plugin registry and per-host rate limiting
+"""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import discovery
+from discovery_sources import SOURCES, Source, register_source
+from http_probe import TokenBucket, UrlProber
+from stand_in_server import StandInServer
+from testing import run_tests
+
+
+class StandInSource(Source):
+    """Dictionaries served by a local stand-in server (set ``server`` first)"""
+
+    name = 'stand-in'
+    output_file = 'stand-in-scraped.json'
+    server = None
+
+    def discover(self, prober):
+        urls = {pair: self.server.url(f"/{pair}.tar.gz") for pair in ('es-en', 'fr-en', 'xx-en')}
+        sizes = prober.sizes(urls.values())
+        return {
+            pair: {
+                'pair': pair,
+                'lang1': {'code': pair[:2], 'name': pair[:2]},
+                'lang2': {'code': 'en', 'name': 'English'},
+                'source': self.name,
+                'url': url,
+                'size_mb': round(sizes[url] / (1024 * 1024), 1),
+                'type': 'bilingual'
+            }
+            for pair, url in urls.items() if sizes[url]
+        }
+
+
+def test_token_bucket_spaces_requests():
+    bucket = TokenBucket(rate=20, burst=2)
+    started = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # 2 banked tokens, then 4 more at 20/s
+    assert time.monotonic() - started >= 0.19
+
+
+def test_prober_applies_per_host_limit():
+    with StandInServer({'/a': b'a'}) as server:
+        with UrlProber(rate_limits={f"127.0.0.1:{server.port}": (10, 1)}) as prober:
+            started = time.monotonic()
+            results = prober.probe_many([server.url(f"/a?{i}") for i in range(5)])
+            assert time.monotonic() - started >= 0.39
+    # Distinct URLs (so none is deduplicated) that all reach the file
+    assert len(results) == 5 and server.requests == 5
+    assert all(result['ok'] and result['size_bytes'] == 1 for result in results.values()), results
+
+
+def test_run_discovery_writes_sources_and_registry():
+    files = {'/es-en.tar.gz': b'x' * 3 * 1024 * 1024, '/fr-en.tar.gz': b'y' * 1024 * 1024}
+    # Registered for this test only, so later discover() calls never see it
+    assert register_source(StandInSource) is StandInSource and SOURCES['stand-in'] is StandInSource
+    try:
+        with StandInServer(files) as server, tempfile.TemporaryDirectory() as tmp:
+            StandInSource.server = server
+            documents = discovery.run_discovery(['stand-in'], out_dir=tmp)
+            saved = json.loads((Path(tmp) / 'stand-in-scraped.json').read_text())
+            registry = json.loads((Path(tmp) / discovery.UNIFIED_REGISTRY_FILE).read_text())
+    finally:
+        SOURCES.pop('stand-in', None)
+        StandInSource.server = None
+
+    assert set(saved['dictionaries']) == {'es-en', 'fr-en'}
+    assert documents[discovery.UNIFIED_REGISTRY_FILE] == registry
+    assert registry['bilingual_dictionaries']['es-en']['size_mb'] == 3.0
+    assert registry['language_coverage']['en']['dictionaries'] == 2
+
+
+
+class FailingSource(StandInSource):
+    """Stands in for a source whose listing request fails (e.g. an API rate limit)"""
+
+    def discover(self, prober):
+        raise RuntimeError('GitHub 403 rate limit')
+
+
+def test_failed_source_keeps_its_previous_output():
+    assert register_source(FailingSource) is FailingSource
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            previous = {'dictionaries': {'es-en': {'pair': 'es-en', 'sha': 'abc123'}}}
+            output, registry = Path(tmp) / FailingSource.output_file, Path(tmp) / discovery.UNIFIED_REGISTRY_FILE
+            output.write_text(json.dumps(previous))
+            registry.write_text('{"previous": true}')
+            assert discovery.main(['--sources', 'stand-in', '--out-dir', tmp]) == 1
+            assert json.loads(output.read_text()) == previous
+            assert json.loads(registry.read_text()) == {'previous': True}
+    finally:
+        SOURCES.pop('stand-in', None)
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Discovery Engine Test', globals()))
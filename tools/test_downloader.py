@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test the resumable downloader against a local stand-in server
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import requests
+
+from downloader import DownloadError, Downloader
+from stand_in_server import StandInServer
+from testing import run_tests
+
+BODY = os.urandom(300 * 1024)
+SHA = hashlib.sha256(BODY).hexdigest()
+
+
+def test_stream_download_hashes_while_writing():
+    with StandInServer({'/dict.tar.xz': BODY}) as server, tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / 'dict.tar.xz'
+        result = Downloader(chunk_size=16 * 1024).download(server.url('/dict.tar.xz'), dest, sha256=SHA)
+        assert dest.read_bytes() == BODY
+        assert result['sha256'] == SHA and result['segments'] == 1 and not result['resumed']
+        assert not Path(str(dest) + '.part').exists()
+
+
+def test_interrupted_download_resumes_with_range():
+    with StandInServer({'/dict.tar.xz': BODY}) as server, tempfile.TemporaryDirectory() as tmp:
+        server.interrupt_next(after_bytes=100 * 1024)
+        dest = Path(tmp) / 'dict.tar.xz'
+        result = Downloader(chunk_size=16 * 1024).download(server.url('/dict.tar.xz'), dest, sha256=SHA)
+        assert result['resumed'] and server.range_requests == 1
+        assert dest.read_bytes() == BODY
+        # Only the missing tail (plus at most one partial chunk) was sent again
+        assert server.bytes_sent <= len(BODY) + 16 * 1024
+
+
+def test_large_files_use_parallel_segments():
+    with StandInServer({'/big.tar.gz': BODY}) as server, tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / 'big.tar.gz'
+        downloader = Downloader(chunk_size=16 * 1024, segments=4, segment_threshold=64 * 1024)
+        result = downloader.download(server.url('/big.tar.gz'), dest, sha256=SHA)
+        assert result['segments'] == 4 and server.range_requests == 4
+        assert dest.read_bytes() == BODY
+        assert not Path(str(dest) + '.part.json').exists()
+
+
+class _ShortSession(requests.Session):
+    """Range responses whose bodies end early without an error"""
+
+    def get(self, url, **kwargs):
+        response = super().get(url, **kwargs)
+        if response.status_code == 206:
+            full = response.iter_content
+            response.iter_content = lambda size: iter([next(full(size), b'')])
+        return response
+
+
+def test_short_segments_are_not_renamed_into_place():
+    with StandInServer({'/big.tar.gz': BODY}) as server, tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / 'big.tar.gz'
+        downloader = Downloader(session=_ShortSession(), chunk_size=16 * 1024, segments=4,
+                                segment_threshold=64 * 1024, retries=1)
+        try:
+            downloader.download(server.url('/big.tar.gz'), dest)
+        except DownloadError as e:
+            assert 'ended short' in str(e)
+        else:
+            raise AssertionError('expected DownloadError')
+        assert not dest.exists()
+        # Progress covers only the bytes that were written: a resume finishes the file
+        result = Downloader(chunk_size=16 * 1024, segments=4, segment_threshold=64 * 1024).download(
+            server.url('/big.tar.gz'), dest, sha256=SHA)
+        assert result['resumed'] and dest.read_bytes() == BODY
+
+
+def _etag(body):
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def test_partial_file_of_a_changed_upstream_is_discarded():
+    new_body = os.urandom(len(BODY))
+    with StandInServer({'/dict.tar.xz': new_body}) as server, tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / 'dict.tar.xz'
+        url = server.url('/dict.tar.xz')
+        Path(str(dest) + '.part').write_bytes(BODY[:100 * 1024])
+        Path(str(dest) + '.part.json').write_text(json.dumps({'url': url, 'validator': _etag(BODY)}))
+        result = Downloader(chunk_size=16 * 1024).download(url, dest)
+        assert dest.read_bytes() == new_body and not result['resumed'] and server.range_requests == 0
+
+
+def test_stale_part_longer_than_the_file_restarts():
+    with StandInServer({'/dict.tar.xz': BODY}) as server, tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / 'dict.tar.xz'
+        url = server.url('/dict.tar.xz')
+        Path(str(dest) + '.part').write_bytes(BODY + b'stale tail')
+        Path(str(dest) + '.part.json').write_text(json.dumps({'url': url, 'validator': _etag(BODY)}))
+        result = Downloader(chunk_size=16 * 1024).download(url, dest, sha256=SHA)
+        assert dest.read_bytes() == BODY and not result['resumed']
+
+
+def test_if_range_restarts_segments_when_the_file_changes():
+    new_body = os.urandom(len(BODY))
+    with StandInServer({'/big.tar.gz': BODY}) as server, tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / 'big.tar.gz'
+        url = server.url('/big.tar.gz')
+        downloader = Downloader(session=_ShortSession(), chunk_size=16 * 1024, segments=4,
+                                segment_threshold=64 * 1024, retries=0)
+        try:
+            downloader.download(url, dest)
+        except DownloadError:
+            pass
+        # Changes after the HEAD probe: only If-Range on the segment requests can notice
+        downloader = Downloader(chunk_size=16 * 1024, segments=4, segment_threshold=64 * 1024)
+        original_probe = downloader.session.head
+
+        def head_then_change(*args, **kwargs):
+            response = original_probe(*args, **kwargs)
+            server.files['/big.tar.gz'] = new_body
+            return response
+
+        downloader.session.head = head_then_change
+        result = downloader.download(url, dest)
+        assert dest.read_bytes() == new_body and not result['resumed']
+
+
+def test_server_without_ranges_falls_back_to_single_stream():
+    with StandInServer({'/big.tar.gz': BODY}, ranges=False) as server, tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / 'big.tar.gz'
+        result = Downloader(segments=4, segment_threshold=1).download(server.url('/big.tar.gz'), dest)
+        assert result['segments'] == 1 and result['sha256'] == SHA
+
+
+def test_checksum_mismatch_is_rejected():
+    with StandInServer({'/dict.tar.xz': BODY}) as server, tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / 'dict.tar.xz'
+        try:
+            Downloader().download(server.url('/dict.tar.xz'), dest, sha256='0' * 64)
+        except DownloadError as e:
+            assert 'mismatch' in str(e)
+        else:
+            raise AssertionError('expected DownloadError')
+        assert not dest.exists() and not Path(str(dest) + '.part').exists()
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Downloader Test', globals()))
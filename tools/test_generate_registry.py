@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test the parallel, introspecting registry generator
+"""
+
+import hashlib
+import importlib
+import json
+import sqlite3
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+from packwriter import PACK_SCHEMA_VERSION, write_pack
+from testing import run_tests
+
+registry_tool = importlib.import_module('generate-registry')
+
+
+def zip_pack(directory, pack_id, entries, language='es', metadata=None, compression=None):
+    sqlite_path = Path(directory) / f"{pack_id}.sqlite"
+    write_pack(entries, sqlite_path, language=language, compression=compression)
+    zip_path = Path(directory) / f"{pack_id}.sqlite.zip"
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.write(sqlite_path, sqlite_path.name)
+    size = sqlite_path.stat().st_size
+    sqlite_path.unlink()
+    if metadata is not None:
+        (Path(directory) / f"{pack_id}.json").write_text(json.dumps(metadata))
+    return zip_path, size
+
+
+def test_packs_are_hashed_and_introspected_in_place():
+    entries = [(f"w{i:04d}", f"def {i}", [f"a{i:04d}"]) for i in range(1500)]
+    with tempfile.TemporaryDirectory() as tmp:
+        packs = Path(tmp) / 'packs'
+        packs.mkdir()
+        zip_path, size = zip_pack(packs, 'spa-eng', entries, metadata={'source': 'wiktionary', 'entries': 0,
+                                                                      'gloss_language': 'en'})
+        cache = registry_tool.RegistryCache(Path(tmp) / 'cache' / 'registry.json')
+        registry, problems = registry_tool.generate_registry(packs, jobs=2, cache=cache)
+        [pack] = registry['packs']
+        assert problems == []
+        assert pack['sha256'] == hashlib.sha256(zip_path.read_bytes()).hexdigest()
+        # Counted from the database, not taken from the side JSON
+        assert pack['entries'] == 3000
+        assert (pack['schema_version'], pack['page_size'], pack['uncompressed_bytes']) == \
+            (PACK_SCHEMA_VERSION, 4096, size)
+        # The id's languages stay as named; what the pack records is listed beside them
+        assert (pack['source_language'], pack['target_language'], pack['source']) == ('spa', 'eng', 'wiktionary')
+        assert (pack['headword_language'], pack['gloss_language']) == ('es', 'en')
+        # Nothing was extracted or cached next to the pack
+        assert sorted(p.name for p in packs.iterdir()) == ['spa-eng.json', 'spa-eng.sqlite.zip']
+        assert (Path(tmp) / 'cache' / 'registry.json').exists()
+
+
+def test_unchanged_packs_come_from_the_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        for pack_id in ('eng-spa', 'eng-fra', 'eng-deu'):
+            zip_pack(tmp, pack_id, [(f"{pack_id}{i}", 'def', []) for i in range(10)])
+        cache = registry_tool.RegistryCache(Path(tmp) / 'registry-cache.json')
+        first, _ = registry_tool.generate_registry(tmp, cache=cache)
+        assert (cache.hits, cache.misses) == (0, 3)
+
+        zip_pack(tmp, 'eng-fra', [(f"x{i}", 'def', []) for i in range(20)])
+        cache = registry_tool.RegistryCache(Path(tmp) / 'registry-cache.json')
+        second, _ = registry_tool.generate_registry(tmp, cache=cache)
+        assert (cache.hits, cache.misses) == (2, 1)
+        entries = {pack['id']: pack['entries'] for pack in second['packs']}
+        assert entries == {'eng-deu': 10, 'eng-fra': 20, 'eng-spa': 10}
+
+
+def test_packs_without_entries_are_never_published():
+    with tempfile.TemporaryDirectory() as tmp:
+        zip_pack(tmp, 'eng-spa', [(f"w{i}", 'def', []) for i in range(10)])
+        zip_pack(tmp, 'eng-ita', [])
+        with zipfile.ZipFile(Path(tmp) / 'eng-fra.sqlite.zip', 'w') as zf:
+            zf.writestr('README.txt', 'not a pack')
+        (Path(tmp) / 'eng-deu.sqlite.zip').write_bytes(b'truncated')
+        with zipfile.ZipFile(Path(tmp) / 'bergamot-en-es.zip', 'w') as zf:
+            zf.writestr('model.bin', b'\0' * 16)
+        (Path(tmp) / 'bergamot-en-es.json').write_text(json.dumps({'type': 'translation'}))
+        output = Path(tmp) / 'registry.json'
+        status = registry_tool.main([tmp, '--output', str(output)])
+        registry = json.loads(output.read_text())
+        assert status == 1
+        assert [pack['id'] for pack in registry['packs']] == ['bergamot-en-es', 'eng-spa']
+        assert 'entries' not in registry['packs'][0]
+        assert all(pack.get('entries', 1) > 0 for pack in registry['packs'])
+
+
+def test_legacy_packs_report_their_own_schema_version():
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_path = Path(tmp) / 'eng-spa.sqlite'
+        conn = sqlite3.connect(sqlite_path)
+        conn.execute('CREATE TABLE dict (lemma TEXT PRIMARY KEY, def TEXT)')
+        conn.execute("INSERT INTO dict VALUES ('house', 'casa')")
+        conn.commit()
+        conn.close()
+        with zipfile.ZipFile(Path(tmp) / 'eng-spa.sqlite.zip', 'w') as zf:
+            zf.write(sqlite_path, sqlite_path.name)
+        sqlite_path.unlink()
+        registry, problems = registry_tool.generate_registry(tmp)
+        [pack] = registry['packs']
+        assert problems == []
+        assert (pack['entries'], pack['schema_version']) == (1, 0)
+
+
+def test_packs_record_a_codec_the_app_can_decode():
+    entries = [(f"w{i:04d}", f"a noun meaning thing number {i}", []) for i in range(200)]
+    with tempfile.TemporaryDirectory() as tmp:
+        zip_pack(tmp, 'eng-spa', entries, compression='deflate')
+        sqlite_path = Path(tmp) / 'eng-ita.sqlite'
+        write_pack(entries, sqlite_path, compression='deflate')
+        conn = sqlite3.connect(sqlite_path)
+        conn.execute('''UPDATE meta SET value = '{"codec": "zstd", "version": 1}' WHERE key = 'def_codec' ''')
+        conn.commit()
+        conn.close()
+        with zipfile.ZipFile(Path(tmp) / 'eng-ita.sqlite.zip', 'w') as zf:
+            zf.write(sqlite_path, sqlite_path.name)
+        sqlite_path.unlink()
+        registry, problems = registry_tool.generate_registry(tmp)
+    [pack] = registry['packs']
+    assert (pack['id'], pack['def_codec']) == ('eng-spa', 'deflate')
+    assert problems == ['eng-ita.sqlite.zip: the app cannot decode zstd definitions']
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Registry Generator Test', globals()))
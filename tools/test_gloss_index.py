@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test the FTS5 gloss index pack stage
+"""
+
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+from analyze_pack import analyze
+from gloss_index import gloss_text, match_query, search, tokenizer_for
+from pack_delta import apply, diff
+from packwriter import write_pack
+from testing import run_tests
+
+FILLER = [(f"w{i:05d}", f"<b>noun</b> filler sense number {i}", []) for i in range(2000)]
+
+
+def test_markup_is_stripped_and_tokenizers_follow_the_gloss_language():
+    assert gloss_text('<i>f</i> <b>house</b>,&nbsp;home &amp; hearth\n') == 'f house , home & hearth'
+    assert match_query('big "house"*') == '"big" "house"'
+    assert match_query(' 房屋 ', 'trigram') == '' and match_query('房屋，住', 'trigram') == '"房屋，住"'
+    assert tokenizer_for('en').startswith('porter')
+    assert tokenizer_for('zh') == 'trigram'
+    assert tokenizer_for('es') == tokenizer_for(None) == 'unicode61 remove_diacritics 2'
+
+
+def test_reverse_lookup_uses_the_index_and_its_size_is_reported():
+    entries = FILLER + [('casa', '<i>f</i> house, home', ['casas']), ('hogar', 'home, hearth', []),
+                        ('café', 'coffee; a café', [])]
+    with tempfile.TemporaryDirectory() as tmp:
+        with_index, without = Path(tmp) / 'a.sqlite', Path(tmp) / 'b.sqlite'
+        counts = write_pack(entries, with_index, fts=True, gloss_language='en', compression='deflate')
+        write_pack(entries, without, compression='deflate')
+        conn = sqlite3.connect(with_index)
+        found = {query: [lemma for lemma, _ in search(conn, query)] for query in ('houses', 'HOME', 'cafe')}
+        plan = ' '.join(row[-1] for row in conn.execute(
+            'EXPLAIN QUERY PLAN SELECT entry.lemma FROM gloss JOIN entry ON entry.id = gloss.rowid '
+            "WHERE gloss MATCH 'house'"))
+        conn.close()
+        # Stemmed and accent-folded; the markup never matches
+        assert found == {'houses': ['casa'], 'HOME': ['hogar', 'casa'], 'cafe': ['café']}
+        assert 'VIRTUAL TABLE INDEX' in plan and 'SCAN entry' not in plan, plan
+        assert 0 < counts['gloss_index']['bytes'] < with_index.stat().st_size - without.stat().st_size + 4096
+        assert analyze(with_index)['gloss_index_bytes'] == counts['gloss_index']['bytes']
+        assert 'gloss_index_bytes' not in analyze(without)
+
+
+def test_indexed_packs_stay_reproducible_and_delta_friendly():
+    with tempfile.TemporaryDirectory() as tmp:
+        old, new, out = Path(tmp) / 'old.sqlite', Path(tmp) / 'new.sqlite', Path(tmp) / 'out.sqlite'
+        write_pack(FILLER, old, fts=True, gloss_language='zh')
+        write_pack(FILLER + [('房子', '<b>房子</b> 房屋，住宅', [])], new, fts=True, gloss_language='zh')
+        changeset = diff(old, new)
+        assert changeset['target']['fts'] and changeset['target']['gloss_language'] == 'zh'
+        apply(old, changeset, out)
+        assert out.read_bytes() == new.read_bytes()
+        conn = sqlite3.connect(out)
+        assert [lemma for lemma, _ in search(conn, '住宅')] == []  # shorter than one trigram
+        assert [lemma for lemma, _ in search(conn, '房屋，住')] == ['房子']
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Gloss Index Test', globals()))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test the persistent HTTP validator cache against a local stand-in server
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+from http_cache import HttpCache
+from http_probe import UrlProber
+from stand_in_server import StandInServer
+from testing import run_tests
+
+REGISTRY = b'{"models": ["en-es", "es-en"]}'
+
+
+def test_fresh_entries_skip_the_network():
+    with tempfile.TemporaryDirectory() as tmp, StandInServer({'/models.json': REGISTRY}) as server:
+        cache = HttpCache(Path(tmp) / 'cache.sqlite', ttl=60)
+        with UrlProber(cache=cache) as prober:
+            assert prober.get_json(server.url('/models.json')) == {'models': ['en-es', 'es-en']}
+            assert prober.get_json(server.url('/models.json')) == {'models': ['en-es', 'es-en']}
+        assert server.requests == 1
+        assert cache.stats() == {'hits': 1, 'revalidated': 0, 'fetched': 1}
+
+
+def test_stale_entries_revalidate_with_304():
+    files = {'/models.json': REGISTRY, '/dict.tar.gz': b'x' * 4096}
+    with tempfile.TemporaryDirectory() as tmp, StandInServer(files) as server:
+        path = Path(tmp) / 'cache.sqlite'
+        with UrlProber(cache=HttpCache(path, ttl=0)) as prober:
+            prober.get_json(server.url('/models.json'))
+            prober.head(server.url('/dict.tar.gz'))
+        bytes_after_first_run = server.bytes_sent
+
+        # A second run (new process, same cache file) only revalidates
+        cache = HttpCache(path, ttl=0)
+        with UrlProber(cache=cache) as prober:
+            assert prober.get_json(server.url('/models.json'))['models'] == ['en-es', 'es-en']
+            assert prober.head(server.url('/dict.tar.gz'))['size_bytes'] == 4096
+        assert server.not_modified == 2
+        assert server.bytes_sent == bytes_after_first_run
+        assert cache.stats()['revalidated'] == 2
+
+
+def test_changed_upstream_replaces_entry():
+    with tempfile.TemporaryDirectory() as tmp, StandInServer({'/models.json': REGISTRY}) as server:
+        cache = HttpCache(Path(tmp) / 'cache.sqlite', ttl=0)
+        with UrlProber(cache=cache) as prober:
+            prober.get_json(server.url('/models.json'))
+            server.files['/models.json'] = b'{"models": []}'
+            time.sleep(0.01)
+            assert prober.get_json(server.url('/models.json')) == {'models': []}
+        assert server.not_modified == 0
+
+
+def test_revalidation_keeps_the_new_validators():
+    class NotModified:
+        status_code = 304
+        headers = {'ETag': '"v2"', 'Cache-Control': 'max-age=60', 'Content-Length': '0'}
+
+        def close(self):
+            pass
+
+    with tempfile.TemporaryDirectory() as tmp, StandInServer({'/models.json': REGISTRY}) as server:
+        cache = HttpCache(Path(tmp) / 'cache.sqlite', ttl=0)
+        with requests.Session() as session:
+            cache.get(session, server.url('/models.json'))
+        session = requests.Session()
+        session.request = lambda *args, **kwargs: NotModified()
+        response = cache.get(session, server.url('/models.json'))
+        assert response.revalidated and response.json() == {'models': ['en-es', 'es-en']}
+        stored = cache.get(session, server.url('/models.json')).headers
+        assert (stored['etag'], stored['cache-control']) == ('"v2"', 'max-age=60')
+        # The 304's own length does not describe the cached body
+        assert stored['content-length'] == str(len(REGISTRY))
+
+
+def test_dead_urls_are_not_fetched_again():
+    with tempfile.TemporaryDirectory() as tmp, StandInServer({}) as server:
+        cache = HttpCache(Path(tmp) / 'cache.sqlite', ttl=60)
+        with UrlProber(cache=cache) as prober:
+            assert prober.head(server.url('/gone.tar.gz'))['status'] == 404
+            assert prober.head(server.url('/gone.tar.gz'))['status'] == 404
+            try:
+                prober.get_json(server.url('/models.json'))
+            except requests.HTTPError as e:
+                assert e.response.status_code == 404
+            else:
+                assert False, 'a missing registry must raise'
+        assert server.requests == 2
+        assert cache.stats()['hits'] == 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('HTTP Cache Test', globals()))
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test the concurrent URL prober against a local stand-in server with latency
+"""
+
+import sys
+import time
+
+from http_probe import UrlProber
+from stand_in_server import StandInServer
+from testing import run_tests
+
+LATENCY = 0.2
+
+
+def make_files(count):
+    return {f"/dict-{i}.tar.gz": b'x' * (100 + i) for i in range(count)}
+
+
+def test_probe_many_is_concurrent_and_sized():
+    files = make_files(24)
+    with StandInServer(files, latency=LATENCY) as server:
+        urls = [server.url(path) for path in files]
+        started = time.monotonic()
+        with UrlProber(max_workers=16, per_host=8) as prober:
+            results = prober.probe_many(urls)
+        elapsed = time.monotonic() - started
+
+    assert list(results) == urls
+    for path, body in files.items():
+        result = results[server.url(path)]
+        assert result['ok'] and result['size_bytes'] == len(body)
+    # 24 round trips serially would take 4.8s; 8 in flight takes ~0.6s
+    assert elapsed < len(urls) * LATENCY / 3
+    assert server.max_concurrent <= 8
+
+
+def test_per_host_cap_and_connection_reuse():
+    files = make_files(12)
+    with StandInServer(files, latency=0.05) as server:
+        with UrlProber(max_workers=16, per_host=3) as prober:
+            prober.probe_many([server.url(path) for path in files])
+        assert server.max_concurrent <= 3
+        # Keep-alive: 12 requests served over at most 3 pooled connections
+        assert server.requests == 12
+        assert len(server.connections) <= 3
+
+
+def test_missing_and_unreachable_urls():
+    with StandInServer({'/present': b'abc'}) as server:
+        with UrlProber() as prober:
+            results = prober.probe_many([server.url('/present'), server.url('/missing')])
+            down = prober.head('http://127.0.0.1:9/unreachable')
+
+    assert results[server.url('/present')]['size_bytes'] == 3
+    assert results[server.url('/missing')]['status'] == 404
+    assert results[server.url('/missing')]['size_bytes'] is None
+    assert not down['ok'] and down['error']
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('URL Prober Test', globals()))
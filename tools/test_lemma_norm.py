@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Test lemma lookup-key normalization
+"""
+
+import json
+import sys
+
+from lemma_norm import normalize, normalizer, rules_for, rules_json
+from testing import run_tests
+
+
+def test_case_folding_beyond_ascii():
+    assert normalize('ÉCOLE') == normalize('école') == 'école'
+    assert normalize('Ñandú') == 'ñandú'
+    assert normalize('Straße') == normalize('STRASSE') == 'strasse'
+    assert normalize('ΟΔΟΣ') == normalize('οδος')
+    # Decomposed input folds to the same key as precomposed
+    assert normalize('Café') == normalize('café')
+
+
+def test_language_rules_strip_only_their_marks():
+    russian = normalizer(rules_for('ru'))
+    assert russian('Молоко́') == 'молоко'
+    assert russian('ёж') == 'ёж'
+    arabic = normalizer(rules_for('ar'))
+    assert arabic('كَتَبَ') == 'كتب'
+    # Latin-script languages keep their accents: año is not ano
+    assert normalizer(rules_for('es'))('año') != 'ano'
+    assert normalizer(rules_for('es', strip_marks='́'))('está') == 'esta'
+    assert json.loads(rules_json(rules_for('ru'))) == rules_for('ru')
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Lemma Normalization Test', globals()))
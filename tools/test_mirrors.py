@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test hedged multi-mirror fetching against local stand-in servers
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+
+from downloader import DownloadError
+from mirrors import HedgedFetcher, MirrorStats, expand_mirrors, fetch
+from stand_in_server import StandInServer
+from testing import run_tests
+
+BODY = os.urandom(200 * 1024)
+SHA = hashlib.sha256(BODY).hexdigest()
+
+
+def test_github_mirrors_are_expanded_both_ways():
+    raw = 'https://raw.githubusercontent.com/Vuizur/Wiktionary-Dictionaries/master/a%20b.tar.gz'
+    github = 'https://github.com/Vuizur/Wiktionary-Dictionaries/raw/master/a%20b.tar.gz'
+    assert expand_mirrors([raw]) == [raw, github]
+    assert expand_mirrors([github, raw]) == [github, raw]
+    assert expand_mirrors(['https://download.freedict.org/x.tar.xz']) == ['https://download.freedict.org/x.tar.xz']
+
+
+def test_slow_mirror_is_hedged_and_fast_one_wins():
+    with StandInServer({'/d.tar.gz': BODY}, latency=3.0) as slow, \
+            StandInServer({'/d.tar.gz': BODY}) as fast, \
+            tempfile.TemporaryDirectory() as tmp:
+        stats = MirrorStats(Path(tmp) / 'stats.json')
+        fetcher = HedgedFetcher(stats=stats, hedge_after=0.2, probe_bytes=64 * 1024, chunk_size=16 * 1024)
+        dest = Path(tmp) / 'd.tar.gz'
+        started = time.monotonic()
+        result = fetcher.fetch([slow.url('/d.tar.gz'), fast.url('/d.tar.gz')], dest, sha256=SHA)
+        assert time.monotonic() - started < 2.5
+        assert result['url'] == fast.url('/d.tar.gz')
+        assert result['mirrors_tried'] == [slow.url('/d.tar.gz'), fast.url('/d.tar.gz')]
+        assert dest.read_bytes() == BODY
+        assert sorted(p.name for p in Path(tmp).iterdir()) == ['d.tar.gz', 'stats.json']
+
+        # The next run starts with the mirror that was measured fastest
+        remembered = MirrorStats(Path(tmp) / 'stats.json')
+        assert remembered.rank([slow.url('/d.tar.gz'), fast.url('/d.tar.gz')])[0] == fast.url('/d.tar.gz')
+
+
+def test_winner_is_finished_with_a_range_request():
+    with StandInServer({'/d.tar.gz': BODY}) as server, tempfile.TemporaryDirectory() as tmp:
+        fetcher = HedgedFetcher(stats=MirrorStats(Path(tmp) / 'stats.json'), probe_bytes=64 * 1024,
+                                chunk_size=16 * 1024)
+        dest = Path(tmp) / 'd.tar.gz'
+        result = fetcher.fetch([server.url('/d.tar.gz')], dest, sha256=SHA)
+        assert (result['bytes'], result['sha256']) == (len(BODY), SHA)
+        assert dest.read_bytes() == BODY and server.range_requests == 1
+        assert sorted(p.name for p in Path(tmp).iterdir()) == ['d.tar.gz', 'stats.json']
+
+
+def test_interrupted_download_resumes_instead_of_racing():
+    with StandInServer({'/d.tar.gz': BODY}) as first, StandInServer({'/d.tar.gz': BODY}) as second, \
+            tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / 'd.tar.gz'
+        Path(str(dest) + '.part').write_bytes(BODY[:50000])
+        etag = f'"{hashlib.sha1(BODY).hexdigest()}"'
+        Path(str(dest) + '.part.json').write_text(json.dumps({'url': second.url('/d.tar.gz'), 'validator': etag}))
+        fetcher = HedgedFetcher(stats=MirrorStats(Path(tmp) / 'stats.json'))
+        result = fetcher.fetch([first.url('/d.tar.gz'), second.url('/d.tar.gz')], dest, sha256=SHA)
+        assert result['resumed'] and result['mirrors_tried'] == [second.url('/d.tar.gz')]
+        assert dest.read_bytes() == BODY
+        assert first.requests == 0 and second.range_requests == 1
+
+
+def test_fast_first_mirror_needs_no_hedge():
+    with StandInServer({'/d.tar.gz': BODY}) as fast, \
+            StandInServer({'/d.tar.gz': BODY}) as spare, \
+            tempfile.TemporaryDirectory() as tmp:
+        fetcher = HedgedFetcher(stats=MirrorStats(Path(tmp) / 'stats.json'), hedge_after=5.0)
+        result = fetcher.fetch([fast.url('/d.tar.gz'), spare.url('/d.tar.gz')], Path(tmp) / 'd.tar.gz')
+        assert result['mirrors_tried'] == [fast.url('/d.tar.gz')]
+        assert spare.requests == 0
+
+
+def test_failing_mirror_falls_through_to_next():
+    with StandInServer({}) as broken, StandInServer({'/d.tar.gz': BODY}) as good, \
+            tempfile.TemporaryDirectory() as tmp:
+        stats = MirrorStats(Path(tmp) / 'stats.json')
+        fetcher = HedgedFetcher(stats=stats, hedge_after=5.0)
+        result = fetcher.fetch([broken.url('/d.tar.gz'), good.url('/d.tar.gz')], Path(tmp) / 'd.tar.gz', sha256=SHA)
+        assert result['url'] == good.url('/d.tar.gz')
+        assert stats.hosts[MirrorStats.key(broken.url('/'))]['failures'] == 1
+
+
+def test_mirror_with_other_bytes_is_dropped():
+    with StandInServer({'/d.tar.gz': BODY[::-1]}) as corrupt, StandInServer({'/d.tar.gz': BODY}) as good, \
+            tempfile.TemporaryDirectory() as tmp:
+        stats = MirrorStats(Path(tmp) / 'stats.json')
+        fetcher = HedgedFetcher(stats=stats, hedge_after=5.0)
+        dest = Path(tmp) / 'd.tar.gz'
+        result = fetcher.fetch([corrupt.url('/d.tar.gz'), good.url('/d.tar.gz')], dest, sha256=SHA)
+        assert (result['url'], result['sha256']) == (good.url('/d.tar.gz'), SHA)
+        assert result['mirrors_tried'] == [corrupt.url('/d.tar.gz'), good.url('/d.tar.gz')]
+        assert dest.read_bytes() == BODY and corrupt.requests == 1
+        assert stats.hosts[MirrorStats.key(corrupt.url('/'))]['failures'] == 1
+
+
+def test_all_mirrors_failing_raises():
+    with StandInServer({}) as broken, tempfile.TemporaryDirectory() as tmp:
+        fetcher = HedgedFetcher(stats=MirrorStats(Path(tmp) / 'stats.json'), hedge_after=0.1)
+        try:
+            fetcher.fetch([broken.url('/d.tar.gz')], Path(tmp) / 'd.tar.gz')
+        except DownloadError as e:
+            assert 'All mirrors failed' in str(e)
+        else:
+            raise AssertionError('expected DownloadError')
+
+
+def test_concurrent_fetches_keep_every_hosts_stats():
+    with ExitStack() as stack, tempfile.TemporaryDirectory() as tmp:
+        servers = [stack.enter_context(StandInServer({'/d.tar.gz': BODY})) for _ in range(6)]
+        stats = MirrorStats(Path(tmp) / 'stats.json')
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(
+                lambda i: fetch([servers[i].url('/d.tar.gz')], Path(tmp) / f"d{i}.tar.gz", sha256=SHA, stats=stats),
+                range(len(servers))))
+        assert [r['sha256'] for r in results] == [SHA] * len(servers)
+        remembered = MirrorStats(Path(tmp) / 'stats.json')
+        assert sorted(remembered.hosts) == sorted(MirrorStats.key(s.url('/')) for s in servers)
+        assert all(host['samples'] == 1 for host in remembered.hosts.values())
+        assert not (Path(tmp) / 'stats.json.tmp').exists()
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Mirror Fetching Test', globals()))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test row-level changesets between pack versions
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from build_packs import build_packs
+from pack_delta import DeltaError, apply, diff, make_delta, read_changeset
+from packwriter import write_pack
+from stand_in_server import StandInServer
+from test_build_packs import sample_archive, source
+from testing import run_tests
+
+
+def entries(count, changed=()):
+    rows = []
+    for i in range(count):
+        definition = f"updated definition {i}" if i in changed else f"a definition with usage notes {i}"
+        rows.append((f"w{i:05d}", definition, [f"w{i:05d}s"]))
+    return rows
+
+
+def test_changeset_lists_row_changes_and_rebuilds_the_new_pack():
+    old_rows = entries(3000)
+    new_rows = entries(3000, changed={7, 2500})[1:] + [('zzz', 'a new word', ['zzzs']),
+                                                       ('w00010s', 'now a headword', [])]
+    del new_rows[41]
+    with tempfile.TemporaryDirectory() as tmp:
+        old, new, out = Path(tmp) / 'old.sqlite', Path(tmp) / 'new.sqlite', Path(tmp) / 'out.sqlite'
+        write_pack(old_rows, old, language='es')
+        write_pack(new_rows, new, language='es')
+        changeset = diff(old, new)
+        assert changeset['entries'] == {
+            'insert': [['w00010s', 'now a headword'], ['zzz', 'a new word']],
+            'update': [['w00007', 'updated definition 7'], ['w02500', 'updated definition 2500']],
+            'delete': ['w00000', 'w00042'],
+        }
+        assert changeset['aliases'] == {'insert': [['zzzs', 'zzz']], 'update': [],
+                                        'delete': ['w00000s', 'w00010s', 'w00042s']}
+        assert changeset['target']['language'] == 'es'
+        apply(old, changeset, out)
+        assert out.read_bytes() == new.read_bytes()
+
+
+def test_compressed_packs_round_trip_and_the_base_is_checked():
+    with tempfile.TemporaryDirectory() as tmp:
+        old, new, other = Path(tmp) / 'old.sqlite', Path(tmp) / 'new.sqlite', Path(tmp) / 'other.sqlite'
+        write_pack(entries(3000), old, compression='deflate')
+        write_pack(entries(3000, changed={1, 2, 3}), new, compression='deflate')
+        write_pack(entries(2000), other)
+        delta = make_delta(old, new, Path(tmp) / 'new.delta.json.gz')
+        assert delta['changes']['entries'] == {'insert': 0, 'update': 3, 'delete': 0}
+        # Three changed rows cost a few hundred bytes, not the whole pack
+        assert delta['bytes'] < 1000 < new.stat().st_size
+        try:
+            apply(other, read_changeset(Path(tmp) / 'new.delta.json.gz'), Path(tmp) / 'out.sqlite')
+        except DeltaError as e:
+            assert "not the changeset's base" in str(e)
+        else:
+            raise AssertionError('expected DeltaError')
+
+
+def test_builder_publishes_deltas_against_the_previous_release():
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {'/v1.tar.gz': sample_archive(tmp, 'es', 1200), '/v2.tar.gz': sample_archive(tmp, 'es', 1210)}
+        with StandInServer(files) as server:
+            previous, _ = build_packs([source('eng-spa', server.url('/v1.tar.gz'))], Path(tmp) / 'v1', jobs=1,
+                                      registry=False)
+            built, failed = build_packs([source('eng-spa', server.url('/v2.tar.gz'))], Path(tmp) / 'v2', jobs=1,
+                                        previous_dir=Path(tmp) / 'v1', previous_version='packs-1')
+        assert failed == {}
+        delta = built['eng-spa']['delta']
+        assert delta['base_sha256'] == previous['eng-spa']['sha256'] and delta['base_version'] == 'packs-1'
+        assert delta['changes']['entries'] == {'insert': 10, 'update': 0, 'delete': 0}
+        assert delta['bytes'] < built['eng-spa']['bytes']
+        registry = json.loads((Path(tmp) / 'v2' / 'registry.json').read_text())
+        assert registry['packs'][0]['delta']['sha256'] == delta['sha256']
+
+        changeset = read_changeset(Path(tmp) / 'v2' / delta['file'])
+        apply(Path(tmp) / 'v1' / 'eng-spa.sqlite.zip', changeset, Path(tmp) / 'rebuilt.sqlite')
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Pack Delta Test', globals()))
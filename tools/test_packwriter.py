@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test the bulk SQLite pack writer
+"""
+
+import json
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+from lemma_norm import normalizer
+from packwriter import PackWriter, write_pack
+from testing import run_tests
+
+ENTRIES = [
+    ('perro', 'dog', ['perros']),
+    ('casa', 'house', ['casas', 'hogar']),
+    ('banco', 'bank', []),
+    ('banco', 'bench', []),
+    ('hogar', 'home', []),
+    ('  ', 'empty lemma', []),
+]
+
+
+def test_schema_is_entry_and_alias_behind_a_dict_view():
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / 'pack.sqlite'
+        write_pack(ENTRIES, out)
+        conn = sqlite3.connect(out)
+        views = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'view'")]
+        alias_sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'alias'").fetchone()[0]
+        indexes = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+        tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        lemmas = [r[0] for r in conn.execute('SELECT lemma FROM entry ORDER BY id')]
+        conn.close()
+        assert views == ['dict']
+        assert 'WITHOUT ROWID' in alias_sql
+        assert sorted(indexes) == ['alias_form_norm', 'entry_lemma_norm', 'sqlite_autoindex_entry_1']
+        assert sorted(tables) == ['alias', 'entry', 'meta', 'sqlite_stat1']
+        # entry is stored in lemma order even though it keeps its integer rowid
+        assert lemmas == sorted(lemmas)
+
+
+def test_rows_merge_duplicates_and_aliases():
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / 'pack.sqlite'
+        counts = write_pack(ENTRIES, out)
+        assert counts == {'headwords': 5, 'synonyms': 3, 'skipped': 1, 'entries': 6,
+                          'reasons': {'empty headword': 1}, 'merged': 1, 'aliases': 2}
+        conn = sqlite3.connect(out)
+        rows = dict(conn.execute('SELECT lemma, def FROM dict'))
+        lemmas = [r[0] for r in conn.execute('SELECT lemma FROM entry ORDER BY id')]
+        aliases = conn.execute('SELECT form, lemma FROM alias JOIN entry ON entry.id = entry_id').fetchall()
+        conn.close()
+        # Definitions are stored once, in lemma order; forms only point at them
+        assert lemmas == ['banco', 'casa', 'hogar', 'perro']
+        assert sorted(aliases) == [('casas', 'casa'), ('perros', 'perro')]
+        assert rows['banco'] == 'bank\nbench'
+        assert rows['casas'] == 'house'
+        # An alias never overrides a real headword
+        assert rows['hogar'] == 'home'
+
+
+def test_duplicate_definitions_keep_input_order_across_batches():
+    senses = [f"sense {i:02d} {'zyxwvutsrq'[i % 10]}" for i in range(40)][::-1]
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / 'pack.sqlite'
+        writer = PackWriter(out, batch_size=7)
+        for i, sense in enumerate(senses):
+            writer.add('banco', sense)
+            writer.add(f"w{i:02d}", 'filler')
+        writer.close()
+        conn = sqlite3.connect(out)
+        [(definition,)] = conn.execute("SELECT def FROM dict WHERE lemma = 'banco'").fetchall()
+        conn.close()
+    assert definition.split('\n') == senses
+
+
+def test_inflected_forms_do_not_copy_definitions():
+    definition = 'a long definition with examples and usage notes ' * 8
+    entries = [(f"w{i:05d}", f"{definition}{i}", [f"w{i:05d}-{j}" for j in range(5)]) for i in range(3000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        with_forms, headwords_only = Path(tmp) / 'a.sqlite', Path(tmp) / 'b.sqlite'
+        counts = write_pack(entries, with_forms)
+        write_pack([(lemma, d, []) for lemma, d, _ in entries], headwords_only)
+        assert counts['entries'] == 18000 and counts['aliases'] == 15000
+        # Five forms per entry cost far less than five more copies of each definition
+        assert with_forms.stat().st_size < 2 * headwords_only.stat().st_size
+
+
+def test_small_batches_and_repeat_builds_are_byte_identical():
+    entries = [(f"w{i:05d}", f"def {i}", [f"a{i:05d}"]) for i in range(2000, 0, -1)]
+    with tempfile.TemporaryDirectory() as tmp:
+        first, second = Path(tmp) / 'a.sqlite', Path(tmp) / 'b.sqlite'
+        with PackWriter(first, batch_size=100) as writer:
+            for lemma, definition, synonyms in entries:
+                writer.add(lemma, definition, synonyms)
+        write_pack(entries, second)
+        assert first.read_bytes() == second.read_bytes()
+
+
+def test_case_and_accent_insensitive_lookup_is_an_index_probe():
+    entries = [('Élan', 'momentum', []), ('молоко́', 'milk', []), ('Straße', 'street', ['Strasse'])]
+    entries += [(f"w{i:05d}", f"def {i}", [f"a{i:05d}"]) for i in range(2000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / 'pack.sqlite'
+        write_pack(entries, out, language='ru')
+        conn = sqlite3.connect(out)
+        rules = json.loads(conn.execute("SELECT value FROM meta WHERE key = 'lemma_norm'").fetchone()[0])
+        normalize = normalizer(rules)
+        query = 'SELECT lemma, def FROM dict WHERE lemma_norm = ? ORDER BY lemma = ? DESC LIMIT 1'
+        plan = ' '.join(row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + query, ('x', 'x')))
+        found = {word: conn.execute(query, (normalize(word), word)).fetchone()
+                 for word in ('élan', 'ÉLAN', 'молоко', 'STRASSE', 'Strasse')}
+        conn.close()
+        assert 'entry USING INDEX entry_lemma_norm' in plan and 'alias USING INDEX alias_form_norm' in plan, plan
+        assert found['élan'] == found['ÉLAN'] == ('Élan', 'momentum')
+        assert found['молоко'] == ('молоко́', 'milk')
+        # Both spellings fold together; an exact match wins
+        assert found['Strasse'] == ('Strasse', 'street') and found['STRASSE'][1] == 'street'
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Pack Writer Test', globals()))
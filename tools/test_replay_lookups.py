@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test the lookup replay harness
+"""
+
+import sqlite3
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+from packwriter import write_pack
+from replay_lookups import book_tokens, page_counter, replay, sanitize
+from testing import run_tests
+
+BOOK = 'The house, "the HOUSE"! Casa? — ¿Qué? cat-like dog\n'
+
+
+def write_book(path):
+    Path(path).write_text(BOOK, encoding='utf-8')
+    return path
+
+
+def write_epub(path):
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('mimetype', 'application/epub+zip')
+        zf.writestr('META-INF/container.xml',
+                    '<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+                    '<rootfile full-path="OEBPS/content.opf"/></rootfiles></container>')
+        zf.writestr('OEBPS/content.opf',
+                    '<package xmlns="http://www.idpf.org/2007/opf"><manifest>'
+                    '<item id="b" href="text/b.xhtml"/><item id="a" href="text/a.xhtml"/></manifest>'
+                    '<spine><itemref idref="a"/><itemref idref="b"/></spine></package>')
+        zf.writestr('OEBPS/text/a.xhtml', '<html><head><title>Skipped</title></head>'
+                                          '<body><p>The house</p><style>p {}</style></body></html>')
+        zf.writestr('OEBPS/text/b.xhtml', '<html><body><p>cat-like<br/>dog</p></body></html>')
+    return path
+
+
+def test_tokens_are_cleaned_like_the_app():
+    # JavaScript's \w is ASCII-only, so the app drops accented letters too
+    assert [sanitize(token) for token in BOOK.split()] == \
+        ['the', 'house', 'the', 'house', 'casa', '', 'qu', 'cat-like', 'dog']
+    with tempfile.TemporaryDirectory() as tmp:
+        epub = write_epub(Path(tmp) / 'book.epub')
+        assert book_tokens(epub) == ['The', 'house', 'cat-like', 'dog']
+
+
+def test_indexed_pack_hits_without_scans():
+    with tempfile.TemporaryDirectory() as tmp:
+        pack = Path(tmp) / 'en-es.sqlite'
+        write_pack([('house', 'casa', ['houses', 'housed']), ('The', 'el, la', []), ('dog', 'perro', ['dogs']),
+                    ('cat', 'gato', ['cats'])], pack, language='en')
+        result = replay(pack, write_book(Path(tmp) / 'book.txt'))
+    assert result['tokens'] == 9 and result['skipped'] == 1 and result['lookups'] == 8
+    assert result['stages']['dict']['hits'] == 5 and result['hit_rate'] == 0.625
+    assert 'SEARCH' in result['stages']['dict']['plan'] and result['full_scans'] == []
+    assert not result['stages']['word']['available']
+    latency = result['latency_us']
+    assert 0 < latency['p50'] <= latency['p95'] <= latency['p99']
+    assert result['pages'] is None or result['pages']['max'] > 0
+
+
+def test_unchecked_connections_report_no_pages():
+    class Wrapped(sqlite3.Connection):
+        pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pack = Path(tmp) / 'empty.sqlite'
+        conn = sqlite3.connect(pack, factory=Wrapped)
+        try:
+            assert page_counter(conn, pack) is None
+        finally:
+            conn.close()
+
+
+def test_legacy_pack_falls_through_and_flags_scans():
+    with tempfile.TemporaryDirectory() as tmp:
+        pack = Path(tmp) / 'legacy.sqlite'
+        conn = sqlite3.connect(pack)
+        conn.execute('CREATE TABLE dict (lemma TEXT PRIMARY KEY, def TEXT)')
+        conn.execute('CREATE TABLE word (w TEXT, m TEXT)')
+        conn.executemany('INSERT INTO dict VALUES (?, ?)', [('house', 'casa')])
+        conn.executemany('INSERT INTO word VALUES (?, ?)', [('dog', 'perro')])
+        conn.commit()
+        conn.close()
+        result = replay(pack, write_book(Path(tmp) / 'book.txt'))
+    stages = result['stages']
+    assert stages['dict']['hits'] == 2 and stages['word']['hits'] == 1
+    # A missing translation table skips simple_translation too, as in the app
+    assert stages['translation']['queries'] == 6 and stages['simple_translation']['queries'] == 0
+    assert stages['word']['queries'] == 6
+    # Neither the BINARY primary key nor the unindexed word table serves NOCASE probes
+    assert result['full_scans'] == ['dict', 'word']
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Lookup Replay Test', globals()))
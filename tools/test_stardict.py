@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test the native StarDict reader and SQLite pack converter
+"""
+
+import json
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+from sample_stardict import write_sample_stardict
+import stardict
+from stardict import StarDict, StarDictError, convert
+from testing import run_tests
+
+ENTRIES = [
+    ('casa', 'house; home'),
+    ('perro', 'dog'),
+    ('ñandú', 'rhea'),
+    ('libro', 'book'),
+]
+
+
+def test_reads_32_and_64_bit_indexes():
+    for bits in (32, 64):
+        with tempfile.TemporaryDirectory() as tmp:
+            ifo = write_sample_stardict(tmp, 'es-en', ENTRIES, offset_bits=bits)
+            entries = {lemma: definition for lemma, definition, _ in StarDict(ifo).entries()}
+            assert entries == dict(ENTRIES), bits
+
+
+def test_gzipped_index_and_synonyms():
+    with tempfile.TemporaryDirectory() as tmp:
+        ifo = write_sample_stardict(tmp, 'es-en', ENTRIES, synonyms={'casas': 'casa', 'perros': 'perro'},
+                                    gzip_idx=True)
+        synonyms = {lemma: syns for lemma, _, syns in StarDict(ifo).entries()}
+        assert synonyms['casa'] == ['casas'] and synonyms['perro'] == ['perros'] and synonyms['libro'] == []
+
+
+def test_truncated_synonyms_raise_stardict_error():
+    with tempfile.TemporaryDirectory() as tmp:
+        ifo = write_sample_stardict(tmp, 'es-en', ENTRIES, synonyms={'casas': 'casa', 'perros': 'perro'})
+        syn = ifo.with_suffix('.syn')
+        syn.write_bytes(syn.read_bytes()[:-3])
+        try:
+            StarDict(ifo).synonyms()
+        except StarDictError as e:
+            assert 'Truncated synonym entry' in str(e)
+        else:
+            raise AssertionError('expected StarDictError')
+
+
+def test_damaged_dictzip_raises_stardict_error():
+    entries = [(f"palabra{i:04d}", f"word number {i} " * 20) for i in range(300)]
+    with tempfile.TemporaryDirectory() as tmp:
+        ifo = write_sample_stardict(tmp, 'es-en', entries, dictzip_chunk=1000)
+        dz = ifo.with_suffix('.dict.dz')
+        data = dz.read_bytes()
+        dz.write_bytes(data[:len(data) // 2] + b'\xff' * 200 + data[len(data) // 2 + 200:])
+        try:
+            list(StarDict(ifo).entries())
+        except StarDictError as e:
+            assert 'corrupt' in str(e), e
+        else:
+            raise AssertionError('expected StarDictError')
+        assert stardict.main([str(ifo), str(Path(tmp) / 'out.sqlite')]) == 1
+
+
+def test_typed_fields_without_sametypesequence():
+    with tempfile.TemporaryDirectory() as tmp:
+        ifo = write_sample_stardict(tmp, 'es-en', ENTRIES, sametypesequence='')
+        assert next(StarDict(ifo).entries())[1] == 'house; home'
+
+
+def test_convert_writes_dict_table_in_one_pass():
+    with tempfile.TemporaryDirectory() as tmp:
+        ifo = write_sample_stardict(Path(tmp) / 'src', 'es-en', ENTRIES + [('vacío', '   ')],
+                                    synonyms={'casas': 'casa', 'perro ': 'perro'})
+        out = Path(tmp) / 'es-en.sqlite'
+        counts = convert(ifo, out)
+        assert counts == {'headwords': 4, 'synonyms': 2, 'skipped': 1, 'entries': 5,
+                          'reasons': {'empty definition': 1}, 'merged': 0, 'aliases': 1}
+
+        conn = sqlite3.connect(out)
+        rows = dict(conn.execute('SELECT lemma, def FROM dict'))
+        tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        conn.close()
+        assert rows['casas'] == 'house; home'
+        # A synonym that is also a headword keeps the headword's own definition
+        assert rows['perro'] == 'dog'
+        assert 'vacío' not in rows
+        assert 'alt' not in tables and 'word' not in tables
+
+
+def test_duplicate_headwords_are_merged():
+    with tempfile.TemporaryDirectory() as tmp:
+        ifo = write_sample_stardict(Path(tmp) / 'src', 'es-en', [('banco', 'bank'), ('banco', 'bench')])
+        out = Path(tmp) / 'es-en.sqlite'
+        assert convert(ifo, out)['entries'] == 1
+        conn = sqlite3.connect(out)
+        definition = conn.execute("SELECT def FROM dict WHERE lemma = 'banco'").fetchone()[0]
+        assert definition in ('bank\nbench', 'bench\nbank')
+        conn.close()
+
+
+def test_malformed_entries_are_quarantined_with_reasons():
+    dirty = [
+        (b'caf\xe9', 'latin-1 headword'),
+        ('mala', b'bad \xff byte'),
+        ('cafe\u0301', 'coffee\0'),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        ifo = write_sample_stardict(Path(tmp) / 'src', 'es-en', ENTRIES + dirty,
+                                    synonyms={b'\xfe': 'casa'})
+        out, quarantine = Path(tmp) / 'es-en.sqlite', Path(tmp) / 'quarantine.jsonl'
+        counts = convert(ifo, out, quarantine=quarantine)
+        assert counts['reasons'] == {'invalid utf-8 headword': 1, 'invalid utf-8 definition': 1,
+                                     'invalid utf-8 synonym': 1}
+        assert counts['headwords'] == 5 and counts['skipped'] == 3
+
+        records = [json.loads(line) for line in quarantine.read_text(encoding='utf-8').splitlines()]
+        assert sorted(r['reason'] for r in records) == sorted(counts['reasons'])
+        assert {'lemma': 'mala', 'reason': 'invalid utf-8 definition', 'raw': 'bad \\xff byte'} in records
+
+        conn = sqlite3.connect(out)
+        rows = dict(conn.execute('SELECT lemma, def FROM dict'))
+        conn.close()
+        # NFC-normalized and NUL-stripped inline
+        assert rows['café'] == 'coffee'
+        assert 'mala' not in rows and len(rows) == len(ENTRIES) + 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('StarDict Reader Test', globals()))
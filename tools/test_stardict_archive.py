@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test converting StarDict archives without extracting them
+"""
+
+import sqlite3
+import sys
+import tarfile
+import tempfile
+from pathlib import Path
+
+from sample_stardict import write_sample_stardict
+import stardict_archive
+from stardict import StarDictError
+from stardict_archive import convert_archive, split_member
+from testing import run_tests
+
+ENTRIES = [(f"palabra{i:03d}", f"word {i}") for i in range(200)]
+SYNONYMS = {'palabras': 'palabra001'}
+
+
+def make_archive(tmp, mode, order, dictzip_chunk=None):
+    """Tar the sample dictionary with members in ``order`` (by suffix)"""
+    src = write_sample_stardict(Path(tmp) / 'src', 'es-en', ENTRIES, synonyms=SYNONYMS,
+                                dictzip_chunk=dictzip_chunk).parent
+    files = {p.name[len('es-en'):]: p for p in src.iterdir()}
+    archive = Path(tmp) / f"es-en.tar.{mode}"
+    with tarfile.open(archive, f"w:{mode}") as tar:
+        for suffix in order:
+            tar.add(files[suffix], arcname=f"es-en/es-en{suffix}")
+    return archive
+
+
+def pack_rows(path):
+    conn = sqlite3.connect(path)
+    rows = dict(conn.execute('SELECT lemma, def FROM dict'))
+    conn.close()
+    return rows
+
+
+def test_split_member():
+    assert split_member('a/b.dict.dz') == ('a/b', 'dict')
+    assert split_member('a/b.idx.gz') == ('a/b', 'idx')
+    assert split_member('a/README') == (None, None)
+
+
+def test_index_first_archive_streams_without_spilling():
+    for mode in ('gz', 'xz', 'bz2'):
+        with tempfile.TemporaryDirectory() as tmp:
+            archive = make_archive(tmp, mode, ['.ifo', '.idx', '.syn', '.dict'])
+            counts, spilled = convert_archive(archive, Path(tmp) / 'out.sqlite')
+            assert spilled == [] and counts['entries'] == len(ENTRIES) + 1, mode
+            rows = pack_rows(Path(tmp) / 'out.sqlite')
+            assert rows['palabras'] == 'word 1' and rows['palabra199'] == 'word 199'
+
+
+def test_dictzip_member_streams_too():
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = make_archive(tmp, 'gz', ['.ifo', '.idx', '.syn', '.dict.dz'], dictzip_chunk=256)
+        counts, spilled = convert_archive(archive, Path(tmp) / 'out.sqlite')
+        assert spilled == [] and pack_rows(Path(tmp) / 'out.sqlite')['palabra050'] == 'word 50'
+
+
+def test_dict_before_index_is_spilled():
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = make_archive(tmp, 'xz', ['.dict.dz', '.idx', '.ifo', '.syn'], dictzip_chunk=256)
+        counts, spilled = convert_archive(archive, Path(tmp) / 'out.sqlite', spill_dir=tmp)
+        assert spilled == ['es-en/es-en.dict.dz']
+        assert counts['entries'] == len(ENTRIES) + 1
+        # The spill directory is cleaned up
+        assert not [p for p in Path(tmp).iterdir() if p.name.startswith('stardict-')]
+
+
+def test_late_synonyms_force_a_spill():
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = make_archive(tmp, 'gz', ['.ifo', '.idx', '.dict', '.syn'])
+        counts, spilled = convert_archive(archive, Path(tmp) / 'out.sqlite')
+        assert spilled and pack_rows(Path(tmp) / 'out.sqlite')['palabras'] == 'word 1'
+
+
+
+def test_damaged_archives_fail_cleanly():
+    with tempfile.TemporaryDirectory() as tmp:
+        damaged = []
+        for mode in ('gz', 'xz'):
+            data = make_archive(Path(tmp) / mode, mode, ['.ifo', '.idx', '.syn', '.dict']).read_bytes()
+            damaged.append(Path(tmp) / f"truncated.tar.{mode}")
+            damaged[-1].write_bytes(data[:len(data) // 2])
+        # An intact tar whose dictzip member is cut short fails in the gzip decoder
+        src = write_sample_stardict(Path(tmp) / 'src', 'es-en', ENTRIES, synonyms=SYNONYMS, dictzip_chunk=256).parent
+        dz = src / 'es-en.dict.dz'
+        dz.write_bytes(dz.read_bytes()[:-40])
+        damaged.append(Path(tmp) / 'short-dictzip.tar.gz')
+        with tarfile.open(damaged[-1], 'w:gz') as tar:
+            for suffix in ('.ifo', '.idx', '.syn', '.dict.dz'):
+                tar.add(src / f"es-en{suffix}", arcname=f"es-en/es-en{suffix}")
+        # A .syn after the data forces the dictzip member to be spilled and read back
+        corrupt = dz.read_bytes()
+        dz.write_bytes(corrupt[:-340] + b'\xff' * 200 + corrupt[-140:])
+        damaged.append(Path(tmp) / 'corrupt-spilled-dictzip.tar.gz')
+        with tarfile.open(damaged[-1], 'w:gz') as tar:
+            for suffix in ('.ifo', '.idx', '.dict.dz', '.syn'):
+                tar.add(src / f"es-en{suffix}", arcname=f"es-en/es-en{suffix}")
+
+        for path in damaged:
+            try:
+                convert_archive(path, Path(tmp) / 'out.sqlite')
+            except StarDictError as e:
+                assert path.name in str(e), e
+            else:
+                raise AssertionError(f"{path.name} converted")
+            assert stardict_archive.main([str(path), str(Path(tmp) / 'out.sqlite')]) == 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('StarDict Archive Streaming Test', globals()))
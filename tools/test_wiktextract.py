@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test the streaming Wiktextract converter
+"""
+
+import gzip
+import json
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+from packwriter import write_pack
+from testing import run_tests
+import wiktextract
+from wiktextract import WiktextractError, convert, entries, language_filter
+
+LINES = [
+    {'word': 'casa', 'lang_code': 'es', 'pos': 'noun',
+     'senses': [{'glosses': ['house']}, {'glosses': ['house', 'home, household']}],
+     'forms': [{'form': 'casas', 'tags': ['plural']}, {'form': 'ca-sa', 'tags': ['romanization']}]},
+    {'word': 'casa', 'lang_code': 'es', 'pos': 'verb', 'senses': [{'glosses': ['inflection of casar']}]},
+    {'word': 'house', 'lang_code': 'en', 'pos': 'noun', 'senses': [{'glosses': ['A building']}],
+     'forms': [{'form': 'houses', 'tags': ['plural']}],
+     'translations': [{'lang_code': 'es', 'word': 'casa', 'sense': 'building'},
+                      {'code': 'es', 'word': 'hogar', 'sense': 'building'},
+                      {'lang_code': 'fr', 'word': 'maison', 'sense': 'building'}]},
+    {'word': 'the', 'lang_code': 'en', 'pos': 'article', 'senses': [{'glosses': ['definite article']}]},
+    {'word': 'maison', 'lang_code': 'fr', 'pos': 'noun', 'senses': [{'glosses': ['house']}]},
+]
+
+
+def write_extract(path, lines, copies=1):
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for i in range(copies):
+            for line in lines:
+                entry = dict(line, word=f"{line['word']}{i or ''}")
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        f.write('{"word": "broken", "lang_code": "es", \n')
+
+
+def rows(pack):
+    conn = sqlite3.connect(pack)
+    try:
+        return dict(conn.execute('SELECT lemma, def FROM dict'))
+    finally:
+        conn.close()
+
+
+def test_glosses_and_translations_follow_the_edition():
+    with tempfile.TemporaryDirectory() as tmp:
+        extract = Path(tmp) / 'en-extract.jsonl.gz'
+        write_extract(extract, LINES)
+        counts = convert(extract, Path(tmp) / 'es-en.sqlite', 'es', 'en', jobs=1)
+        spanish = rows(Path(tmp) / 'es-en.sqlite')
+        counts_en = convert(extract, Path(tmp) / 'en-es.sqlite', 'en', 'es', jobs=1)
+        english = rows(Path(tmp) / 'en-es.sqlite')
+
+    # English Wiktionary glosses Spanish words in English; parts of speech merge
+    assert spanish == {'casa': '(noun) 1. house 2. home, household\n(verb) inflection of casar',
+                       'casas': '(noun) 1. house 2. home, household\n(verb) inflection of casar'}
+    assert counts['wiktextract']['definitions'] == 'glosses' and counts['skipped'] == 1
+    # English headwords get their Spanish translations; words without any are left out
+    assert english == {'house': '(noun) building: casa, hogar', 'houses': '(noun) building: casa, hogar'}
+    assert counts_en['wiktextract']['definitions'] == 'translations'
+    assert counts_en['wiktextract']['no_definition'] == 1
+
+
+def test_byte_filter_skips_other_languages_before_parsing():
+    pattern = language_filter('es')
+    assert pattern.search(b'{"word": "casa", "lang_code": "es"}')
+    assert pattern.search(b'{"word":"casa","lang_code":"es"}')
+    assert not pattern.search(b'{"word": "este", "lang_code": "est"}')
+    with tempfile.TemporaryDirectory() as tmp:
+        extract = Path(tmp) / 'en-extract.jsonl.gz'
+        write_extract(extract, LINES, copies=50)
+        stats = {}
+        produced = list(entries(extract, 'es', 'en', jobs=1, stats=stats))
+    assert stats['lines'] == 251
+    # 'house' lines carry a Spanish translation, so they pass the filter and are dropped after parsing
+    assert stats['parsed'] == 151 and stats['other_language'] == 50
+    assert len(produced) == 101
+
+
+def test_parallel_parsing_writes_the_same_pack():
+    with tempfile.TemporaryDirectory() as tmp:
+        extract = Path(tmp) / 'en-extract.jsonl.gz'
+        write_extract(extract, LINES, copies=300)
+        serial, parallel = Path(tmp) / 'serial.sqlite', Path(tmp) / 'parallel.sqlite'
+        write_pack(entries(extract, 'en', 'es', jobs=1, chunk_bytes=2048), serial, language='en')
+        write_pack(entries(extract, 'en', 'es', jobs=3, chunk_bytes=2048), parallel, language='en')
+        assert serial.read_bytes() == parallel.read_bytes()
+        assert len(rows(parallel)) == 301
+
+
+
+def test_damaged_extracts_fail_cleanly():
+    with tempfile.TemporaryDirectory() as tmp:
+        extract = Path(tmp) / 'en-extract.jsonl.gz'
+        write_extract(extract, LINES, copies=300)
+        data = extract.read_bytes()
+        truncated, corrupt = Path(tmp) / 'truncated.jsonl.gz', Path(tmp) / 'corrupt.jsonl.gz'
+        truncated.write_bytes(data[:len(data) // 2])
+        # Garbage early in the deflate stream trips zlib itself, not the gzip framing
+        corrupt.write_bytes(data[:30] + b'\xff' * 8 + data[38:])
+        for damaged in (truncated, corrupt):
+            try:
+                convert(damaged, Path(tmp) / 'out.sqlite', 'en', 'es', jobs=1)
+            except WiktextractError as e:
+                assert damaged.name in str(e), e
+            else:
+                raise AssertionError(f"{damaged.name} converted")
+            assert wiktextract.main([str(damaged), 'en', 'es', str(Path(tmp) / 'out.sqlite'), '--jobs', '1']) == 1
+
+
+
+def test_invalid_utf8_lines_are_quarantined():
+    with tempfile.TemporaryDirectory() as tmp:
+        extract = Path(tmp) / 'en-extract.jsonl.gz'
+        with gzip.open(extract, 'wb') as f:
+            f.write(json.dumps(LINES[0]).encode('utf-8') + b'\n')
+            f.write(b'{"lang_code": "es", "word": "\xff"}\n')
+        quarantine = Path(tmp) / 'quarantine.jsonl'
+        counts = convert(extract, Path(tmp) / 'es-en.sqlite', 'es', 'en', jobs=1, quarantine=quarantine)
+        assert counts['skipped'] == 1 and 'casa' in rows(Path(tmp) / 'es-en.sqlite')
+        [record] = [json.loads(line) for line in quarantine.read_text().splitlines()]
+        assert record['reason'] == 'invalid UTF-8 at byte 29'
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Wiktextract Converter Test', globals()))
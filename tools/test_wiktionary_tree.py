@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test git tree parsing and SHA-based change detection for Wiktionary discovery
+"""
+
+import sys
+
+from testing import run_tests
+from wiktionary_tree import diff_dictionaries, list_dictionaries
+
+
+class FakeProber:
+    def __init__(self, tree):
+        self.tree = tree
+        self.requested = []
+
+    def get_json(self, url, timeout=30):
+        self.requested.append(url)
+        return self.tree
+
+
+TREE = {
+    'truncated': False,
+    'tree': [
+        {'path': 'README.md', 'type': 'blob', 'size': 10, 'sha': 'r1'},
+        {'path': 'Spanish-English Wiktionary dictionary stardict.tar.gz',
+         'type': 'blob', 'size': 4823449, 'sha': 'a1'},
+        {'path': 'Latin-English Wiktionary dictionary stardict.tar.gz',
+         'type': 'blob', 'size': 2000000, 'sha': 'b1'},
+        {'path': 'old', 'type': 'tree', 'sha': 't1'}
+    ]
+}
+
+
+def test_list_dictionaries_uses_one_tree_request():
+    prober = FakeProber(TREE)
+    found = list_dictionaries(prober, lambda lang1, lang2: lang1 == 'spanish')
+    assert len(prober.requested) == 1 and 'recursive=1' in prober.requested[0]
+    assert found == [{
+        'filename': 'Spanish-English Wiktionary dictionary stardict.tar.gz',
+        'lang1': 'spanish',
+        'lang2': 'english',
+        'raw_url': 'https://raw.githubusercontent.com/Vuizur/Wiktionary-Dictionaries/master/'
+                   'Spanish-English%20Wiktionary%20dictionary%20stardict.tar.gz',
+        'size_bytes': 4823449,
+        'sha': 'a1'
+    }]
+
+
+def test_diff_reports_added_removed_changed():
+    previous = {'es-en': {'sha': 'a1'}, 'fr-en': {'sha': 'c1'}, 'de-en': {'sha': 'd1'}, 'it-en': {}}
+    current = {'es-en': {'sha': 'a1'}, 'fr-en': {'sha': 'c2'}, 'la-en': {'sha': 'b1'}, 'it-en': {'sha': 'e1'}}
+    changes = diff_dictionaries(previous, current)
+    assert changes['added'] == ['la-en']
+    assert changes['removed'] == ['de-en']
+    assert changes['changed'] == ['fr-en', 'it-en']
+    assert changes['unchanged'] == 1
+    assert changes['rebuild'] == ['fr-en', 'it-en', 'la-en']
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests('Wiktionary Tree Test', globals()))
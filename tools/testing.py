@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Shared runner for the test_*.py modules
+Every test module runs under pytest, or on its own as a script
+(python3 test_packwriter.py), which runs its test_* functions in file order
+and prints one ✅/❌ line per test.
+"""
+
+
+def run_tests(title, namespace):
+    """Run the test_* functions defined in ``namespace`` (a module's globals()); returns the exit code"""
+    print(f"🧪 {title}")
+    print("=" * 30)
+    tests = [value for name, value in namespace.items()
+             if name.startswith('test_') and callable(value)
+             and getattr(value, '__module__', None) == namespace['__name__']]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Streaming Wiktextract (kaikki.org JSONL) -> SQLite pack converter
+The gzipped extract is read line by line and never decompressed to disk.
+Each line is matched against the wanted `"lang_code"` as bytes first, so
+the JSON of other languages' entries is never parsed; the surviving lines
+are parsed in chunks on a process pool and their senses, glosses,
+translations and inflected forms go straight into the pack writer
+(packwriter.py), which stages rows in SQLite in fixed-size batches. At
+most `jobs * 2` chunks of CHUNK_BYTES are in flight, so memory stays
+bounded however large the extract is.
+
+Headwords are the entries in the source language. When the target is the
+language of the Wiktionary edition the definitions are that edition's
+glosses (English Wiktionary describes Spanish words in English); otherwise
+they are the entry's translations into the target (English headwords with
+their Spanish translations).
+
+Usage:
+    python3 wiktextract.py es-extract.jsonl.gz es es es-es.sqlite
+    python3 wiktextract.py en-extract.jsonl.gz en es en-es.sqlite --jobs 4
+    python3 wiktextract.py en-extract.jsonl.gz es en es-en.sqlite   # Spanish words, English glosses
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from def_codec import APP_CODECS, CodecError
+from downloader import DownloadError, download
+from packwriter import Rejected, pack_options, write_pack
+from stardict import report
+
+KAIKKI_URL = 'https://kaikki.org/dictionary/downloads/{edition}/{edition}-extract.jsonl.gz'
+CHUNK_BYTES = 4 * 1024 * 1024
+# Form tags that name inflection tables or transliterations rather than spellings
+SKIPPED_FORM_TAGS = {'table-tags', 'inflection-template', 'class', 'romanization', 'transliteration'}
+
+
+class WiktextractError(Exception):
+    """Raised for an extract that cannot be read"""
+
+
+def language_filter(code):
+    """Byte pattern for a line that mentions ``"lang_code": "<code>"``
+
+    A prefilter only: translations carry their own lang_code, so a match
+    is confirmed on the parsed entry.
+    """
+    return re.compile(rb'"lang_code":\s*"' + re.escape(code.encode()) + rb'"')
+
+
+def edition_of(path):
+    """Wiktionary edition from a kaikki file name (es-extract.jsonl.gz -> es), else None"""
+    match = re.match(r'([a-z]{2,3})-extract\b', Path(path).name)
+    return match.group(1) if match else None
+
+
+def _unique(items):
+    return list(dict.fromkeys(item for item in items if item))
+
+
+def glosses(entry):
+    """The most specific gloss of every sense, in order"""
+    found = []
+    for sense in entry.get('senses') or ():
+        texts = sense.get('glosses') or sense.get('raw_glosses') or ()
+        if texts and isinstance(texts[-1], str):
+            found.append(texts[-1].strip())
+    return _unique(found)
+
+
+def translations(entry, target):
+    """[(sense, [words])] of the entry's translations into ``target``, grouped by sense"""
+    items = list(entry.get('translations') or ())
+    for sense in entry.get('senses') or ():
+        items.extend(sense.get('translations') or ())
+    grouped = {}
+    for item in items:
+        if (item.get('lang_code') or item.get('code')) == target and item.get('word'):
+            grouped.setdefault((item.get('sense') or '').strip(), []).append(item['word'].strip())
+    return [(sense, _unique(words)) for sense, words in grouped.items()]
+
+
+def forms(entry):
+    """Inflected and alternate spellings of the headword"""
+    word = entry['word']
+    return _unique(form.get('form', '').strip() for form in entry.get('forms') or ()
+                   if form.get('form') != word and not SKIPPED_FORM_TAGS.intersection(form.get('tags') or ()))
+
+
+def definition(entry, target, use_glosses):
+    """One definition line for an entry, or '' when it has nothing in the target language"""
+    pos = entry.get('pos')
+    if use_glosses:
+        senses = glosses(entry)
+        body = ' '.join(f"{i}. {gloss}" for i, gloss in enumerate(senses, 1)) if len(senses) > 1 else ''.join(senses)
+    else:
+        body = '; '.join(f"{sense}: {', '.join(words)}" if sense else ', '.join(words)
+                         for sense, words in translations(entry, target))
+    if not body:
+        return ''
+    return f"({pos}) {body}" if pos else body
+
+
+def parse_chunk(lines, source, target, use_glosses):
+    """Pack rows for a chunk of prefiltered JSON lines (runs in a worker process)
+
+    Returns (entries, lines that were another language's, lines without
+    anything in the target language).
+    """
+    rows, other, empty = [], 0, 0
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except UnicodeDecodeError as e:
+            rows.append(Rejected('', f"invalid UTF-8 at byte {e.start}", line[:200]))
+            continue
+        except ValueError as e:
+            rows.append(Rejected('', f"invalid JSON: {e.msg}", line[:200]))
+            continue
+        if entry.get('lang_code') != source or not isinstance(entry.get('word'), str):
+            other += 1
+            continue
+        text = definition(entry, target, use_glosses)
+        if not text:
+            empty += 1
+            continue
+        rows.append((entry['word'], text, forms(entry)))
+    return rows, other, empty
+
+
+def _chunks(stream, pattern, stats, chunk_bytes=CHUNK_BYTES):
+    """Lists of lines matching ``pattern``, about ``chunk_bytes`` each"""
+    chunk, size = [], 0
+    for line in stream:
+        stats['lines'] += 1
+        if not pattern.search(line):
+            continue
+        chunk.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+
+def _open(path):
+    path = Path(path)
+    with open(path, 'rb') as f:
+        magic = f.read(2)
+    return gzip.open(path, 'rb') if magic == b'\x1f\x8b' else open(path, 'rb')
+
+
+def entries(path, source, target, edition=None, jobs=None, stats=None, chunk_bytes=CHUNK_BYTES):
+    """Yield (lemma, definition, forms) rows, and Rejected lines, from a Wiktextract extract
+
+    Rows come out in file order whatever the number of workers. ``stats``
+    (a dict) receives line counts as the extract is read.
+    """
+    edition = edition or edition_of(path) or 'en'
+    use_glosses = target == edition
+    stats = stats if stats is not None else {}
+    stats.update({'lines': 0, 'parsed': 0, 'other_language': 0, 'no_definition': 0,
+                  'definitions': 'glosses' if use_glosses else 'translations'})
+    pattern = language_filter(source)
+    jobs = jobs or os.cpu_count() or 1
+
+    def collect(chunk, result):
+        rows, other, empty = result
+        stats['parsed'] += len(chunk)
+        stats['other_language'] += other
+        stats['no_definition'] += empty
+        return rows
+
+    try:
+        with _open(path) as stream:
+            if jobs == 1:
+                for chunk in _chunks(stream, pattern, stats, chunk_bytes):
+                    yield from collect(chunk, parse_chunk(chunk, source, target, use_glosses))
+                return
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                pending = deque()
+                for chunk in _chunks(stream, pattern, stats, chunk_bytes):
+                    pending.append((chunk, pool.submit(parse_chunk, chunk, source, target, use_glosses)))
+                    # Bounded read-ahead: the reader waits for the oldest chunk
+                    if len(pending) >= jobs * 2:
+                        done, future = pending.popleft()
+                        yield from collect(done, future.result())
+                while pending:
+                    done, future = pending.popleft()
+                    yield from collect(done, future.result())
+    except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+        raise WiktextractError(f"{path}: truncated or corrupt extract ({e})") from e
+
+
+def convert(path, out_path, source, target, *, edition=None, jobs=None, **options):
+    """Convert a Wiktextract extract into a source -> target pack; returns conversion counts
+
+    ``options`` are write_pack's keyword options; the headword and gloss
+    languages come from ``source`` and ``target``.
+    """
+    stats = {}
+    counts = write_pack(entries(path, source, target, edition, jobs, stats), out_path,
+                        language=source, gloss_language=target, **options)
+    counts['wiktextract'] = stats
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert a Wiktextract JSONL extract to a SQLite pack')
+    parser.add_argument('extract', help='kaikki.org .jsonl(.gz) file, or an edition code (en, es) to download')
+    parser.add_argument('source', help='ISO 639-1 code of the headwords')
+    parser.add_argument('target', help='ISO 639-1 code of the definitions')
+    parser.add_argument('out')
+    parser.add_argument('--edition', help='Wiktionary edition of the extract (default: from the file name, else en)')
+    parser.add_argument('--download-dir', default='.', help='where a downloaded extract is kept')
+    parser.add_argument('--jobs', type=int, help='parser processes (default: CPU count)')
+    parser.add_argument('--min-entries', type=int, default=1000,
+                        help='warn when the pack has fewer entries than this')
+    parser.add_argument('--quarantine', help='write unparseable lines here as JSON lines')
+    parser.add_argument('--compress-defs', choices=APP_CODECS,
+                        help='compress definitions with a dictionary trained on the pack')
+    parser.add_argument('--fts', action='store_true', help='add an FTS5 index over the definition glosses')
+    parser.add_argument('--completions', action='store_true', help='add the ranked prefix completion index')
+    parser.add_argument('--frequencies', help="'word count' list to rank completions by")
+    args = parser.parse_args(argv)
+
+    extract = args.extract
+    edition = args.edition
+    try:
+        if not Path(extract).exists() and re.fullmatch(r'[a-z]{2,3}', extract):
+            edition = edition or extract
+            url = KAIKKI_URL.format(edition=extract)
+            extract = Path(args.download_dir) / url.rsplit('/', 1)[-1]
+            if not extract.exists():
+                print(f"📡 Downloading {url}")
+                download(url, extract)
+        print(f"🔄 Converting {extract} ({args.source} -> {args.target}) -> {args.out}")
+        counts = convert(extract, args.out, args.source, args.target, edition=edition, jobs=args.jobs,
+                         **pack_options(args))
+    except (WiktextractError, DownloadError, CodecError, OSError) as e:
+        print(f"❌ Conversion failed: {e}")
+        return 1
+    stats = counts['wiktextract']
+    print(f"📖 {stats['lines']} lines read, {stats['parsed']} parsed after the byte filter "
+          f"({stats['other_language']} other-language, {stats['no_definition']} without {stats['definitions']})")
+    return report(counts, args.min_entries)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
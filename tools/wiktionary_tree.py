@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Vuizur/Wiktionary-Dictionaries repository listing via the git trees API
+One recursive tree request returns every file with its size and blob SHA,
+which lets discovery diff runs and rebuild only dictionaries that changed
+"""
+
+import re
+from urllib.parse import quote
+
+REPO = 'Vuizur/Wiktionary-Dictionaries'
+BRANCH = 'master'
+
+_FILENAME_RE = re.compile(r'^([^-]+)-([^-]+)\s+Wiktionary\s+dictionary\s+stardict\.tar\.gz$')
+
+
+def tree_url(repo=REPO, ref=BRANCH):
+    return f"https://api.github.com/repos/{repo}/git/trees/{ref}?recursive=1"
+
+
+def raw_url(path, repo=REPO, ref=BRANCH):
+    return f"https://raw.githubusercontent.com/{repo}/{ref}/{quote(path)}"
+
+
+def fetch_repo_tree(prober, repo=REPO, ref=BRANCH):
+    """Return every blob in the repository as {'path', 'size', 'sha'} dicts"""
+    tree = prober.get_json(tree_url(repo, ref))
+    if tree.get('truncated'):
+        # Only happens past 100k entries / 7 MB; the repo is far below that
+        print(f"⚠️ Git tree for {repo}@{ref} was truncated by the API")
+    return [
+        {'path': item['path'], 'size': item.get('size'), 'sha': item['sha']}
+        for item in tree.get('tree', [])
+        if item.get('type') == 'blob'
+    ]
+
+
+def parse_dictionary_filename(filename):
+    """Split "Lang1-Lang2 Wiktionary dictionary stardict.tar.gz" into lowercase names"""
+    match = _FILENAME_RE.match(filename)
+    if not match:
+        return None
+    return match.group(1).lower(), match.group(2).lower()
+
+
+def list_dictionaries(prober, accept, repo=REPO, ref=BRANCH):
+    """List StarDict archives in the repo whose (lang1, lang2) pass ``accept``"""
+    dictionaries = []
+    for blob in fetch_repo_tree(prober, repo, ref):
+        filename = blob['path'].rsplit('/', 1)[-1]
+        langs = parse_dictionary_filename(filename)
+        if langs and accept(*langs):
+            dictionaries.append({
+                'filename': filename,
+                'lang1': langs[0],
+                'lang2': langs[1],
+                'raw_url': raw_url(blob['path'], repo, ref),
+                'size_bytes': blob['size'],
+                'sha': blob['sha']
+            })
+    return dictionaries
+
+
+def diff_dictionaries(previous, current):
+    """Compare two {pair: entry} maps by blob SHA
+
+    Entries from older outputs without a SHA count as changed, since they
+    cannot be proven identical.
+    """
+    added = sorted(set(current) - set(previous))
+    removed = sorted(set(previous) - set(current))
+    changed = sorted(
+        pair for pair in set(current) & set(previous)
+        if not previous[pair].get('sha') or previous[pair]['sha'] != current[pair].get('sha')
+    )
+    return {
+        'added': added,
+        'removed': removed,
+        'changed': changed,
+        'unchanged': len(set(current) & set(previous)) - len(changed),
+        'rebuild': sorted(added + changed)
+    }
+
+
+def print_changes(changes):
+    print(f"\n🔁 CHANGES SINCE LAST RUN:")
+    for label, key in (('Added', 'added'), ('Removed', 'removed'), ('Changed', 'changed')):
+        pairs = changes[key]
+        print(f"  {label}: {', '.join(pairs) if pairs else 'none'}")
+    print(f"  Unchanged: {changes['unchanged']}")
+    print(f"  Needs rebuild: {', '.join(changes['rebuild']) if changes['rebuild'] else 'nothing'}")